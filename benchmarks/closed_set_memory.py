@@ -0,0 +1,110 @@
+'''
+Reports the memory used by the closed set (the visited states) of a graph
+search on the eight puzzle, comparing states stored as tuples of tuples with
+states stored encoded as ints (SearchProblem.encode_state).
+
+Usage: python benchmarks/closed_set_memory.py [states_count]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run from a checkout, without installing simpleai
+sys.path.insert(0, ROOT)
+
+from simpleai.search import SearchProblem
+from simpleai.search.models import closed_set
+
+
+GOAL = ((1, 2, 3),
+        (4, 5, 6),
+        (7, 8, 0))
+
+
+class EightPuzzleProblem(SearchProblem):
+    '''Eight puzzle with tuples of tuples as states, 0 is the empty space.'''
+    def actions(self, state):
+        row, column = self._find(state, 0)
+        return [(row + dr, column + dc)
+                for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                if 0 <= row + dr < 3 and 0 <= column + dc < 3]
+
+    def result(self, state, action):
+        rows = [list(row) for row in state]
+        row, column = self._find(state, 0)
+        other_row, other_column = action
+        rows[row][column] = rows[other_row][other_column]
+        rows[other_row][other_column] = 0
+        return tuple(tuple(row) for row in rows)
+
+    def is_goal(self, state):
+        return state == GOAL
+
+    def _find(self, state, tile):
+        for row, tiles in enumerate(state):
+            if tile in tiles:
+                return row, tiles.index(tile)
+
+
+class EncodedEightPuzzleProblem(EightPuzzleProblem):
+    '''Same problem, encoding each state as an int (9 digits in base 9).'''
+    def encode_state(self, state):
+        encoded = 0
+        for row in state:
+            for tile in row:
+                encoded = encoded * 9 + tile
+        return encoded
+
+    def decode_state(self, encoded):
+        tiles = []
+        for _ in range(9):
+            encoded, tile = divmod(encoded, 9)
+            tiles.append(tile)
+        tiles.reverse()
+        return tuple(tuple(tiles[i:i + 3]) for i in range(0, 9, 3))
+
+
+def reachable_states(problem, count):
+    '''The first count states found by a breadth first search.'''
+    states = [problem.initial_state]
+    seen = set(states)
+    i = 0
+    while len(states) < count and i < len(states):
+        state = states[i]
+        for action in problem.actions(state):
+            new_state = problem.result(state, action)
+            if new_state not in seen:
+                seen.add(new_state)
+                states.append(new_state)
+        i += 1
+    return states[:count]
+
+
+def closed_set_bytes(problem, count):
+    '''
+    Memory used by the closed set that _search would use for problem, after
+    adding count states to it. The states are rebuilt before adding them,
+    like the search does when it creates each node.
+    '''
+    states = reachable_states(problem, count)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    memory = closed_set(problem)
+    for state in states:
+        memory.add(tuple(tuple(list(row)) for row in state))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    initial_state = ((4, 1, 2), (7, 0, 3), (8, 5, 6))
+    print('%-12s %14s %16s' % ('states', 'total (bytes)', 'per state'))
+    for name, problem_class in (('tuples', EightPuzzleProblem),
+                                ('encoded', EncodedEightPuzzleProblem)):
+        total = closed_set_bytes(problem_class(initial_state), count)
+        print('%-12s %14i %16.1f' % (name, total, total / float(count)))
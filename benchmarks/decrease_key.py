@@ -0,0 +1,97 @@
+'''
+Compares the cost of re-prioritizing nodes on the fringe of uniform cost
+graph search, on a large grid with random step costs (lots of cheaper paths
+found to nodes already in the fringe).
+
+The "linear" fringe removes the replaced node with list.remove + heapify
+(rebuilding the whole heap each time), while the "indexed" one is the
+IndexedPriorityQueue used by uniform_cost, greedy and astar.
+
+Usage: python benchmarks/decrease_key.py [grid_size]
+'''
+from __future__ import print_function
+
+import heapq
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run from a checkout, without installing simpleai
+sys.path.insert(0, ROOT)
+
+from simpleai.search import SearchProblem
+from simpleai.search.models import SearchNodeCostOrdered
+from simpleai.search.traditional import _search
+from simpleai.search.utils import (BoundedPriorityQueue, IndexedPriorityQueue,
+                                   StateIndexMixin)
+
+
+class LinearPriorityQueue(StateIndexMixin, BoundedPriorityQueue):
+    '''Indexed queue that re-prioritizes with list.remove + heapify.'''
+    def __init__(self):
+        super(LinearPriorityQueue, self).__init__()
+        self.index = {}
+
+    def append(self, x):
+        heapq.heappush(self.queue, x)
+        self._index_add(x)
+
+    def pop(self):
+        x = heapq.heappop(self.queue)
+        self._index_discard(x)
+        return x
+
+    def remove(self, x):
+        self.queue.remove(x)
+        heapq.heapify(self.queue)
+        self._index_discard(x)
+
+
+class GridProblem(SearchProblem):
+    def __init__(self, size, seed=0):
+        rnd = random.Random(seed)
+        self.size = size
+        self.costs = [[rnd.randint(1, 9) for _ in range(size)]
+                      for _ in range(size)]
+        super(GridProblem, self).__init__((0, 0))
+
+    def actions(self, state):
+        x, y = state
+        return [(x + dx, y + dy)
+                for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                if (dx or dy) and 0 <= x + dx < self.size and
+                0 <= y + dy < self.size]
+
+    def result(self, state, action):
+        return action
+
+    def cost(self, state, action, state2):
+        return self.costs[state[0]][state[1]] * self.costs[state2[0]][state2[1]]
+
+    def is_goal(self, state):
+        return state == (self.size - 1, self.size - 1)
+
+
+def run(fringe_class, problem):
+    start = time.time()
+    node = _search(problem,
+                   fringe_class(),
+                   graph_search=True,
+                   node_factory=SearchNodeCostOrdered,
+                   graph_replace_when_better=True)
+    return node.cost, time.time() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    problem = GridProblem(size)
+    print('Uniform cost graph search on a %ix%i grid' % (size, size))
+    costs = []
+    for name, fringe_class in (('linear', LinearPriorityQueue),
+                               ('indexed', IndexedPriorityQueue)):
+        cost, elapsed = run(fringe_class, problem)
+        costs.append(cost)
+        print('%-8s cost=%s  %.2fs' % (name, cost, elapsed))
+    assert costs[0] == costs[1], 'the fringes found different solutions'
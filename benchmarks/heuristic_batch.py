@@ -0,0 +1,93 @@
+'''
+Compares A* on a grid when the heuristic is calculated with numpy one state
+at a time (SearchProblem.heuristic) and for all the successors of a node at
+once (SearchProblem.heuristic_batch).
+
+The heuristic is the biggest of the distances to the goal through a set of
+landmarks (like the ALT heuristic), vectorized with numpy.
+
+Usage: python benchmarks/heuristic_batch.py [grid_size] [landmarks_count]
+'''
+from __future__ import print_function
+
+import os
+import random
+import sys
+import time
+
+import numpy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run from a checkout, without installing simpleai
+sys.path.insert(0, ROOT)
+
+from simpleai.search import SearchProblem
+from simpleai.search.traditional import astar
+
+
+class GridProblem(SearchProblem):
+    '''8-connected grid, from a corner to the opposite one.'''
+    def __init__(self, size, landmarks_count, seed=0):
+        rnd = random.Random(seed)
+        self.size = size
+        self.goal = (size - 1, size - 1)
+        # cells where the landmarks are
+        self.landmarks = numpy.array([(rnd.randrange(size),
+                                       rnd.randrange(size))
+                                      for _ in range(landmarks_count)],
+                                     dtype=float)
+        self.goal_distances = self._distances(numpy.array([self.goal],
+                                                          dtype=float))[0]
+        super(GridProblem, self).__init__((0, 0))
+
+    def _distances(self, points):
+        '''Octile distance from each point to each landmark.'''
+        deltas = numpy.abs(points[:, None, :] - self.landmarks[None, :, :])
+        bigger = deltas.max(axis=2)
+        smaller = deltas.min(axis=2)
+        return bigger + (2 ** 0.5 - 1) * smaller
+
+    def actions(self, state):
+        x, y = state
+        return [(x + dx, y + dy)
+                for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                if (dx or dy) and 0 <= x + dx < self.size and
+                0 <= y + dy < self.size]
+
+    def result(self, state, action):
+        return action
+
+    def cost(self, state, action, state2):
+        if state[0] != state2[0] and state[1] != state2[1]:
+            return 2 ** 0.5
+        return 1
+
+    def is_goal(self, state):
+        return state == self.goal
+
+    def heuristic(self, state):
+        distances = self._distances(numpy.array([state], dtype=float))[0]
+        return float(numpy.abs(distances - self.goal_distances).max())
+
+
+class BatchGridProblem(GridProblem):
+    def heuristic_batch(self, states):
+        distances = self._distances(numpy.array(states, dtype=float))
+        return numpy.abs(distances - self.goal_distances).max(axis=1)
+
+
+def run(problem):
+    start = time.time()
+    node = astar(problem, graph_search=True)
+    return node.cost, time.time() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    landmarks_count = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    print('A* graph search on a %ix%i grid, %i landmarks' % (
+        size, size, landmarks_count))
+    for name, problem_class in (('single', GridProblem),
+                                ('batch', BatchGridProblem)):
+        cost, elapsed = run(problem_class(size, landmarks_count))
+        print('%-8s cost=%.2f  %.2fs' % (name, cost, elapsed))
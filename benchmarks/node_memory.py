@@ -0,0 +1,60 @@
+'''
+Reports the memory used by each search node (in bytes), comparing the
+regular SearchNode classes with their compact (__slots__ based) versions.
+
+Usage: python benchmarks/node_memory.py [nodes_count]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run from a checkout, without installing simpleai
+sys.path.insert(0, ROOT)
+
+from simpleai.search import SearchProblem
+from simpleai.search.models import (SearchNode, SearchNodeCostOrdered,
+                                    SearchNodeHeuristicOrdered,
+                                    SearchNodeStarOrdered,
+                                    SearchNodeValueOrdered,
+                                    compact_node_factory)
+
+
+class CountingProblem(SearchProblem):
+    def heuristic(self, state):
+        return state
+
+    def value(self, state):
+        return state
+
+
+def bytes_per_node(node_factory, problem, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    parent = node_factory(state=0, problem=problem)
+    nodes = [parent]
+    for i in range(1, count):
+        # states and costs are small ints, which are cached by python, so
+        # only the nodes themselves are measured
+        node = node_factory(state=i % 256, parent=parent, action=None,
+                            cost=i % 256, problem=problem, depth=i % 256)
+        nodes.append(node)
+        parent = node
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / float(count)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    problem = CountingProblem()
+    print('%-28s %10s %10s' % ('node class', 'regular', 'compact'))
+    for node_class in (SearchNode, SearchNodeCostOrdered,
+                       SearchNodeHeuristicOrdered, SearchNodeStarOrdered,
+                       SearchNodeValueOrdered):
+        regular = bytes_per_node(node_class, problem, count)
+        compact = bytes_per_node(compact_node_factory(node_class, problem),
+                                 problem, count)
+        print('%-28s %10.1f %10.1f' % (node_class.__name__, regular, compact))
@@ -0,0 +1,76 @@
+'''
+Compares a breadth first graph search with big states (long tuples of bits,
+where only the first bits can be flipped) when the visited states are
+hashed whole on each lookup, and when they are hashed incrementally
+(SearchProblem.update_state_hash, with Zobrist hashes).
+
+Usage: python benchmarks/state_hashing.py [state_size] [flippable_bits]
+'''
+from __future__ import print_function
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run from a checkout, without installing simpleai
+sys.path.insert(0, ROOT)
+
+from simpleai.search import SearchProblem, SearchStats
+from simpleai.search.traditional import breadth_first
+
+
+class FlipBitsProblem(SearchProblem):
+    '''Turn on the flippable bits of a tuple, flipping one at a time.'''
+    def __init__(self, size, flippable):
+        self.flippable = flippable
+        super(FlipBitsProblem, self).__init__((0,) * size)
+
+    def actions(self, state):
+        return range(self.flippable)
+
+    def result(self, state, action):
+        bits = list(state)
+        bits[action] = 1 - bits[action]
+        return tuple(bits)
+
+    def is_goal(self, state):
+        return all(state[:self.flippable])
+
+
+class ZobristFlipBitsProblem(FlipBitsProblem):
+    '''Same problem, hashing the states incrementally.'''
+    def __init__(self, size, flippable):
+        rnd = random.Random(0)
+        self.numbers = [rnd.getrandbits(64) for _ in range(size)]
+        super(ZobristFlipBitsProblem, self).__init__(size, flippable)
+
+    def state_hash(self, state):
+        value = 0
+        for number, bit in zip(self.numbers, state):
+            if bit:
+                value ^= number
+        return value
+
+    def update_state_hash(self, state_hash, state, action, new_state):
+        return state_hash ^ self.numbers[action]
+
+
+def run(problem):
+    stats = SearchStats()
+    start = time.time()
+    node = breadth_first(problem, graph_search=True, stats=stats)
+    return node.depth, stats, time.time() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    flippable = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    print('breadth first graph search, states of %i bits, %i flippable' % (
+        size, flippable))
+    for name, problem_class in (('whole', FlipBitsProblem),
+                                ('zobrist', ZobristFlipBitsProblem)):
+        depth, stats, elapsed = run(problem_class(size, flippable))
+        print('%-8s depth=%i  expanded=%i  duplicates=%i  %.2fs' % (
+            name, depth, stats.expanded, stats.duplicates, elapsed))
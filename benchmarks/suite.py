@@ -0,0 +1,403 @@
+'''
+Benchmark suite for simpleai.search, to tell if a change makes the
+algorithms faster or slower.
+
+Runs each algorithm on the problems of samples/search (eight puzzle,
+missionaries and cannibals, sudoku, Australia map coloring, 3-SAT and
+cryptarithmetic), and on synthetic grids and random graphs whose size
+grows with --scale. For each benchmark it measures the wall time (the best
+of --repeat runs), the nodes expanded per second (using SearchStats), and
+the peak memory allocated (using tracemalloc, on a separate run so tracing
+doesn't slow the timed ones).
+
+The results are written as JSON, and can be compared against a baseline
+saved from a previous run: benchmarks that got slower (or used more
+memory) by more than --tolerance are reported as regressions, and the
+script exits with status 1.
+There is no baseline in the repository (the times depend on the machine),
+so create it with --save-baseline on your machine before the change. It's
+saved as benchmarks/baseline.json, which git ignores.
+
+Usage (from the root of the repository):
+
+    # save the baseline, before the change
+    python benchmarks/suite.py --save-baseline
+    # compare, after the change
+    python benchmarks/suite.py --output results.json
+
+    python benchmarks/suite.py --filter astar --scale 2
+'''
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# run from a checkout, without installing simpleai
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'samples', 'search'))
+
+from simpleai.search import (SearchProblem, CspProblem, SearchStats,
+                             breadth_first, depth_first, uniform_cost,
+                             greedy, astar, ida_star, hill_climbing, beam,
+                             backtrack, min_conflicts, convert_to_binary,
+                             MOST_CONSTRAINED_VARIABLE,
+                             LEAST_CONSTRAINING_VALUE)
+from simpleai.search.models import problem_timing
+
+import australia
+import cryptarithmetic
+import eight_puzzle
+import missioners
+import sudoku
+import threesat
+
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+
+# Search problems
+
+class EightPuzzleProblem(eight_puzzle.EigthPuzzleProblem):
+    '''The eight puzzle of the samples, with a value for local search.'''
+    def value(self, state):
+        return -self.heuristic(state)
+
+
+class GridProblem(SearchProblem):
+    '''
+    Path from a corner of a size x size grid to the opposite one, with
+    random walls (density of the cells) and random step costs, 4-connected.
+    '''
+    def __init__(self, size, density=0.2, seed=0):
+        rnd = random.Random(seed)
+        self.size = size
+        self.walls = set((x, y) for x in range(size) for y in range(size)
+                         if rnd.random() < density)
+        self.goal = (size - 1, size - 1)
+        self.walls.discard((0, 0))
+        self.walls.discard(self.goal)
+        self.costs = [[rnd.randint(1, 5) for _ in range(size)]
+                      for _ in range(size)]
+        super(GridProblem, self).__init__((0, 0))
+
+    def actions(self, state):
+        x, y = state
+        return [(x + dx, y + dy)
+                for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1))
+                if 0 <= x + dx < self.size and 0 <= y + dy < self.size and
+                (x + dx, y + dy) not in self.walls]
+
+    def result(self, state, action):
+        return action
+
+    def cost(self, state, action, state2):
+        return self.costs[state2[0]][state2[1]]
+
+    def is_goal(self, state):
+        return state == self.goal
+
+    def heuristic(self, state):
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def value(self, state):
+        return -self.heuristic(state)
+
+    def generate_random_state(self):
+        while True:
+            state = (random.randrange(self.size), random.randrange(self.size))
+            if state not in self.walls:
+                return state
+
+
+class RandomGraphProblem(SearchProblem):
+    '''
+    Path between two nodes of a random directed graph, with nodes_count
+    nodes placed on a plane, each one linked to `degree` random others, and
+    the euclidean distance as cost and heuristic.
+    '''
+    def __init__(self, nodes_count, degree=4, seed=0):
+        rnd = random.Random(seed)
+        self.positions = [(rnd.random(), rnd.random())
+                          for _ in range(nodes_count)]
+        self.edges = [rnd.sample(range(nodes_count), degree)
+                      for _ in range(nodes_count)]
+        self.goal = nodes_count - 1
+        super(RandomGraphProblem, self).__init__(0)
+
+    def actions(self, state):
+        return self.edges[state]
+
+    def result(self, state, action):
+        return action
+
+    def cost(self, state, action, state2):
+        return self._distance(state, state2)
+
+    def is_goal(self, state):
+        return state == self.goal
+
+    def heuristic(self, state):
+        return self._distance(state, self.goal)
+
+    def _distance(self, a, b):
+        (xa, ya), (xb, yb) = self.positions[a], self.positions[b]
+        return ((xa - xb) ** 2 + (ya - yb) ** 2) ** 0.5
+
+
+# Constraint satisfaction problems
+
+def sudoku_problem():
+    '''The sudoku of the samples, with binary constraints.'''
+    return CspProblem(sudoku.variables, deepcopy(sudoku.domains),
+                      sudoku.mkconstraints())
+
+
+def australia_problem():
+    '''The map coloring of the samples.'''
+    return CspProblem(australia.variables, deepcopy(australia.domains),
+                      australia.constraints)
+
+
+def threesat_problem(binary=False):
+    '''The 3-SAT formula of the samples.'''
+    variables, domains, constraints = (threesat.variables,
+                                       deepcopy(threesat.domains),
+                                       threesat.constraints)
+    if binary:
+        variables, domains, constraints = convert_to_binary(variables, domains,
+                                                            constraints)
+    return CspProblem(variables, domains, constraints)
+
+
+def cryptarithmetic_problem():
+    '''TWO + TWO = FOUR, from the samples.'''
+    return CspProblem(cryptarithmetic.variables,
+                      deepcopy(cryptarithmetic.domains),
+                      cryptarithmetic.constraints)
+
+
+# Benchmarks
+
+def _counting_expansions(search, problem, stats, **kwargs):
+    '''
+    Runs a search that doesn't receive stats, counting the calls to actions
+    and result of the problem as its expanded and generated nodes.
+    '''
+    if stats is None:
+        return search(problem, **kwargs)
+    with problem_timing(stats, problem):
+        result = search(problem, **kwargs)
+    stats.expanded += stats.calls['actions']
+    stats.generated += stats.calls['result']
+    return result
+
+
+def benchmarks(scale=1):
+    '''
+    Returns a list of (name, problem factory, run) tuples, where run
+    receives a problem and a SearchStats (or None, for the timed runs). The
+    problems are built again for each run, so caches or changes from
+    previous runs don't count.
+    '''
+    puzzle = lambda: EightPuzzleProblem(eight_puzzle.INITIAL)
+    grid_size = 100 * scale
+    grid = lambda: GridProblem(grid_size)
+    graph_size = 20000 * scale
+    graph = lambda: RandomGraphProblem(graph_size)
+
+    return [
+        ('eight_puzzle/breadth_first', puzzle,
+         lambda p, s: breadth_first(p, graph_search=True, stats=s)),
+        ('eight_puzzle/astar', puzzle,
+         lambda p, s: astar(p, graph_search=True, stats=s)),
+        ('eight_puzzle/greedy', puzzle,
+         lambda p, s: greedy(p, graph_search=True, stats=s)),
+        ('eight_puzzle/ida_star', puzzle,
+         lambda p, s: _counting_expansions(ida_star, p, s)),
+        ('eight_puzzle/hill_climbing', puzzle,
+         lambda p, s: hill_climbing(p, stats=s)),
+        ('missioners/breadth_first', missioners.MissionersProblem,
+         lambda p, s: breadth_first(p, graph_search=True, stats=s)),
+        ('missioners/depth_first', missioners.MissionersProblem,
+         lambda p, s: depth_first(p, graph_search=True, stats=s)),
+        ('missioners/astar', missioners.MissionersProblem,
+         lambda p, s: astar(p, graph_search=True, stats=s)),
+        ('grid_%i/breadth_first' % grid_size, grid,
+         lambda p, s: breadth_first(p, graph_search=True, stats=s)),
+        ('grid_%i/uniform_cost' % grid_size, grid,
+         lambda p, s: uniform_cost(p, graph_search=True, stats=s)),
+        ('grid_%i/astar' % grid_size, grid,
+         lambda p, s: astar(p, graph_search=True, stats=s)),
+        ('grid_%i/beam' % grid_size, grid,
+         lambda p, s: beam(p, beam_size=50, iterations_limit=50, stats=s)),
+        ('graph_%i/breadth_first' % graph_size, graph,
+         lambda p, s: breadth_first(p, graph_search=True, stats=s)),
+        ('graph_%i/uniform_cost' % graph_size, graph,
+         lambda p, s: uniform_cost(p, graph_search=True, stats=s)),
+        ('graph_%i/astar' % graph_size, graph,
+         lambda p, s: astar(p, graph_search=True, stats=s)),
+        # with inference (arc consistency) it takes more than a minute
+        ('sudoku/backtrack_mcv', sudoku_problem,
+         lambda p, s: backtrack(p,
+                                variable_heuristic=MOST_CONSTRAINED_VARIABLE,
+                                inference=False,
+                                stats=s)),
+        ('australia/backtrack', australia_problem,
+         lambda p, s: backtrack(p, stats=s)),
+        ('australia/backtrack_mcv_lcv', australia_problem,
+         lambda p, s: backtrack(p,
+                                variable_heuristic=MOST_CONSTRAINED_VARIABLE,
+                                value_heuristic=LEAST_CONSTRAINING_VALUE,
+                                stats=s)),
+        ('australia/min_conflicts', australia_problem,
+         lambda p, s: min_conflicts(p, iterations_limit=1000, stats=s)),
+        ('threesat/backtrack', threesat_problem,
+         lambda p, s: backtrack(p, stats=s)),
+        ('threesat/backtrack_binary', lambda: threesat_problem(binary=True),
+         lambda p, s: backtrack(p, stats=s)),
+        ('cryptarithmetic/backtrack', cryptarithmetic_problem,
+         lambda p, s: backtrack(p,
+                                variable_heuristic=MOST_CONSTRAINED_VARIABLE,
+                                value_heuristic=LEAST_CONSTRAINING_VALUE,
+                                stats=s)),
+    ]
+
+
+def run_benchmark(factory, run, repeat=3):
+    '''
+    Runs a benchmark, returning a dict with its measures. The random
+    generator is seeded before each run, so the randomized algorithms do
+    the same work every time.
+    The timed runs don't collect stats (timing the problem methods slows
+    them down), the counts come from a separate run, and the peak memory
+    from another one (tracing the memory slows them down too).
+    '''
+    times = []
+    for _ in range(repeat):
+        problem = factory()
+        random.seed(0)
+        start = time.time()
+        run(problem, None)
+        times.append(time.time() - start)
+
+    stats = SearchStats()
+    random.seed(0)
+    run(factory(), stats)
+
+    problem = factory()
+    random.seed(0)
+    tracemalloc.start()
+    run(problem, None)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    elapsed = min(times)
+    # min_conflicts only counts iterations
+    nodes = stats.expanded or stats.iterations
+    return {
+        'time': elapsed,
+        'expanded': stats.expanded,
+        'generated': stats.generated,
+        'iterations': stats.iterations,
+        'nodes_per_second': nodes / elapsed if nodes and elapsed else None,
+        'peak_memory': peak_memory,
+    }
+
+
+def run_suite(scale=1, repeat=3, name_filter=None, verbose=True):
+    '''Runs the benchmarks, returning the results as a dict by name.'''
+    results = {}
+    for name, factory, run in benchmarks(scale):
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measures = run_benchmark(factory, run, repeat)
+        if verbose:
+            print('%-36s %9.4fs %10s nodes/s %10i KB' % (
+                name, measures['time'],
+                '%.0f' % measures['nodes_per_second']
+                if measures['nodes_per_second'] else '-',
+                measures['peak_memory'] // 1024))
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    '''
+    Compares results against baseline, returning a list of
+    (name, measure, baseline value, new value) tuples for the measures that
+    got worse by more than tolerance (a fraction of the baseline value).
+    Benchmarks missing from the baseline are ignored.
+    '''
+    regressions = []
+    for name, measures in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for measure in ('time', 'peak_memory'):
+            old, new = baseline[name][measure], measures[measure]
+            if new > old * (1 + tolerance):
+                regressions.append((name, measure, old, new))
+    return regressions
+
+
+def save(filename, results, scale):
+    with open(filename, 'w') as output:
+        json.dump({'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'scale': scale,
+                   'results': results},
+                  output, indent=2, sort_keys=True)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help='file to write the results to')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='results to compare against '
+                             '(default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown, as a fraction (default: 0.2)')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='size multiplier of the synthetic problems')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs of each benchmark (the best counts)')
+    parser.add_argument('--filter', dest='name_filter',
+                        help='run only the benchmarks containing this text')
+    args = parser.parse_args(args)
+
+    results = run_suite(args.scale, args.repeat, args.name_filter)
+    if args.output:
+        save(args.output, results, args.scale)
+    if args.save_baseline:
+        save(args.baseline, results, args.scale)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare with (%s), create it running the '
+              'suite with --save-baseline before the change' % args.baseline)
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline['scale'] != args.scale:
+        print('The baseline was run with scale %s' % baseline['scale'])
+        return 0
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for name, measure, old, new in regressions:
+        print('REGRESSION %s %s: %.4g -> %.4g (%+.0f%%)' % (
+            name, measure, old, new, (new - old) * 100.0 / old))
+    if not regressions:
+        print('No regressions against %s' % args.baseline)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -23,10 +23,11 @@ constraints = [
 
 my_problem = CspProblem(variables, domains, constraints)
 
-print(backtrack(my_problem))
-print(backtrack(my_problem, variable_heuristic=MOST_CONSTRAINED_VARIABLE))
-print(backtrack(my_problem, variable_heuristic=HIGHEST_DEGREE_VARIABLE))
-print(backtrack(my_problem, value_heuristic=LEAST_CONSTRAINING_VALUE))
-print(backtrack(my_problem, variable_heuristic=MOST_CONSTRAINED_VARIABLE, value_heuristic=LEAST_CONSTRAINING_VALUE))
-print(backtrack(my_problem, variable_heuristic=HIGHEST_DEGREE_VARIABLE, value_heuristic=LEAST_CONSTRAINING_VALUE))
-print(min_conflicts(my_problem))
+if __name__ == '__main__':
+    print(backtrack(my_problem))
+    print(backtrack(my_problem, variable_heuristic=MOST_CONSTRAINED_VARIABLE))
+    print(backtrack(my_problem, variable_heuristic=HIGHEST_DEGREE_VARIABLE))
+    print(backtrack(my_problem, value_heuristic=LEAST_CONSTRAINING_VALUE))
+    print(backtrack(my_problem, variable_heuristic=MOST_CONSTRAINED_VARIABLE, value_heuristic=LEAST_CONSTRAINING_VALUE))
+    print(backtrack(my_problem, variable_heuristic=HIGHEST_DEGREE_VARIABLE, value_heuristic=LEAST_CONSTRAINING_VALUE))
+    print(min_conflicts(my_problem))
@@ -24,21 +24,22 @@ constraints = [
     (('C_1000', 'F'), lambda vars_, values: values[0] == values[1])
 ]
 
-original_constraints = deepcopy(constraints)
-original_domains = deepcopy(domains)
-
-start = time()
-problem = CspProblem(variables, original_domains, original_constraints)
-result = backtrack(problem, variable_heuristic=MOST_CONSTRAINED_VARIABLE, value_heuristic=LEAST_CONSTRAINING_VALUE)
-elapsed = time() - start
-print(result)
-print("Took %d seconds to finish using n-ary constraints" % elapsed)
-
-
-start = time()
-variables, domains, constraints = convert_to_binary(variables, domains, constraints)
-problem = CspProblem(variables, domains, constraints)
-result = backtrack(problem, value_heuristic=LEAST_CONSTRAINING_VALUE)
-elapsed = time() - start
-print(result)
-print("Took %d seconds to finish using binary constraints" % elapsed)
+if __name__ == '__main__':
+    original_constraints = deepcopy(constraints)
+    original_domains = deepcopy(domains)
+
+    start = time()
+    problem = CspProblem(variables, original_domains, original_constraints)
+    result = backtrack(problem, variable_heuristic=MOST_CONSTRAINED_VARIABLE, value_heuristic=LEAST_CONSTRAINING_VALUE)
+    elapsed = time() - start
+    print(result)
+    print("Took %d seconds to finish using n-ary constraints" % elapsed)
+
+
+    start = time()
+    variables, domains, constraints = convert_to_binary(variables, domains, constraints)
+    problem = CspProblem(variables, domains, constraints)
+    result = backtrack(problem, value_heuristic=LEAST_CONSTRAINING_VALUE)
+    elapsed = time() - start
+    print(result)
+    print("Took %d seconds to finish using binary constraints" % elapsed)
@@ -117,11 +117,11 @@ class EigthPuzzleProblem(SearchProblem):
         return distance
 
 
-result = astar(EigthPuzzleProblem(INITIAL))
-# if you want to use the visual debugger, use this instead:
-# result = astar(EigthPuzzleProblem(INITIAL), viewer=WebViewer())
-
-for action, state in result.path():
-    print('Move number', action)
-    print(state)
-
+if __name__ == '__main__':
+    result = astar(EigthPuzzleProblem(INITIAL))
+    # if you want to use the visual debugger, use this instead:
+    # result = astar(EigthPuzzleProblem(INITIAL), viewer=WebViewer())
+
+    for action, state in result.path():
+        print('Move number', action)
+        print(state)
@@ -52,7 +52,8 @@ class MissionersProblem(SearchProblem):
         return 6 - state[0] - state[1]
 
 
-problem = MissionersProblem()
+if __name__ == '__main__':
+    problem = MissionersProblem()
 
-result = astar(problem)
-print(result.path())
+    result = astar(problem)
+    print(result.path())
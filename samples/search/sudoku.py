@@ -107,34 +107,35 @@ def display_solution(sol):
 
 domains.update(parsepuzzle(sudoku))
 
-# -- Hand made binary constraints --
-constraints = mkconstraints()
-start = time()
-domains0 = deepcopy(domains)
-my_problem = CspProblem(variables, domains0, constraints)
-sol = backtrack(my_problem)
-elapsed = time() - start
-display_solution(sol)
-print("Took %d seconds to finish using binary constraints" % elapsed)  # because of AC3 should be quick
-
-
-# -- N-ary constraints made binary using hidden variables --
-domains1 = deepcopy(domains)
-start = time()
-variables1, domains1, constraints = convert_to_binary(variables, domains1, mknaryconstraints())
-my_problem = CspProblem(variables1, domains1, constraints)
-sol = backtrack(my_problem)
-elapsed = time() - start
-display_solution(sol)
-print("Took %d seconds to finish using binary constraints (hidden variables)" % elapsed)
-
-
-# -- N-ary constraints --
-constraints = mknaryconstraints()
-domains3 = deepcopy(domains)
-start = time()
-my_problem = CspProblem(variables, domains3, constraints)
-sol = backtrack(my_problem)
-elapsed = time() - start
-display_solution(sol)
-print("Took %d seconds to finish using n-ary constraints" % elapsed)
+if __name__ == '__main__':
+    # -- Hand made binary constraints --
+    constraints = mkconstraints()
+    start = time()
+    domains0 = deepcopy(domains)
+    my_problem = CspProblem(variables, domains0, constraints)
+    sol = backtrack(my_problem)
+    elapsed = time() - start
+    display_solution(sol)
+    print("Took %d seconds to finish using binary constraints" % elapsed)  # because of AC3 should be quick
+
+
+    # -- N-ary constraints made binary using hidden variables --
+    domains1 = deepcopy(domains)
+    start = time()
+    variables1, domains1, constraints = convert_to_binary(variables, domains1, mknaryconstraints())
+    my_problem = CspProblem(variables1, domains1, constraints)
+    sol = backtrack(my_problem)
+    elapsed = time() - start
+    display_solution(sol)
+    print("Took %d seconds to finish using binary constraints (hidden variables)" % elapsed)
+
+
+    # -- N-ary constraints --
+    constraints = mknaryconstraints()
+    domains3 = deepcopy(domains)
+    start = time()
+    my_problem = CspProblem(variables, domains3, constraints)
+    sol = backtrack(my_problem)
+    elapsed = time() - start
+    display_solution(sol)
+    print("Took %d seconds to finish using n-ary constraints" % elapsed)
@@ -17,21 +17,22 @@ constraints = [
     (('X2', 'X5', 'X6'), lambda v, values: values[0] or values[1] or not values[2]),
 ]
 
-original_constraints = deepcopy(constraints)
-original_domains = deepcopy(domains)
-
-start = time()
-problem = CspProblem(variables, original_domains, original_constraints)
-result = backtrack(problem)
-elapsed = time() - start
-print(result)
-print("Took %d seconds to finish using n-ary constraints" % elapsed)
-
-
-start = time()
-variables, domains, constraints = convert_to_binary(variables, domains, constraints)
-problem = CspProblem(variables, domains, constraints)
-result = backtrack(problem)
-elapsed = time() - start
-print(result)
-print("Took %d seconds to finish using binary constraints" % elapsed)
+if __name__ == '__main__':
+    original_constraints = deepcopy(constraints)
+    original_domains = deepcopy(domains)
+
+    start = time()
+    problem = CspProblem(variables, original_domains, original_constraints)
+    result = backtrack(problem)
+    elapsed = time() - start
+    print(result)
+    print("Took %d seconds to finish using n-ary constraints" % elapsed)
+
+
+    start = time()
+    variables, domains, constraints = convert_to_binary(variables, domains, constraints)
+    problem = CspProblem(variables, domains, constraints)
+    result = backtrack(problem)
+    elapsed = time() - start
+    print(result)
+    print("Took %d seconds to finish using binary constraints" % elapsed)
@@ -1,6 +1,17 @@
 # coding: utf-8
-from simpleai.search.models import CspProblem, SearchProblem
-from simpleai.search.traditional import breadth_first, depth_first, limited_depth_first, iterative_limited_depth_first, uniform_cost, greedy, astar
+from simpleai.search.models import (CspProblem, SearchProblem,
+                                    CachedProblemMixin, SearchBudget,
+                                    BudgetExceeded, SearchStats)
+from simpleai.search.traditional import (
+    breadth_first, depth_first, limited_depth_first,
+    iterative_limited_depth_first, uniform_cost, greedy, astar, ida_star,
+    sma_star, ara_star, bidirectional_breadth_first,
+    bidirectional_uniform_cost, bidirectional_astar, LPAStar,
+    external_breadth_first)
+from simpleai.search.parallel import hda_star
+from simpleai.search.graphs import (
+    ExplicitGraphProblem, graph_breadth_first, graph_uniform_cost,
+    graph_astar)
 from simpleai.search.local import (
     beam, hill_climbing, hill_climbing_stochastic, simulated_annealing,
     genetic, hill_climbing_random_restarts)
@@ -3,13 +3,15 @@ import random
 from copy import deepcopy, copy
 from itertools import product
 from simpleai.search.utils import argmin
+from simpleai.search.models import BudgetExceeded
 
 MOST_CONSTRAINED_VARIABLE = 'mcv'
 HIGHEST_DEGREE_VARIABLE = 'degree'
 LEAST_CONSTRAINING_VALUE = 'lvc'
 
 
-def backtrack(problem, variable_heuristic='', value_heuristic='', inference=True):
+def backtrack(problem, variable_heuristic='', value_heuristic='', inference=True,
+              budget=None, stats=None):
     '''
     Backtracking search.
 
@@ -18,6 +20,11 @@ def backtrack(problem, variable_heuristic='', value_heuristic='', inference=True
     ordered choosing.
     value_heuristic is the heuristic for value choosing, can be
     LEAST_CONSTRAINING_VALUE or blank for simple ordered choosing.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each partial assignment tried as an expansion), returning a
+    BudgetExceeded result with the biggest partial assignment found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (the partial assignments expanded, and the values tried).
     '''
     assignment = {}
     domains = deepcopy(problem.domains)
@@ -38,7 +45,9 @@ def backtrack(problem, variable_heuristic='', value_heuristic='', inference=True
                          domains,
                          variable_chooser,
                          values_sorter,
-                         inference=inference)
+                         inference=inference,
+                         budget=budget,
+                         stats=stats)
 
 
 def _basic_variable_chooser(problem, variables, domains):
@@ -120,7 +129,8 @@ def _least_constraining_values_sorter(problem, assignment, variable, domains):
     return values
 
 
-def _backtracking(problem, assignment, domains, variable_chooser, values_sorter, inference=True):
+def _backtracking(problem, assignment, domains, variable_chooser, values_sorter, inference=True,
+                  budget=None, stats=None):
     '''
     Internal recursive backtracking algorithm.
     '''
@@ -128,12 +138,23 @@ def _backtracking(problem, assignment, domains, variable_chooser, values_sorter,
     if len(assignment) == len(problem.variables):
         return assignment
 
+    if budget is not None:
+        best = None
+        if budget.best is None or len(assignment) > len(budget.best):
+            best = assignment
+        if budget.exceeded(best):
+            return budget.result()
+
     pending = [v for v in problem.variables
                if v not in assignment]
     variable = variable_chooser(problem, pending, domains)
 
     values = values_sorter(problem, assignment, variable, domains)
 
+    if stats is not None:
+        stats.expanded += 1
+        stats.generated += len(values)
+
     for value in values:
         new_assignment = deepcopy(assignment)
         new_assignment[variable] = value
@@ -148,8 +169,10 @@ def _backtracking(problem, assignment, domains, variable_chooser, values_sorter,
                                        new_domains,
                                        variable_chooser,
                                        values_sorter,
-                                       inference=inference)
-                if result:
+                                       inference=inference,
+                                       budget=budget,
+                                       stats=stats)
+                if result or isinstance(result, BudgetExceeded):
                     return result
 
     return None
@@ -163,7 +186,8 @@ def _min_conflicts_value(problem, assignment, variable):
     return argmin(problem.domains[variable], lambda x: _count_conflicts(problem, assignment, variable, x))
 
 
-def min_conflicts(problem, initial_assignment=None, iterations_limit=0):
+def min_conflicts(problem, initial_assignment=None, iterations_limit=0,
+                  budget=None, stats=None):
     """
     Min conflicts search.
 
@@ -172,6 +196,11 @@ def min_conflicts(problem, initial_assignment=None, iterations_limit=0):
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until if finds an assignment
     that doesn't generate conflicts (a solution).
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the assignment with less conflicts found.
+    If stats (a SearchStats) is given, it's updated with the number of
+    iterations.
     """
     assignment = {}
     if initial_assignment:
@@ -183,9 +212,18 @@ def min_conflicts(problem, initial_assignment=None, iterations_limit=0):
 
     iteration = 0
     run = True
+    best_conflicts = None
     while run:
         conflicts = _find_conflicts(problem, assignment)
 
+        if budget is not None:
+            best = None
+            if best_conflicts is None or len(conflicts) < best_conflicts:
+                best_conflicts = len(conflicts)
+                best = copy(assignment)
+            if budget.exceeded(best):
+                return budget.result()
+
         conflict_variables = [v for v in problem.variables
                               if any(v in conflict[0] for conflict in conflicts)]
 
@@ -195,6 +233,8 @@ def min_conflicts(problem, initial_assignment=None, iterations_limit=0):
             assignment[variable] = value
 
         iteration += 1
+        if stats is not None:
+            stats.iterations += 1
 
         if iterations_limit and iteration >= iterations_limit:
             run = False
@@ -0,0 +1,301 @@
+# coding=utf-8
+'''
+Compact explicit graphs as search problems.
+
+The adjacency of the graph is stored in CSR (compressed sparse row) form:
+the edges leaving node i are the ones from offsets[i] to offsets[i + 1] in
+the targets and weights arrays. Nodes are integer ids (from 0 to
+nodes_count - 1), and the actions are edge indexes.
+
+Example:
+
+    problem = ExplicitGraphProblem.from_edges([(0, 1, 5), (1, 2, 3)],
+                                              initial_state=0, goals=[2])
+    astar(problem, graph_search=True)
+    # or, without calling the problem methods for each edge:
+    graph_astar(problem)
+'''
+import heapq
+from collections import deque
+from simpleai.search.models import SearchProblem, SearchNode
+try:
+    import numpy
+except ImportError:
+    numpy = None  # lint:ok
+
+
+class ExplicitGraphProblem(SearchProblem):
+    '''
+    Search problem over an explicit graph, stored in numpy arrays.
+
+    offsets has nodes_count + 1 elements, and targets and weights one element
+    per edge (if weights isn't specified, every edge costs 1). labels are
+    the names of the nodes, used only to represent them. heuristics can be
+    an array with the heuristic value of every node.
+    Requires numpy.
+    '''
+    def __init__(self, offsets, targets, weights=None, initial_state=None,
+                 goals=(), labels=None, heuristics=None):
+        if numpy is None:
+            raise ImportError('ExplicitGraphProblem requires numpy')
+        super(ExplicitGraphProblem, self).__init__(initial_state)
+        self.offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        self.targets = numpy.asarray(targets, dtype=numpy.int64)
+        if weights is None:
+            weights = numpy.ones(len(self.targets), dtype=numpy.int64)
+        self.weights = numpy.asarray(weights)
+        self.goals = frozenset(goals)
+        self.labels = labels
+        if heuristics is not None:
+            heuristics = numpy.asarray(heuristics)
+        self.heuristics = heuristics
+        self._predecessors = None
+
+    @property
+    def nodes_count(self):
+        return len(self.offsets) - 1
+
+    @classmethod
+    def from_edges(cls, edges, nodes_count=None, directed=True, **kwargs):
+        '''
+        Builds the graph from an iterable of (source, target) or
+        (source, target, weight) tuples of node ids. If nodes_count isn't
+        specified, it's the biggest id plus one. If directed=False, each edge
+        can be traversed in both directions.
+        The other arguments are the same of the constructor.
+        '''
+        edges = list(edges)
+        sources = numpy.array([edge[0] for edge in edges], dtype=numpy.int64)
+        targets = numpy.array([edge[1] for edge in edges], dtype=numpy.int64)
+        weights = None
+        if edges and len(edges[0]) > 2:
+            weights = numpy.array([edge[2] for edge in edges])
+        if not directed:
+            sources, targets = (numpy.concatenate([sources, targets]),
+                                numpy.concatenate([targets, sources]))
+            if weights is not None:
+                weights = numpy.concatenate([weights, weights])
+        if nodes_count is None:
+            nodes_count = (int(max(sources.max(), targets.max())) + 1
+                           if edges else 0)
+
+        # stable, so the edges of each node keep their order
+        order = numpy.argsort(sources, kind='stable')
+        offsets = numpy.zeros(nodes_count + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(sources, minlength=nodes_count),
+                     out=offsets[1:])
+        if weights is not None:
+            weights = weights[order]
+        return cls(offsets, targets[order], weights, **kwargs)
+
+    @classmethod
+    def from_dot(cls, filename):
+        '''
+        Builds the graph from a .dot file, with the same format as the
+        samples/search/example.dot: the initial node has the attribute
+        initial=1, the goal nodes goal=1, and the edges can have a weight
+        (1 by default). The labels are the names of the nodes.
+        Requires pydot.
+        '''
+        from pydot import graph_from_dot_file
+
+        graph = graph_from_dot_file(filename)[0]
+        names = []
+        ids = {}
+
+        def node_id(name):
+            name = name.strip('"')
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+            return ids[name]
+
+        initial_state = None
+        goals = []
+        for node in graph.get_nodes():
+            if node.get_name() in ('node', 'edge', 'graph'):
+                # default attributes, not nodes
+                continue
+            i = node_id(node.get_name())
+            if _true_attribute(node.get('initial')):
+                initial_state = i
+            if _true_attribute(node.get('goal')):
+                goals.append(i)
+
+        edges = []
+        for edge in graph.get_edges():
+            weight = edge.get('weight')
+            weight = float(weight.strip('"')) if weight is not None else 1
+            if weight == int(weight):
+                weight = int(weight)
+            edges.append((node_id(edge.get_source()),
+                          node_id(edge.get_destination()),
+                          weight))
+
+        return cls.from_edges(edges,
+                              nodes_count=len(names),
+                              directed=graph.get_type() == 'digraph',
+                              initial_state=initial_state,
+                              goals=goals,
+                              labels=names)
+
+    def edges(self, state):
+        '''
+        Returns the edges leaving state, as a tuple of three lists: the edge
+        indexes, the target nodes, and the weights.
+        '''
+        start, end = self.offsets[state], self.offsets[state + 1]
+        return (list(range(start, end)),
+                self.targets[start:end].tolist(),
+                self.weights[start:end].tolist())
+
+    def successors(self, state):
+        return list(zip(*self.edges(state)))
+
+    def actions(self, state):
+        return range(self.offsets[state], self.offsets[state + 1])
+
+    def result(self, state, action):
+        return int(self.targets[action])
+
+    def cost(self, state, action, state2):
+        return self.weights[action].item()
+
+    def is_goal(self, state):
+        return state in self.goals
+
+    def goal_states(self):
+        return list(self.goals)
+
+    def heuristic(self, state):
+        if self.heuristics is None:
+            return 0
+        return self.heuristics[state].item()
+
+    def predecessors(self, state):
+        if self._predecessors is None:
+            # the reversed graph, in CSR form too
+            sources = numpy.repeat(numpy.arange(self.nodes_count),
+                                   numpy.diff(self.offsets))
+            order = numpy.argsort(self.targets, kind='stable')
+            offsets = numpy.zeros(len(self.offsets), dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(self.targets,
+                                        minlength=self.nodes_count),
+                         out=offsets[1:])
+            self._predecessors = (offsets, order, sources[order])
+        offsets, edges, sources = self._predecessors
+        start, end = offsets[state], offsets[state + 1]
+        return list(zip(edges[start:end].tolist(),
+                        sources[start:end].tolist()))
+
+    def state_representation(self, state):
+        if self.labels is None:
+            return str(state)
+        return str(self.labels[state])
+
+
+def graph_breadth_first(problem):
+    '''
+    Breadth first graph search on an ExplicitGraphProblem, working directly
+    on its arrays instead of calling SearchProblem.actions, result and cost
+    for each edge.
+    Returns the goal node, like breadth_first(problem, graph_search=True).
+    '''
+    start = problem.initial_state
+    parents = {start: None}
+    fringe = deque([start])
+    while fringe:
+        state = fringe.popleft()
+        if state in problem.goals:
+            return _build_path(problem, parents, state)
+        edges, targets, _ = problem.edges(state)
+        for edge, target in zip(edges, targets):
+            if target not in parents:
+                parents[target] = (edge, state)
+                fringe.append(target)
+    return None
+
+
+def graph_uniform_cost(problem):
+    '''
+    Uniform cost graph search on an ExplicitGraphProblem, working directly
+    on its arrays instead of calling SearchProblem.actions, result and cost
+    for each edge.
+    Returns the goal node, like uniform_cost(problem, graph_search=True).
+    '''
+    return _graph_best_first(problem, None)
+
+
+def graph_astar(problem):
+    '''
+    A* graph search on an ExplicitGraphProblem, working directly on its
+    arrays instead of calling SearchProblem.actions, result and cost for
+    each edge. The heuristic is read from problem.heuristics if it's set,
+    otherwise SearchProblem.heuristic is called once for each reached
+    state (and remembered, for when a cheaper path to it is found).
+    Returns the goal node, like astar(problem, graph_search=True).
+    '''
+    if problem.heuristics is not None:
+        heuristics = problem.heuristics.tolist()
+        return _graph_best_first(problem, heuristics.__getitem__)
+
+    estimates = {}
+
+    def heuristic(state):
+        value = estimates.get(state)
+        if value is None:
+            value = estimates[state] = problem.heuristic(state)
+        return value
+
+    return _graph_best_first(problem, heuristic)
+
+
+def _graph_best_first(problem, heuristic):
+    start = problem.initial_state
+    costs = {start: 0}
+    parents = {start: None}
+    visited = set()
+    fringe = [(heuristic(start) if heuristic else 0, 0, start)]
+    while fringe:
+        _, cost, state = heapq.heappop(fringe)
+        if state in visited:
+            # already reached with less cost
+            continue
+        if state in problem.goals:
+            return _build_path(problem, parents, state)
+        visited.add(state)
+        edges, targets, weights = problem.edges(state)
+        for edge, target, weight in zip(edges, targets, weights):
+            new_cost = cost + weight
+            if target in visited:
+                continue
+            if target not in costs or new_cost < costs[target]:
+                costs[target] = new_cost
+                parents[target] = (edge, state)
+                priority = new_cost
+                if heuristic:
+                    priority += heuristic(target)
+                heapq.heappush(fringe, (priority, new_cost, target))
+    return None
+
+
+def _build_path(problem, parents, state):
+    '''Builds the SearchNode chain from the initial state to state.'''
+    steps = []
+    while parents[state] is not None:
+        edge, previous = parents[state]
+        steps.append((edge, state))
+        state = previous
+
+    node = SearchNode(state=state, problem=problem)
+    for edge, state in reversed(steps):
+        node = SearchNode(state=state,
+                          parent=node,
+                          action=edge,
+                          cost=node.cost + problem.weights[edge].item(),
+                          depth=node.depth + 1)
+    return node
+
+
+def _true_attribute(value):
+    return value is not None and value.strip('"') not in ('', '0', 'false')
@@ -0,0 +1,235 @@
+# coding=utf-8
+'''
+Landmark (ALT) heuristics for explicit graphs.
+
+The distances from (and to) a few landmark states are calculated once, and
+then used to estimate the distance between any two states with the triangle
+inequality: for a landmark L, d(s, t) >= d(L, t) - d(L, s) and
+d(s, t) >= d(s, L) - d(t, L).
+
+Example:
+
+    landmarks = build_landmarks(problem, count=8)
+    landmarks.save('distances.npz')
+    ...
+    landmarks = Landmarks.load('distances.npz')
+    problem.heuristic = landmarks.heuristic(problem.goal_states())
+    astar(problem, graph_search=True)
+'''
+from simpleai.search.models import SearchProblem, SearchNodeCostOrdered
+from simpleai.search.traditional import _search
+from simpleai.search.utils import IndexedPriorityQueue
+try:
+    import numpy
+except ImportError:
+    numpy = None  # lint:ok
+
+
+def build_landmarks(problem, count=4, landmarks=None, symmetric=False):
+    '''
+    Calculates the distance tables of the landmarks.
+
+    The states considered are the ones reachable from the initial state of
+    the problem. If landmarks (a list of states) isn't specified, count
+    landmarks are chosen, each one as the state farthest from the ones
+    already chosen.
+    If symmetric=True, the costs are assumed to be the same in both
+    directions (d(a, b) == d(b, a)), and the distances to the landmarks
+    aren't calculated (SearchProblem.predecessors isn't needed).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.cost, SearchProblem.predecessors (if not symmetric), and
+    numpy.
+    '''
+    if numpy is None:
+        raise ImportError('build_landmarks requires numpy')
+
+    reachable = _distances(problem, problem.initial_state)
+    states = list(reachable)
+    index = dict((state, i) for i, state in enumerate(states))
+
+    rows = {}
+    if landmarks is None:
+        # each landmark is the state farthest from the closest of the
+        # landmarks already chosen (starting with the farthest from the
+        # initial state)
+        landmarks = []
+        farthest = _as_row(reachable, index)
+        for _ in range(count):
+            landmark = states[int(numpy.argmax(farthest))]
+            if landmark in rows:
+                # every state is a landmark already
+                break
+            landmarks.append(landmark)
+            rows[landmark] = _as_row(_distances(problem, landmark), index)
+            if len(landmarks) == 1:
+                farthest = rows[landmark]
+            else:
+                farthest = numpy.minimum(farthest, rows[landmark])
+
+    distances_from = numpy.array([
+        rows[landmark] if landmark in rows
+        else _as_row(_distances(problem, landmark), index)
+        for landmark in landmarks])
+    if symmetric:
+        distances_to = distances_from
+    else:
+        reversed_problem = _ReversedProblem(problem)
+        distances_to = numpy.array([
+            _as_row(_distances(reversed_problem, landmark), index)
+            for landmark in landmarks])
+
+    return Landmarks(states, landmarks, distances_from, distances_to)
+
+
+class Landmarks(object):
+    '''
+    Distance tables of a set of landmarks. distances_from[i, j] is the
+    distance from the i-th landmark to the j-th state, and distances_to[i, j]
+    the distance from the j-th state to the i-th landmark (numpy.inf if
+    unreachable).
+    '''
+    def __init__(self, states, landmarks, distances_from, distances_to):
+        self.states = list(states)
+        self.landmarks = list(landmarks)
+        self.distances_from = distances_from
+        self.distances_to = distances_to
+        self.index = dict((state, i) for i, state in enumerate(self.states))
+
+    def heuristic(self, goals):
+        '''
+        Returns a function that estimates the cost from a state to the
+        closest of the goals, to be used as SearchProblem.heuristic.
+        The estimation is admissible and consistent. States that weren't
+        reachable when building the tables are estimated as 0.
+        '''
+        estimations = None
+        for goal in goals:
+            to_goal = self._estimations(goal)
+            if estimations is None:
+                estimations = to_goal
+            else:
+                estimations = numpy.minimum(estimations, to_goal)
+
+        if estimations is None:
+            return lambda state: 0
+        values = dict(zip(self.states, estimations.tolist()))
+        return lambda state: values.get(state, 0)
+
+    def _estimations(self, goal):
+        '''Estimations of the cost from every state to goal.'''
+        if goal not in self.index:
+            return numpy.zeros(len(self.states))
+        i = self.index[goal]
+        with numpy.errstate(invalid='ignore'):
+            # d(s, goal) >= d(L, goal) - d(L, s)
+            forward = self.distances_from[:, [i]] - self.distances_from
+            # d(s, goal) >= d(s, L) - d(goal, L)
+            backward = self.distances_to - self.distances_to[:, [i]]
+            # inf - inf means both are unreachable, which says nothing
+            bounds = numpy.nan_to_num(numpy.fmax(forward, backward),
+                                      nan=0, posinf=numpy.inf, neginf=0)
+        return numpy.maximum(bounds.max(axis=0), 0)
+
+    def save(self, file):
+        '''
+        Saves the tables to file (a path or a file object), in numpy .npz
+        format. The states must be picklable.
+        '''
+        numpy.savez(file,
+                    states=_object_array(self.states),
+                    landmarks=_object_array(self.landmarks),
+                    distances_from=self.distances_from,
+                    distances_to=self.distances_to)
+
+    @classmethod
+    def load(cls, file):
+        '''
+        Loads the tables saved with save. Uses pickle to load the states,
+        so only load files from trusted sources.
+        '''
+        with numpy.load(file, allow_pickle=True) as data:
+            return cls(data['states'].tolist(), data['landmarks'].tolist(),
+                       data['distances_from'], data['distances_to'])
+
+
+def _distances(problem, state):
+    '''
+    Distances from state to every state reachable from it, as a dict,
+    using uniform cost graph search.
+    '''
+    fringe = _DistancesFringe()
+    _search(_ExhaustiveProblem(problem, state),
+            fringe,
+            graph_search=True,
+            node_factory=SearchNodeCostOrdered,
+            graph_replace_when_better=True)
+    return fringe.distances
+
+
+def _as_row(distances, index):
+    row = numpy.full(len(index), numpy.inf)
+    for state, distance in distances.items():
+        if state in index:
+            row[index[state]] = distance
+    return row
+
+
+def _object_array(values):
+    # built element by element, so tuples are kept as single values
+    array = numpy.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+class _DistancesFringe(IndexedPriorityQueue):
+    '''
+    Fringe of uniform cost search that records the cost of each node when
+    it's popped, which is the distance to its state.
+    '''
+    def __init__(self, *args):
+        super(_DistancesFringe, self).__init__(*args)
+        self.distances = {}
+
+    def pop(self):
+        node = super(_DistancesFringe, self).pop()
+        self.distances[node.state] = node.cost
+        return node
+
+
+class _ExhaustiveProblem(SearchProblem):
+    '''Problem without goals, to visit every reachable state.'''
+    def __init__(self, problem, initial_state):
+        super(_ExhaustiveProblem, self).__init__(initial_state)
+        self.problem = problem
+
+    def actions(self, state):
+        return self.problem.actions(state)
+
+    def result(self, state, action):
+        return self.problem.result(state, action)
+
+    def cost(self, state, action, state2):
+        return self.problem.cost(state, action, state2)
+
+    def is_goal(self, state):
+        return False
+
+
+class _ReversedProblem(SearchProblem):
+    '''
+    Problem with the actions reversed, so searching from a state finds the
+    distances to it. The actions are (action, previous_state) pairs.
+    '''
+    def __init__(self, problem):
+        super(_ReversedProblem, self).__init__(problem.initial_state)
+        self.problem = problem
+
+    def actions(self, state):
+        return self.problem.predecessors(state)
+
+    def result(self, state, action):
+        return action[1]
+
+    def cost(self, state, action, state2):
+        return self.problem.cost(state2, action[0], state)
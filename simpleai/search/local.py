@@ -1,24 +1,34 @@
 # coding=utf-8
-from simpleai.search.utils import BoundedPriorityQueue, InverseTransformSampler
-from simpleai.search.models import SearchNodeValueOrdered
+from simpleai.search.utils import (BoundedPriorityQueue,
+                                   UniqueStatesBoundedPriorityQueue,
+                                   InverseTransformSampler)
+from simpleai.search.models import (SearchNodeValueOrdered,
+                                    closed_set,
+                                    BudgetExceeded, problem_timing,
+                                    EvaluateState)
 import math
 import random
 
 
-def _all_expander(fringe, iteration, viewer):
+def _all_expander(fringe, iteration, viewer, stats=None, executor=None):
     '''
     Expander that expands all nodes on the fringe.
     '''
-    expanded_neighbors = [node.expand(local_search=True)
+    expanded_neighbors = [node.expand(local_search=True, executor=executor)
                           for node in fringe]
 
+    if stats is not None:
+        stats.expanded += len(expanded_neighbors)
+        stats.generated += sum(map(len, expanded_neighbors))
+
     if viewer:
         viewer.event('expanded', list(fringe), expanded_neighbors)
 
     list(map(fringe.extend, expanded_neighbors))
 
 
-def beam(problem, beam_size=100, iterations_limit=0, viewer=None):
+def beam(problem, beam_size=100, iterations_limit=0, viewer=None,
+         budget=None, stats=None, executor=None, unique_states=False):
     '''
     Beam search.
 
@@ -26,6 +36,17 @@ def beam(problem, beam_size=100, iterations_limit=0, viewer=None):
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
+    If unique_states=True, the beam keeps only one node for each state (the
+    states in it are stored with a closed_set, so they are encoded if the
+    problem implements SearchProblem.encode_state).
     Requires: SearchProblem.actions, SearchProblem.result, SearchProblem.value,
     and SearchProblem.generate_random_state.
     '''
@@ -35,15 +56,23 @@ def beam(problem, beam_size=100, iterations_limit=0, viewer=None):
                          fringe_size=beam_size,
                          random_initial_states=True,
                          stop_when_no_better=iterations_limit==0,
-                         viewer=viewer)
+                         viewer=viewer,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor,
+                         unique_states=unique_states)
 
 
-def _first_expander(fringe, iteration, viewer):
+def _first_expander(fringe, iteration, viewer, stats=None, executor=None):
     '''
     Expander that expands only the first node on the fringe.
     '''
     current = fringe[0]
-    neighbors = current.expand(local_search=True)
+    neighbors = current.expand(local_search=True, executor=executor)
+
+    if stats is not None:
+        stats.expanded += 1
+        stats.generated += len(neighbors)
 
     if viewer:
         viewer.event('expanded', [current], [neighbors])
@@ -52,7 +81,8 @@ def _first_expander(fringe, iteration, viewer):
 
 
 
-def beam_best_first(problem, beam_size=100, iterations_limit=0, viewer=None):
+def beam_best_first(problem, beam_size=100, iterations_limit=0, viewer=None,
+                    budget=None, stats=None, executor=None, unique_states=False):
     '''
     Beam search best first.
 
@@ -60,6 +90,17 @@ def beam_best_first(problem, beam_size=100, iterations_limit=0, viewer=None):
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
+    If unique_states=True, the beam keeps only one node for each state (the
+    states in it are stored with a closed_set, so they are encoded if the
+    problem implements SearchProblem.encode_state).
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.value.
     '''
@@ -69,16 +110,29 @@ def beam_best_first(problem, beam_size=100, iterations_limit=0, viewer=None):
                          fringe_size=beam_size,
                          random_initial_states=True,
                          stop_when_no_better=iterations_limit==0,
-                         viewer=viewer)
+                         viewer=viewer,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor,
+                         unique_states=unique_states)
 
 
-def hill_climbing(problem, iterations_limit=0, viewer=None):
+def hill_climbing(problem, iterations_limit=0, viewer=None, budget=None,
+                  stats=None, executor=None):
     '''
     Hill climbing search.
 
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.value.
     '''
@@ -87,16 +141,23 @@ def hill_climbing(problem, iterations_limit=0, viewer=None):
                          iterations_limit=iterations_limit,
                          fringe_size=1,
                          stop_when_no_better=True,
-                         viewer=viewer)
+                         viewer=viewer,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor)
 
 
-def _random_best_expander(fringe, iteration, viewer):
+def _random_best_expander(fringe, iteration, viewer, stats=None,
+                          executor=None):
     '''
     Expander that expands one randomly chosen nodes on the fringe that
     is better than the current (first) node.
     '''
     current = fringe[0]
-    neighbors = current.expand(local_search=True)
+    neighbors = current.expand(local_search=True, executor=executor)
+    if stats is not None:
+        stats.expanded += 1
+        stats.generated += len(neighbors)
     if viewer:
         viewer.event('expanded', [current], [neighbors])
 
@@ -109,13 +170,22 @@ def _random_best_expander(fringe, iteration, viewer):
         fringe.append(chosen)
 
 
-def hill_climbing_stochastic(problem, iterations_limit=0, viewer=None):
+def hill_climbing_stochastic(problem, iterations_limit=0, viewer=None,
+                             budget=None, stats=None, executor=None):
     '''
     Stochastic hill climbing.
 
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.value.
     '''
@@ -124,10 +194,14 @@ def hill_climbing_stochastic(problem, iterations_limit=0, viewer=None):
                          iterations_limit=iterations_limit,
                          fringe_size=1,
                          stop_when_no_better=iterations_limit==0,
-                         viewer=viewer)
+                         viewer=viewer,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor)
 
 
-def hill_climbing_random_restarts(problem, restarts_limit, iterations_limit=0, viewer=None):
+def hill_climbing_random_restarts(problem, restarts_limit, iterations_limit=0, viewer=None,
+                                  budget=None, stats=None, executor=None):
     '''
     Hill climbing with random restarts.
 
@@ -135,6 +209,14 @@ def hill_climbing_random_restarts(problem, restarts_limit, iterations_limit=0, v
     If iterations_limit is specified, each hill_climbing will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
     Requires: SearchProblem.actions, SearchProblem.result, SearchProblem.value,
     and SearchProblem.generate_random_state.
     '''
@@ -148,7 +230,15 @@ def hill_climbing_random_restarts(problem, restarts_limit, iterations_limit=0, v
                             fringe_size=1,
                             random_initial_states=True,
                             stop_when_no_better=True,
-                            viewer=viewer)
+                            viewer=viewer,
+                            budget=budget,
+                            stats=stats,
+                            executor=executor)
+
+        if isinstance(new, BudgetExceeded):
+            if best is not None and best.value > new.best.value:
+                new.best = best
+            return new
 
         if not best or best.value < new.value:
             best = new
@@ -174,10 +264,14 @@ def _create_simulated_annealing_expander(schedule):
     Creates an expander that has a random chance to choose a node that is worse
     than the current (first) node, but that chance decreases with time.
     '''
-    def _expander(fringe, iteration, viewer):
+    def _expander(fringe, iteration, viewer, stats=None, executor=None):
         T = schedule(iteration)
         current = fringe[0]
-        neighbors = current.expand(local_search=True)
+        neighbors = current.expand(local_search=True, executor=executor)
+
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(neighbors)
 
         if viewer:
             viewer.event('expanded', [current], [neighbors])
@@ -195,7 +289,8 @@ def _create_simulated_annealing_expander(schedule):
     return _expander
 
 
-def simulated_annealing(problem, schedule=_exp_schedule, iterations_limit=0, viewer=None):
+def simulated_annealing(problem, schedule=_exp_schedule, iterations_limit=0, viewer=None,
+                        budget=None, stats=None, executor=None):
     '''
     Simulated annealing.
 
@@ -204,6 +299,14 @@ def simulated_annealing(problem, schedule=_exp_schedule, iterations_limit=0, vie
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.value.
     '''
@@ -212,7 +315,10 @@ def simulated_annealing(problem, schedule=_exp_schedule, iterations_limit=0, vie
                          iterations_limit=iterations_limit,
                          fringe_size=1,
                          stop_when_no_better=iterations_limit==0,
-                         viewer=viewer)
+                         viewer=viewer,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor)
 
 
 def _create_genetic_expander(problem, mutation_chance):
@@ -220,7 +326,7 @@ def _create_genetic_expander(problem, mutation_chance):
     Creates an expander that expands the bests nodes of the population,
     crossing over them.
     '''
-    def _expander(fringe, iteration, viewer):
+    def _expander(fringe, iteration, viewer, stats=None, executor=None):
         fitness = [x.value for x in fringe]
         sampler = InverseTransformSampler(fitness, fringe)
         new_generation = []
@@ -228,6 +334,7 @@ def _create_genetic_expander(problem, mutation_chance):
         expanded_nodes = []
         expanded_neighbors = []
 
+        children = []
         for _ in fringe:
             node1 = sampler.sample()
             node2 = sampler.sample()
@@ -237,8 +344,17 @@ def _create_genetic_expander(problem, mutation_chance):
                 # Noooouuu! she is... he is... *IT* is a mutant!
                 child = problem.mutate(child)
                 action += '+mutation'
+            children.append((node1, node2, child, action))
 
-            child_node = SearchNodeValueOrdered(state=child, problem=problem, action=action)
+        if executor is not None:
+            values = list(executor.map(EvaluateState(problem, 'value'),
+                                       [child for _, _, child, _ in children]))
+        else:
+            values = [None] * len(children)
+
+        for (node1, node2, child, action), value in zip(children, values):
+            child_node = SearchNodeValueOrdered(state=child, problem=problem,
+                                                action=action, value=value)
             new_generation.append(child_node)
 
             expanded_nodes.append(node1)
@@ -246,6 +362,10 @@ def _create_genetic_expander(problem, mutation_chance):
             expanded_nodes.append(node2)
             expanded_neighbors.append([child_node])
 
+        if stats is not None:
+            stats.expanded += len(expanded_nodes)
+            stats.generated += len(new_generation)
+
         if viewer:
             viewer.event('expanded', expanded_nodes, expanded_neighbors)
 
@@ -257,7 +377,8 @@ def _create_genetic_expander(problem, mutation_chance):
 
 
 def genetic(problem, population_size=100, mutation_chance=0.1,
-            iterations_limit=0, viewer=None):
+            iterations_limit=0, viewer=None, budget=None, stats=None,
+            executor=None):
     '''
     Genetic search.
 
@@ -267,6 +388,14 @@ def genetic(problem, population_size=100, mutation_chance=0.1,
     If iterations_limit is specified, the algorithm will end after that
     number of iterations. Else, it will continue until it can't find a
     better node than the current one.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting each iteration as an expansion), returning a BudgetExceeded
+    result with the best node found.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node (and their values)
+    are created concurrently with it.
     Requires: SearchProblem.generate_random_state, SearchProblem.crossover,
     SearchProblem.mutate and SearchProblem.value.
     '''
@@ -276,50 +405,74 @@ def genetic(problem, population_size=100, mutation_chance=0.1,
                          fringe_size=population_size,
                          random_initial_states=True,
                          stop_when_no_better=iterations_limit==0,
-                         viewer=viewer)
+                         viewer=viewer,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor)
 
 
 def _local_search(problem, fringe_expander, iterations_limit=0, fringe_size=1,
                   random_initial_states=False, stop_when_no_better=True,
-                  viewer=None):
+                  viewer=None, unique_states=False, budget=None,
+                  stats=None, executor=None):
     '''
     Basic algorithm for all local search algorithms.
-    '''
-    if viewer:
-        viewer.event('started')
-
-    fringe = BoundedPriorityQueue(fringe_size)
-    if random_initial_states:
-        for _ in range(fringe_size):
-            s = problem.generate_random_state()
-            fringe.append(SearchNodeValueOrdered(state=s, problem=problem))
-    else:
-        fringe.append(SearchNodeValueOrdered(state=problem.initial_state,
-                                             problem=problem))
-
-    finish_reason = ''
-    iteration = 0
-    run = True
-    best = None
 
-    while run:
+    If unique_states=True, the fringe keeps only one node per state,
+    remembering the states in it with a closed_set(problem).
+    If budget is given, returns budget.result() when it's exceeded.
+    If stats is given, it's updated with the statistics of the search.
+    If executor is given, it's passed to fringe_expander.
+    '''
+    with problem_timing(stats, problem):
         if viewer:
-            viewer.event('new_iteration', list(fringe))
+            viewer.event('started')
+
+        if unique_states:
+            fringe = UniqueStatesBoundedPriorityQueue(fringe_size,
+                                                      closed_set(problem))
+        else:
+            fringe = BoundedPriorityQueue(fringe_size)
+        if random_initial_states:
+            for _ in range(fringe_size):
+                s = problem.generate_random_state()
+                fringe.append(SearchNodeValueOrdered(state=s, problem=problem))
+        else:
+            fringe.append(SearchNodeValueOrdered(state=problem.initial_state,
+                                                 problem=problem))
+
+        finish_reason = ''
+        iteration = 0
+        run = True
+        best = None
+
+        while run:
+            if viewer:
+                viewer.event('new_iteration', list(fringe))
+
+            old_best = fringe[0]
+            if budget is not None and budget.exceeded(old_best, len(fringe)):
+                if viewer:
+                    viewer.event('finished', fringe, old_best,
+                                 'budget exceeded: %s' % budget.reason)
+                return budget.result()
 
-        old_best = fringe[0]
-        fringe_expander(fringe, iteration, viewer)
-        best = fringe[0]
+            fringe_expander(fringe, iteration, viewer, stats, executor)
+            best = fringe[0]
 
-        iteration += 1
+            iteration += 1
+            if stats is not None:
+                stats.iterations += 1
+                stats.fringe_size(len(fringe))
 
-        if iterations_limit and iteration >= iterations_limit:
-            run = False
-            finish_reason = 'reaching iteration limit'
-        elif old_best.value >= best.value and stop_when_no_better:
-            run = False
-            finish_reason = 'not being able to improve solution'
+            if iterations_limit and iteration >= iterations_limit:
+                run = False
+                finish_reason = 'reaching iteration limit'
+            elif old_best.value >= best.value and stop_when_no_better:
+                run = False
+                finish_reason = 'not being able to improve solution'
 
-    if viewer:
-        viewer.event('finished', fringe, best, 'returned after %s' % finish_reason)
+        if viewer:
+            viewer.event('finished', fringe, best, 'returned after %s' % finish_reason)
 
-    return best
+        return best
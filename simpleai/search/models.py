@@ -1,4 +1,24 @@
 # coding=utf-8
+import copy
+import os
+import sys
+import threading
+import time
+import warnings
+import weakref
+from simpleai.search.utils import LRUCache, EncodedStateSet
+try:
+    import psutil
+except ImportError:
+    psutil = None  # lint:ok
+try:
+    import resource
+except ImportError:
+    resource = None  # lint:ok
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # lint:ok
 
 
 class SearchProblem(object):
@@ -36,6 +56,16 @@ class SearchProblem(object):
         '''
         return 1
 
+    def successors(self, state):
+        '''Returns the successors of `state`, as an iterable of
+           (action, new_state, cost) triples.
+           By default it uses `actions`, `result` and `cost`, calling
+           `result` and `cost` for each action only when its triple is
+           consumed. Implement it if the successors can be calculated
+           faster all together.
+        '''
+        return _lazy_successors(self, state)
+
     def is_goal(self, state):
         '''Returns `True` if `state` is a goal state and `False` otherwise'''
         raise NotImplementedError
@@ -51,6 +81,70 @@ class SearchProblem(object):
            from `state`.'''
         return 0
 
+    def heuristic_batch(self, states):
+        '''Returns the heuristic of each state of the `states` list, as a
+           sequence (like a list or a numpy array) in the same order.
+           Optional: when it's implemented, the algorithms that order nodes
+           by heuristic use it to calculate the heuristic of all the
+           successors of a node with one call.
+        '''
+        return [self.heuristic(state) for state in states]
+
+    def predecessors(self, state):
+        '''Returns the ways to reach `state`, as an iterable of
+           (action, previous_state) pairs, where applying `action` to
+           `previous_state` results in `state`.
+           Needed by the algorithms that search backwards from the goal.
+        '''
+        raise NotImplementedError
+
+    def goal_states(self):
+        '''Returns an iterable over all the goal states.
+           Needed by the algorithms that search backwards from the goal.
+        '''
+        raise NotImplementedError
+
+    def backward_heuristic(self, state):
+        '''Returns an estimate of the cost to reach `state` from the initial
+           state, used when searching backwards from the goal.'''
+        return 0
+
+    def encode_state(self, state):
+        '''Returns a compact representation of `state` (like an int or a
+           bytes object), used to remember the visited states with less
+           memory. Equal states must have equal encodings, and different
+           states different encodings.
+           Optional: when it's implemented, the search algorithms store the
+           states encoded (see `closed_set`).
+        '''
+        raise NotImplementedError
+
+    def decode_state(self, encoded):
+        '''Returns the state encoded by `encode_state`.'''
+        raise NotImplementedError
+
+    def state_hash(self, state):
+        '''Returns a 64 bits hash of `state`, like a Zobrist hash (the xor
+           of a random number for each part of the state and its value).
+           Only used for the initial states, the hashes of the other states
+           are calculated with `update_state_hash`.
+        '''
+        raise NotImplementedError
+
+    def update_state_hash(self, state_hash, state, action, new_state):
+        '''Returns the hash of `new_state`, the result of applying `action`
+           to `state`, whose hash is `state_hash`. It should take constant
+           time: for a Zobrist hash, xor out the numbers of the parts changed
+           by the action, and xor in the numbers of their new values.
+           Equal states must have equal hashes, but different states can
+           share a hash (their states are compared when it happens).
+           Optional: when it's implemented (with `state_hash`), the graph
+           searches remember the visited states by their hashes (see
+           `HashedState`), so finding repeated states doesn't depend on the
+           size of the states.
+        '''
+        raise NotImplementedError
+
     def crossover(self, state1, state2):
         """
         Crossover method for genetic search. It should return a new state that
@@ -87,8 +181,618 @@ class SearchProblem(object):
         return str(action)
 
 
+def _lazy_successors(problem, state):
+    for action in problem.actions(state):
+        new_state = problem.result(state, action)
+        yield action, new_state, problem.cost(state, action, new_state)
+
+
+def _node_successors(problem, state):
+    '''The (action, new_state, cost) triples of state.'''
+    if hasattr(problem, 'successors'):
+        return problem.successors(state)
+    return _lazy_successors(problem, state)
+
+
+def implements_heuristic_batch(problem):
+    '''Returns `True` if `problem` implements `heuristic_batch`.'''
+    heuristic_batch = getattr(type(problem), 'heuristic_batch', None)
+    return heuristic_batch is not None and \
+        heuristic_batch != SearchProblem.heuristic_batch
+
+
+def implements_state_encoding(problem):
+    '''Returns `True` if `problem` implements `encode_state`.'''
+    encode_state = getattr(type(problem), 'encode_state', None)
+    return encode_state is not None and \
+        encode_state != SearchProblem.encode_state
+
+
+def implements_state_hash(problem):
+    '''Returns `True` if `problem` implements `update_state_hash`.'''
+    update_state_hash = getattr(type(problem), 'update_state_hash', None)
+    return update_state_hash is not None and \
+        update_state_hash != SearchProblem.update_state_hash
+
+
+class HashedState(object):
+    '''
+    State with its hash precalculated, used instead of the state in the sets
+    of visited states and the indexes of the fringes. Equal if the hashes
+    are equal and the states too, so the states are compared only when the
+    hashes match (repeated states, or collisions).
+    '''
+    __slots__ = ('state', 'hash')
+
+    def __init__(self, state, state_hash):
+        self.state = state
+        self.hash = state_hash
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        return self.hash == other.hash and self.state == other.state
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'HashedState(%r, %r)' % (self.state, self.hash)
+
+
+def hashed_state(node):
+    '''
+    Returns the HashedState of the state of `node`, calculated from the
+    hash of its parent with SearchProblem.update_state_hash (or with
+    state_hash, if it has no parent), and kept on the node.
+    '''
+    try:
+        return node._hashed_state
+    except AttributeError:
+        pass
+    problem = node.problem
+    parent = node.parent
+    if parent is None:
+        value = problem.state_hash(node.state)
+    else:
+        value = problem.update_state_hash(hashed_state(parent).hash,
+                                          parent.state, node.action,
+                                          node.state)
+    node._hashed_state = HashedState(node.state, value)
+    return node._hashed_state
+
+
+def _node_state(node):
+    return node.state
+
+
+def state_key(problem):
+    '''Returns the function that gives the key of a node in the set of
+       visited states and the fringe index of `problem`: `hashed_state` if
+       the problem implements `update_state_hash`, or else the state.
+    '''
+    if implements_state_hash(problem):
+        return hashed_state
+    return _node_state
+
+
+def closed_set(problem):
+    '''Returns an empty set to remember the visited states of `problem`: a
+       regular set of HashedStates if the problem implements
+       `update_state_hash` (see `state_key`), an EncodedStateSet if it
+       implements `encode_state` (and `decode_state`, to iterate it), or
+       else a regular set.
+    '''
+    if implements_state_hash(problem):
+        return set()
+    if implements_state_encoding(problem):
+        decode_state = getattr(problem, 'decode_state', None)
+        if getattr(type(problem), 'decode_state', None) == \
+           SearchProblem.decode_state:
+            decode_state = None
+        return EncodedStateSet(problem.encode_state, decode_state)
+    return set()
+
+
+class SearchBudget(object):
+    '''Limits for the resources used by a search. The search stops when
+       it's about to expand a node (or to run an iteration, in local
+       search) and:
+
+       - `max_expanded` nodes were already expanded.
+       - there are more than `max_fringe` nodes on the fringe.
+       - `time_limit` seconds passed since the search started.
+       - the process uses more than `max_memory` bytes (approximately: the
+         memory traced by tracemalloc if it's tracing, or else the current
+         resident memory of the process, from psutil if it's installed or
+         /proc/self/statm, or else the peak resident memory of the process,
+         checked every `memory_check_interval` expansions; if the memory
+         can't be measured at all, a warning is issued and the limit is
+         ignored).
+
+       When that happens, the search returns a BudgetExceeded result.
+       The counters start with the first search that uses the budget, so
+       use a new budget for each search (unless you want to share it).
+       '''
+    memory_check_interval = 1000
+
+    def __init__(self, max_expanded=None, max_fringe=None, time_limit=None,
+                 max_memory=None):
+        self.max_expanded = max_expanded
+        self.max_fringe = max_fringe
+        self.time_limit = time_limit
+        self.max_memory = max_memory
+        self.expanded = 0
+        self.start_time = None
+        self.deadline = None
+        self.reason = None
+        self.best = None
+        self.memory_unknown = False
+
+    def start(self):
+        '''Starts the clock, if it wasn't started by a previous search.'''
+        if self.start_time is None:
+            self.start_time = time.time()
+            if self.time_limit is not None:
+                self.deadline = self.start_time + self.time_limit
+
+    def exceeded(self, best=None, fringe_size=0):
+        '''Called before each expansion. `best` is the best node found so
+           far (a node ordered by heuristic or value replaces the previous
+           one only if it's better). Returns the name of the exceeded
+           limit, or None (counting the expansion).
+           '''
+        self.start()
+        if best is not None:
+            self._update_best(best)
+
+        reason = None
+        if self.max_expanded is not None and \
+           self.expanded >= self.max_expanded:
+            reason = 'max_expanded'
+        elif self.max_fringe is not None and fringe_size > self.max_fringe:
+            reason = 'max_fringe'
+        elif self.deadline is not None and time.time() > self.deadline:
+            reason = 'time_limit'
+        elif self.max_memory is not None and \
+                self.expanded % self.memory_check_interval == 0:
+            memory = _memory_usage()
+            if memory is None:
+                if not self.memory_unknown:
+                    self.memory_unknown = True
+                    warnings.warn("can't measure the memory used by the "
+                                  "process, max_memory is ignored",
+                                  RuntimeWarning)
+            elif memory > self.max_memory:
+                reason = 'max_memory'
+
+        if reason is None:
+            self.expanded += 1
+        self.reason = reason
+        return reason
+
+    def _update_best(self, best):
+        old = self.best
+        if old is not None and hasattr(best, 'heuristic') and \
+           hasattr(old, 'heuristic'):
+            if old.heuristic < best.heuristic:
+                return
+        elif old is not None and hasattr(best, 'value') and \
+                hasattr(old, 'value'):
+            if old.value > best.value:
+                return
+        self.best = best
+
+    def result(self):
+        '''Returns the BudgetExceeded result for the exceeded limit.'''
+        return BudgetExceeded(self.reason, self.best, self.expanded,
+                              time.time() - self.start_time)
+
+
+class BudgetExceeded(object):
+    '''Result of a search stopped by a SearchBudget.
+       `reason` is the name of the exceeded limit ('max_expanded',
+       'max_fringe', 'time_limit' or 'max_memory'), `best` the best node
+       (or assignment, in constraint satisfaction) found so far, `expanded`
+       the number of expanded nodes and `elapsed` the seconds used.
+       It's false when used as a boolean, like the None returned when the
+       search doesn't find a solution.
+       '''
+    def __init__(self, reason, best, expanded, elapsed):
+        self.reason = reason
+        self.best = best
+        self.expanded = expanded
+        self.elapsed = elapsed
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return 'BudgetExceeded <%s, best: %s>' % (self.reason, self.best)
+
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+class SearchStats(object):
+    '''Statistics of a search, collected by the algorithms that receive it
+       as their `stats` parameter:
+
+       - `expanded`: nodes expanded (assignments tried, in backtracking).
+       - `generated`: nodes created by the expansions (values tried, in
+         backtracking).
+       - `duplicates`: generated nodes discarded because their state was
+         already visited or in the fringe (graph search).
+       - `fringe_replacements`: nodes in the fringe replaced by a better
+         node with the same state (not closed nodes opened again).
+       - `reopened`: states opened again after being expanded, because a
+         cheaper path to them was found (ara_star) or the costs changed
+         (LPAStar).
+       - `max_fringe`: the biggest size of the fringe.
+       - `iterations`: iterations (local search and iterative algorithms).
+       - `calls` and `time`: number of calls and seconds spent in the
+         `actions`, `result`, `heuristic` and `value` methods of the
+         problem, and in `successors` and `heuristic_batch` if the problem
+         implements them (the defaults call the other methods, which are
+         already counted). If `successors` returns a generator, only the
+         time to create it is counted, not the time to iterate it.
+
+       Other values (like the ones of iterative_limited_depth_first, or the
+       'pruning_error' of approximate memories) can be set as items. The
+       counters add up if the same object is used in many searches.
+       `as_dict` exports everything as a plain dict.
+       '''
+    timed_methods = ('actions', 'result', 'heuristic', 'value',
+                     'successors', 'heuristic_batch')
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.fringe_replacements = 0
+        self.reopened = 0
+        self.max_fringe = 0
+        self.iterations = 0
+        self.calls = dict((name, 0) for name in self.timed_methods)
+        self.time = dict((name, 0.0) for name in self.timed_methods)
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+    def fringe_size(self, size):
+        if size > self.max_fringe:
+            self.max_fringe = size
+
+    def as_dict(self):
+        values = dict(vars(self))
+        values['calls'] = dict(self.calls)
+        values['time'] = dict(self.time)
+        return values
+
+    def __repr__(self):
+        return 'SearchStats %s' % self.as_dict()
+
+
+def problem_timing(stats, problem):
+    '''Returns a context manager that, while active, counts and times the
+       calls to the methods of `problem` in `stats` (a SearchStats, or None
+       to do nothing).
+       '''
+    return _ProblemTiming(stats, problem)
+
+
+# SearchProblem methods whose default implementation calls other timed
+# methods
+_DEFAULT_HOOKS = ('successors', 'heuristic_batch')
+
+
+def _overrides(problem, name):
+    '''Returns `True` if `problem` has its own `name` method, instead of the
+       default of SearchProblem.'''
+    default = getattr(SearchProblem, name)
+    return name in getattr(problem, '__dict__', {}) or \
+        getattr(type(problem), name, default) != default
+
+
+class _ProblemTiming(object):
+    '''
+    Replaces the timed methods of a problem with wrappers that count and
+    time them, and restores them at the end.
+    The counters are updated under a lock, because with an executor the
+    methods are called from many threads at the same time.
+    '''
+    def __init__(self, stats, problem):
+        self.stats = stats
+        self.problem = problem
+        self.replaced = {}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        problem = self.problem
+        instance_attributes = getattr(problem, '__dict__', None)
+        if self.stats is None or instance_attributes is None:
+            # disabled, or the methods can't be replaced
+            return self
+        for name in self.stats.timed_methods:
+            method = getattr(problem, name, None)
+            if method is None or getattr(method, 'timed', False):
+                # missing, or already timed by an outer search
+                continue
+            if name in _DEFAULT_HOOKS and not _overrides(problem, name):
+                # the default calls the other timed methods
+                continue
+            self.replaced[name] = instance_attributes.get(name)
+            setattr(problem, name, self._wrap(name, method))
+        return self
+
+    def _wrap(self, name, method):
+        calls, times = self.stats.calls, self.stats.time
+        lock = self.lock
+
+        def timed(*args):
+            start = _clock()
+            try:
+                return method(*args)
+            finally:
+                elapsed = _clock() - start
+                with lock:
+                    times[name] += elapsed
+                    calls[name] += 1
+        timed.timed = True
+        return timed
+
+    def __exit__(self, *exc_info):
+        for name, original in self.replaced.items():
+            if original is None:
+                delattr(self.problem, name)
+            else:
+                setattr(self.problem, name, original)
+        self.replaced.clear()
+
+
+def _memory_usage():
+    '''Approximate memory used by the process, in bytes (None if unknown).
+       The current memory when it can be measured (so the memory used, and
+       freed, before a search doesn't count against its budget), or else
+       the peak memory.'''
+    memory = _current_memory_usage()
+    if memory is None and resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes, except on mac
+        memory = usage if sys.platform == 'darwin' else usage * 1024
+    return memory
+
+
+def _current_memory_usage():
+    '''Memory used now by the process, in bytes (None if unknown).'''
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class CachedProblemMixin(object):
+    '''Mixin for SearchProblem subclasses, that caches the heuristic values
+       and the successors (actions, results and costs) of the states, so
+       they aren't calculated again when a state is reached many times.
+
+       Use it before SearchProblem in the bases of the problem:
+
+           class MyProblem(CachedProblemMixin, SearchProblem):
+               ...
+
+       The caches keep the values of the last `heuristic_cache_size` and
+       `successors_cache_size` states used (None means no limit), and
+       `cache_stats` returns their hits and misses. The actions of a state
+       are cached when they're asked for, and its results and costs when
+       they're calculated for the first time (only for hashable actions).
+       The states must be hashable, and the methods must always return the
+       same values for the same state.
+       '''
+    heuristic_cache_size = 10000
+    successors_cache_size = 10000
+
+    def _caches(self):
+        caches = self.__dict__.get('_problem_caches')
+        if caches is None:
+            caches = self._problem_caches = (
+                LRUCache(self.heuristic_cache_size),
+                LRUCache(self.successors_cache_size))
+        return caches
+
+    def _entry(self, state):
+        '''The _CachedSuccessors of state, from the cache.'''
+        cache = self._caches()[1]
+        entry = cache.get(state)
+        if entry is None:
+            actions = super(CachedProblemMixin, self).actions(state)
+            entry = _CachedSuccessors(list(actions))
+            cache.put(state, entry)
+        return entry
+
+    def _peek(self, state):
+        # without counting as a hit or miss
+        return self._caches()[1].values.get(state)
+
+    def actions(self, state):
+        return list(self._entry(state).actions)
+
+    def successors(self, state):
+        # the results and costs are calculated (or taken from the cache)
+        # only when their triples are consumed
+        return _lazy_successors(self, state)
+
+    def result(self, state, action):
+        entry = self._peek(state)
+        if entry is None:
+            return super(CachedProblemMixin, self).result(state, action)
+        new_state = _cached_value(entry.results, action)
+        if new_state is _MISSING:
+            new_state = super(CachedProblemMixin, self).result(state, action)
+            try:
+                entry.results[action] = new_state
+            except TypeError:
+                # unhashable action
+                pass
+        return new_state
+
+    def cost(self, state, action, state2):
+        entry = self._peek(state)
+        if entry is None or _cached_value(entry.results, action) != state2:
+            return super(CachedProblemMixin, self).cost(state, action, state2)
+        value = _cached_value(entry.costs, action)
+        if value is _MISSING:
+            value = super(CachedProblemMixin, self).cost(state, action, state2)
+            entry.costs[action] = value
+        return value
+
+    def heuristic(self, state):
+        cache = self._caches()[0]
+        value = cache.get(state)
+        if value is None:
+            value = super(CachedProblemMixin, self).heuristic(state)
+            cache.put(state, value)
+        return value
+
+    def cache_stats(self):
+        '''Returns the hits, misses and size of the heuristic and successors
+           caches, as a dict of dicts.'''
+        heuristic_cache, successors_cache = self._caches()
+        return {'heuristic': heuristic_cache.stats(),
+                'successors': successors_cache.stats()}
+
+    def clear_caches(self):
+        for cache in self._caches():
+            cache.clear()
+
+
+_MISSING = object()
+
+
+def _cached_value(values, key):
+    '''values[key], or _MISSING if it isn't there (or key is unhashable).'''
+    try:
+        return values.get(key, _MISSING)
+    except TypeError:
+        return _MISSING
+
+
+class _CachedSuccessors(object):
+    '''Cached actions of a state, and the results and costs (by action)
+       calculated so far.'''
+    __slots__ = ('actions', 'results', 'costs')
+
+    def __init__(self, actions):
+        self.actions = actions
+        self.results = {}
+        self.costs = {}
+
+
+def _without_timing(problem):
+    '''
+    Returns problem, or a copy of it without the methods timed by
+    problem_timing (which can't be pickled) if it has them.
+    '''
+    timed = [name for name, method in getattr(problem, '__dict__', {}).items()
+             if getattr(method, 'timed', False)]
+    if timed:
+        problem = copy.copy(problem)
+        for name in timed:
+            delattr(problem, name)
+    return problem
+
+
+class EvaluateState(object):
+    '''
+    Function that returns the heuristic or value (evaluation is
+    'heuristic' or 'value') of a state. It can be pickled (if the problem
+    can), so it can run on the workers of a process pool, where the timing
+    of problem_timing isn't available.
+    '''
+    def __init__(self, problem, evaluation):
+        self.problem = problem
+        self.evaluation = evaluation
+
+    def __call__(self, state):
+        return getattr(self.problem, self.evaluation)(state)
+
+    def __getstate__(self):
+        values = self.__dict__.copy()
+        values['problem'] = _without_timing(self.problem)
+        return values
+
+
+class _ApplyAction(object):
+    '''
+    Function that applies an action to a state, returning the new state,
+    the cost, and the heuristic or value of the new state (if evaluation is
+    'heuristic' or 'value'). It can be pickled like EvaluateState.
+    '''
+    def __init__(self, problem, state, evaluation=None):
+        self.problem = problem
+        self.state = state
+        self.evaluation = evaluation
+
+    def __call__(self, action):
+        problem = self.problem
+        new_state = problem.result(self.state, action)
+        cost = problem.cost(self.state, action, new_state)
+        evaluated = None
+        if self.evaluation is not None:
+            evaluated = getattr(problem, self.evaluation)(new_state)
+        return new_state, cost, evaluated
+
+    def __getstate__(self):
+        values = self.__dict__.copy()
+        values['problem'] = _without_timing(self.problem)
+        return values
+
+
+def _executor_expand(node, local_search, executor):
+    '''
+    Creates the successors of node applying its actions with
+    executor.map, so the results, costs and evaluations of the new states
+    are calculated concurrently. The successors keep the order of the
+    actions.
+    '''
+    problem = node.problem
+    actions = list(problem.actions(node.state))
+    evaluation = node._evaluation
+    outcomes = executor.map(_ApplyAction(problem, node.state, evaluation),
+                            actions)
+
+    nodefactory = node.__class__
+    parent = None if local_search else node
+    new_nodes = []
+    for action, (new_state, cost, evaluated) in zip(actions, outcomes):
+        evaluated = {evaluation: evaluated} if evaluation is not None else {}
+        new_nodes.append(nodefactory(state=new_state,
+                                     parent=parent,
+                                     problem=problem,
+                                     action=action,
+                                     cost=node.cost + cost,
+                                     depth=node.depth + 1,
+                                     **evaluated))
+    return new_nodes
+
+
 class SearchNode(object):
     '''Node of a search process.'''
+    # the problem method that calculates the attribute used to order the
+    # nodes (if any)
+    _evaluation = None
 
     def __init__(self, state, parent=None, action=None, cost=0, problem=None,
                  depth=0):
@@ -99,22 +803,30 @@ class SearchNode(object):
         self.problem = problem or parent.problem
         self.depth = depth
 
-    def expand(self, local_search=False):
-        '''Create successors.'''
-        new_nodes = []
-        for action in self.problem.actions(self.state):
-            new_state = self.problem.result(self.state, action)
-            cost = self.problem.cost(self.state,
-                                     action,
-                                     new_state)
-            nodefactory = self.__class__
-            new_nodes.append(nodefactory(state=new_state,
-                                         parent=None if local_search else self,
-                                         problem=self.problem,
-                                         action=action,
-                                         cost=self.cost + cost,
-                                         depth=self.depth + 1))
-        return new_nodes
+    def expand(self, local_search=False, executor=None):
+        '''Create successors.
+           If executor is given (like a concurrent.futures.ThreadPoolExecutor
+           or ProcessPoolExecutor), the results, costs and heuristics or
+           values of the successors are calculated concurrently with its
+           `map` method.'''
+        if executor is not None:
+            return _executor_expand(self, local_search, executor)
+        return list(self.iter_expand(local_search))
+
+    def iter_expand(self, local_search=False):
+        '''Create successors lazily, one each time the returned iterator
+           is advanced. Uses SearchProblem.successors if the problem has it,
+           else actions, result and cost.'''
+        problem = self.problem
+        nodefactory = self.__class__
+        parent = None if local_search else self
+        for action, new_state, cost in _node_successors(problem, self.state):
+            yield nodefactory(state=new_state,
+                              parent=parent,
+                              problem=problem,
+                              action=action,
+                              cost=self.cost + cost,
+                              depth=self.depth + 1)
 
     def path(self):
         '''Path (list of nodes and actions) from root to this node.'''
@@ -147,15 +859,25 @@ class SearchNode(object):
         ))
 
 
-class SearchNodeCostOrdered(SearchNode):
+class _CostOrdered(object):
+    '''Orders the nodes by cost (shared by the normal and compact nodes).'''
+    __slots__ = ()
+
     def __lt__(self, other):
         return self.cost < other.cost
 
 
-class SearchNodeValueOrdered(SearchNode):
+class _ValueOrdered(object):
+    '''Orders the nodes by value, highest first.'''
+    __slots__ = ()
+    _evaluation = 'value'
+
     def __init__(self, *args, **kwargs):
-        super(SearchNodeValueOrdered, self).__init__(*args, **kwargs)
-        self.value = self.problem.value(self.state)
+        value = kwargs.pop('value', None)
+        super(_ValueOrdered, self).__init__(*args, **kwargs)
+        if value is None:
+            value = self.problem.value(self.state)
+        self.value = value
 
     def __lt__(self, other):
         # value must work inverted, because heapq sorts 1-9
@@ -163,18 +885,184 @@ class SearchNodeValueOrdered(SearchNode):
         return -self.value < -other.value
 
 
-class SearchNodeHeuristicOrdered(SearchNode):
+class _HeuristicOrdered(object):
+    '''Orders the nodes by heuristic.'''
+    __slots__ = ()
+    _evaluation = 'heuristic'
+
     def __init__(self, *args, **kwargs):
-        super(SearchNodeHeuristicOrdered, self).__init__(*args, **kwargs)
-        self.heuristic = self.problem.heuristic(self.state)
+        heuristic = kwargs.pop('heuristic', None)
+        super(_HeuristicOrdered, self).__init__(*args, **kwargs)
+        if heuristic is None:
+            heuristic = self.problem.heuristic(self.state)
+        self.heuristic = heuristic
+
+    def expand(self, local_search=False, executor=None):
+        '''Create successors. If the problem implements
+           SearchProblem.heuristic_batch, their heuristics are calculated
+           with one call to it (unless an executor is given, see
+           SearchNode.expand).'''
+        if executor is not None:
+            return _executor_expand(self, local_search, executor)
+        if not implements_heuristic_batch(self.problem):
+            return list(self.iter_expand(local_search))
+
+        problem = self.problem
+        successors = list(_node_successors(problem, self.state))
+        heuristics = problem.heuristic_batch([new_state for _, new_state, _
+                                              in successors])
+        if hasattr(heuristics, 'tolist'):
+            # numpy array, the values are faster to use as python numbers
+            heuristics = heuristics.tolist()
+
+        nodefactory = self.__class__
+        parent = None if local_search else self
+        return [nodefactory(state=new_state,
+                            parent=parent,
+                            problem=problem,
+                            action=action,
+                            cost=self.cost + cost,
+                            depth=self.depth + 1,
+                            heuristic=heuristic)
+                for (action, new_state, cost), heuristic
+                in zip(successors, heuristics)]
 
     def __lt__(self, other):
         return self.heuristic < other.heuristic
 
 
-class SearchNodeStarOrdered(SearchNodeHeuristicOrdered):
+class _StarOrdered(object):
+    '''Orders the nodes by f = cost + heuristic.'''
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        super(_StarOrdered, self).__init__(*args, **kwargs)
+        # calculated once, not on each comparison
+        self.f = self.heuristic + self.cost
+
     def __lt__(self, other):
-        return self.heuristic + self.cost < other.heuristic + other.cost
+        return self.f < other.f
+
+
+class SearchNodeCostOrdered(_CostOrdered, SearchNode):
+    pass
+
+
+class SearchNodeValueOrdered(_ValueOrdered, SearchNode):
+    pass
+
+
+class SearchNodeHeuristicOrdered(_HeuristicOrdered, SearchNode):
+    pass
+
+
+class SearchNodeStarOrdered(_StarOrdered, SearchNodeHeuristicOrdered):
+    pass
+
+
+class CompactSearchNode(object):
+    '''
+    Memory efficient version of SearchNode.
+    Uses __slots__ instead of a per-instance __dict__, and doesn't store the
+    problem on each node: the problem is a class attribute, set on the
+    classes created by `compact_node_factory`.
+    '''
+    __slots__ = ('state', 'parent', 'action', 'cost', 'depth')
+    problem = None
+    _evaluation = None
+
+    def __init__(self, state, parent=None, action=None, cost=0, problem=None,
+                 depth=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+        self.depth = depth
+
+    expand = SearchNode.expand
+    iter_expand = SearchNode.iter_expand
+    path = SearchNode.path
+    state_representation = SearchNode.state_representation
+    action_representation = SearchNode.action_representation
+    __repr__ = SearchNode.__repr__
+    __hash__ = SearchNode.__hash__
+
+    def __eq__(self, other):
+        return isinstance(other, CompactSearchNode) and self.state == other.state
+
+    def __reduce__(self):
+        # the classes bound to a problem can't be found by name, so the node
+        # is rebuilt from the unbound class and the problem
+        node_class = type(self)
+        values = {}
+        for cls in node_class.__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(self, name):
+                    values[name] = getattr(self, name)
+        return (_unpickle_compact_node,
+                (getattr(node_class, '_unbound', node_class), self.problem,
+                 values))
+
+
+class CompactSearchNodeCostOrdered(_CostOrdered, CompactSearchNode):
+    __slots__ = ()
+
+
+class CompactSearchNodeValueOrdered(_ValueOrdered, CompactSearchNode):
+    __slots__ = ('value',)
+
+
+class CompactSearchNodeHeuristicOrdered(_HeuristicOrdered, CompactSearchNode):
+    __slots__ = ('heuristic',)
+
+
+class CompactSearchNodeStarOrdered(_StarOrdered,
+                                   CompactSearchNodeHeuristicOrdered):
+    __slots__ = ('f',)
+
+
+_COMPACT_NODE_CLASSES = {
+    SearchNode: CompactSearchNode,
+    SearchNodeCostOrdered: CompactSearchNodeCostOrdered,
+    SearchNodeValueOrdered: CompactSearchNodeValueOrdered,
+    SearchNodeHeuristicOrdered: CompactSearchNodeHeuristicOrdered,
+    SearchNodeStarOrdered: CompactSearchNodeStarOrdered,
+}
+
+# classes created by compact_node_factory, by (compact class, slots, id of
+# the problem), so the searches on a problem share them. Weak, to not keep
+# the problems alive.
+_bound_compact_classes = weakref.WeakValueDictionary()
+
+
+def compact_node_factory(node_factory, problem):
+    '''
+    Returns a compact node class equivalent to `node_factory` (one of the
+    SearchNode classes, or its compact version), bound to `problem`.
+    The same class is returned for the same problem.
+    '''
+    node_class = _COMPACT_NODE_CLASSES.get(node_factory, node_factory)
+    node_class = getattr(node_class, '_unbound', node_class)
+    # the nodes keep their HashedStates, if the problem uses them
+    slots = ('_hashed_state',) if implements_state_hash(problem) else ()
+    key = (node_class, slots, id(problem))
+    bound_class = _bound_compact_classes.get(key)
+    if bound_class is None or bound_class.problem is not problem:
+        # (the id can be reused by a new problem)
+        bound_class = type(node_class.__name__, (node_class,),
+                           {'__slots__': slots, 'problem': problem,
+                            '_unbound': node_class})
+        _bound_compact_classes[key] = bound_class
+    return bound_class
+
+
+def _unpickle_compact_node(node_class, problem, values):
+    if problem is not None:
+        node_class = compact_node_factory(node_class, problem)
+    node = node_class.__new__(node_class)
+    for name, value in values.items():
+        setattr(node, name, value)
+    return node
 
 
 class CspProblem(object):
@@ -0,0 +1,258 @@
+# coding=utf-8
+import heapq
+import multiprocessing
+import traceback
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+from simpleai.search.models import SearchNode
+
+
+def hda_star(problem, processes=None, viewer=None):
+    '''
+    Hash distributed A* search, running on several processes.
+
+    Each state is owned by one of the processes (chosen by the hash of the
+    state), that keeps its own fringe and visited states. The owner
+    calculates the heuristic of its states and expands them, sending each
+    successor to its owner.
+    processes is the number of worker processes, by default the number of
+    CPUs.
+    Finds the solution with the lowest cost if the heuristic is admissible.
+    Each node is sent with the state and action it comes from (not its
+    whole path), and the owners of the states remember them, so the path of
+    the solution can be followed back at the end.
+    States and actions must be picklable, and SearchProblem.result must be
+    deterministic (the solution path is rebuilt from its actions).
+    Needs the fork start method of multiprocessing (not available on
+    Windows), so the processes share the problem and the hashes of the
+    states. On macOS fork is available, but it isn't safe if the problem
+    uses system libraries that start threads.
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.is_goal, SearchProblem.cost, and SearchProblem.heuristic.
+    '''
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        raise RuntimeError('hda_star needs the fork start method of '
+                           'multiprocessing, not available on this platform')
+
+    if viewer:
+        viewer.event('started')
+
+    if problem.is_goal(problem.initial_state):
+        solution = SearchNode(state=problem.initial_state, problem=problem)
+        if viewer:
+            viewer.event('chosen_node', solution, True)
+            viewer.event('finished', [], solution, 'goal found')
+        return solution
+
+    processes = processes or multiprocessing.cpu_count()
+    context = multiprocessing.get_context('fork')
+    inboxes = [context.Queue() for _ in range(processes)]
+    results = context.Queue()
+    workers = [context.Process(target=_hda_star_worker,
+                               args=(problem, i, inboxes, results))
+               for i in range(processes)]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    try:
+        cost, actions = _hda_star_coordinate(problem, workers, inboxes,
+                                             results)
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        for worker in workers:
+            worker.join(1)
+            if worker.is_alive():
+                worker.terminate()
+
+    solution = None
+    if actions is not None:
+        solution = SearchNode(state=problem.initial_state, problem=problem)
+        for action in actions:
+            state = problem.result(solution.state, action)
+            solution = SearchNode(state=state,
+                                  parent=solution,
+                                  action=action,
+                                  cost=solution.cost + problem.cost(
+                                      solution.state, action, state),
+                                  problem=problem,
+                                  depth=solution.depth + 1)
+
+    if viewer:
+        if solution is not None:
+            viewer.event('chosen_node', solution, True)
+        viewer.event('finished', [], solution,
+                     'goal found' if solution else 'goal not found')
+
+    return solution
+
+
+def _hda_star_coordinate(problem, workers, inboxes, results):
+    '''
+    Sends the initial state to its owner, keeps the workers informed of the
+    best solution found, and detects when the search is over.
+    The search is over when, on two consecutive rounds of status requests,
+    all the workers are idle and the counts of sent and received messages
+    are equal and didn't change.
+    Returns the cost and actions of the best solution (or None, None).
+    '''
+    owner = hash(problem.initial_state) % len(inboxes)
+    inboxes[owner].put(('nodes', [(problem.initial_state, 0, None)]))
+    sent_by_coordinator = 1
+
+    best_cost, best_goal = float('inf'), None
+    last_counts = None
+    round_number = 0
+
+    while True:
+        round_number += 1
+        for inbox in inboxes:
+            inbox.put(('status', round_number))
+
+        statuses = {}
+        while len(statuses) < len(workers):
+            try:
+                message = results.get(timeout=1)
+            except Empty:
+                if any(not worker.is_alive() for worker in workers):
+                    raise RuntimeError('A hda_star worker died unexpectedly')
+                continue
+
+            if message[0] == 'goal':
+                _, cost, goal = message
+                if cost < best_cost:
+                    best_cost, best_goal = cost, goal
+                    for inbox in inboxes:
+                        inbox.put(('solution_cost', cost))
+            elif message[0] == 'status':
+                _, worker_id, worker_round, idle, sent, received = message
+                if worker_round == round_number:
+                    statuses[worker_id] = idle, sent, received
+            elif message[0] == 'error':
+                raise RuntimeError('Error on a hda_star worker:\n' + message[1])
+
+        sent = sent_by_coordinator + sum(s for _, s, _ in statuses.values())
+        received = sum(r for _, _, r in statuses.values())
+        if all(idle for idle, _, _ in statuses.values()) and sent == received:
+            if last_counts == (sent, received):
+                break
+            last_counts = sent, received
+        else:
+            last_counts = None
+
+    if best_goal is None:
+        return None, None
+    return best_cost, _hda_star_path(best_goal, workers, inboxes, results)
+
+
+def _hda_star_path(goal, workers, inboxes, results):
+    '''
+    Follows the path of the solution back from the goal, asking the owner
+    of each state where it comes from. Returns the actions of the path.
+    '''
+    actions = []
+    state = goal
+    while True:
+        inboxes[hash(state) % len(inboxes)].put(('link', state))
+        message = None
+        while message is None:
+            try:
+                message = results.get(timeout=1)
+            except Empty:
+                if any(not worker.is_alive() for worker in workers):
+                    raise RuntimeError('A hda_star worker died unexpectedly')
+        if message[0] == 'error':
+            raise RuntimeError('Error on a hda_star worker:\n' + message[1])
+        link = message[1]
+        if link is None:
+            break
+        state, action = link
+        actions.append(action)
+    return actions[::-1]
+
+
+def _hda_star_worker(problem, worker_id, inboxes, results):
+    '''
+    Worker process of hda_star. Expands the states it owns in A* order, and
+    answers the messages of the other processes.
+    '''
+    try:
+        _hda_star_work(problem, worker_id, inboxes, results)
+    except Exception:
+        results.put(('error', traceback.format_exc()))
+
+
+def _hda_star_work(problem, worker_id, inboxes, results):
+    inbox = inboxes[worker_id]
+    workers_count = len(inboxes)
+    fringe = []
+    best_costs = {}
+    # (previous state, action) of the best path to each state
+    links = {}
+    pushed = 0
+    solution_cost = float('inf')
+    sent = received = 0
+
+    while True:
+        # clean the nodes replaced by better ones
+        while fringe and fringe[0][2] > best_costs[fringe[0][3]]:
+            heapq.heappop(fringe)
+        idle = not fringe or fringe[0][0] >= solution_cost
+
+        try:
+            if idle:
+                message = inbox.get(timeout=1)
+            else:
+                message = inbox.get_nowait()
+        except Empty:
+            message = None
+
+        if message is not None:
+            kind = message[0]
+            if kind == 'nodes':
+                received += 1
+                for state, cost, link in message[1]:
+                    if cost < best_costs.get(state, float('inf')):
+                        best_costs[state] = cost
+                        links[state] = link
+                        f = cost + problem.heuristic(state)
+                        if f < solution_cost:
+                            pushed += 1
+                            heapq.heappush(fringe, (f, pushed, cost, state))
+            elif kind == 'solution_cost':
+                solution_cost = min(solution_cost, message[1])
+            elif kind == 'status':
+                results.put(('status', worker_id, message[1], idle, sent,
+                             received))
+            elif kind == 'link':
+                results.put(('link', links[message[1]]))
+            elif kind == 'stop':
+                return
+            continue
+
+        if idle:
+            continue
+
+        f, _, cost, state = heapq.heappop(fringe)
+        if problem.is_goal(state):
+            if cost < solution_cost:
+                solution_cost = cost
+                results.put(('goal', cost, state))
+            continue
+
+        outgoing = {}
+        for action in problem.actions(state):
+            new_state = problem.result(state, action)
+            new_cost = cost + problem.cost(state, action, new_state)
+            owner = hash(new_state) % workers_count
+            outgoing.setdefault(owner, []).append(
+                (new_state, new_cost, (state, action)))
+
+        # the nodes for this same worker are sent too, so they are handled
+        # in the same way (and counted) as the others
+        for owner, nodes in outgoing.items():
+            inboxes[owner].put(('nodes', nodes))
+            sent += 1
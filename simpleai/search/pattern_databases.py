@@ -0,0 +1,202 @@
+# coding=utf-8
+'''
+Pattern databases for permutation puzzles (like the eight puzzle).
+
+States are represented as tuples of tiles, where the i-th value is the tile
+at position i. A pattern database stores, for each placement of the tiles of
+a pattern (the other tiles are considered equal), the number of moves
+needed to put them on their goal positions. With additive databases (the
+default), only the moves of the pattern tiles are counted, so the values of
+databases with disjoint patterns can be added up.
+
+Example (eight puzzle, 0 is the empty space):
+
+    goal = (1, 2, 3, 4, 5, 6, 7, 8, 0)
+    moves = sliding_tile_moves(3, 3, blank=0)
+    databases = [build_pattern_database(goal, pattern, moves, blank=0)
+                 for pattern in ((1, 2, 3, 4), (5, 6, 7, 8))]
+    heuristic = additive_heuristic(databases)
+'''
+from collections import deque
+import json
+try:
+    import numpy
+except ImportError:
+    numpy = None  # lint:ok
+
+
+UNKNOWN = 255
+
+
+def sliding_tile_moves(rows, columns, blank=0):
+    '''
+    Returns the moves function of a sliding tile puzzle with the given size,
+    to be used with build_pattern_database.
+    '''
+    def moves(tiles):
+        position = tiles.index(blank)
+        row, column = divmod(position, columns)
+        neighbors = []
+        for other_row, other_column in ((row - 1, column), (row + 1, column),
+                                        (row, column - 1), (row, column + 1)):
+            if 0 <= other_row < rows and 0 <= other_column < columns:
+                other = other_row * columns + other_column
+                new_tiles = list(tiles)
+                new_tiles[position], new_tiles[other] = (tiles[other],
+                                                         tiles[position])
+                neighbors.append(tuple(new_tiles))
+        return neighbors
+    return moves
+
+
+def build_pattern_database(goal, pattern, moves, blank=None, additive=True):
+    '''
+    Builds the pattern database of the given tiles, with a backward breadth
+    first search from the goal.
+
+    goal is the goal state (a tuple of tiles), and pattern the tiles to
+    consider. moves is a function that receives a state and returns the
+    states reachable with one move. The moves must be reversible, and must
+    work on states where the tiles outside the pattern are replaced by None.
+    If the puzzle has an empty space, blank must be its tile (its position is
+    taken into account while searching, but not stored).
+    If additive=True, only the moves that change the positions of the
+    pattern tiles are counted.
+    Requires numpy.
+    '''
+    if numpy is None:
+        raise ImportError('build_pattern_database requires numpy')
+
+    database = PatternDatabase(goal, pattern, blank=blank)
+    table = numpy.full(database.size, UNKNOWN, dtype=numpy.uint8)
+
+    # the search also knows where the blank is, so it has its own ranking
+    tracked = database.pattern + ((blank,) if blank is not None else ())
+    size = len(goal)
+    distances = numpy.full(_permutations_count(size, len(tracked)), UNKNOWN,
+                           dtype=numpy.uint8)
+
+    start = tuple(tile if tile in tracked else None for tile in goal)
+    distances[_rank(_positions(start, tracked), size)] = 0
+    queue = deque([(0, start)])
+    while queue:
+        distance, tiles = queue.popleft()
+        if distance > distances[_rank(_positions(tiles, tracked), size)]:
+            # reached again with less moves after being queued
+            continue
+        rank = database.rank(tiles)
+        if distance < table[rank]:
+            table[rank] = distance
+
+        for new_tiles in moves(tiles):
+            cost = 1
+            if additive and not _moves_pattern(tiles, new_tiles, blank):
+                cost = 0
+            new_distance = distance + cost
+            if new_distance >= UNKNOWN:
+                raise ValueError('Distances must be lower than %i' % UNKNOWN)
+            new_rank = _rank(_positions(new_tiles, tracked), size)
+            if new_distance < distances[new_rank]:
+                distances[new_rank] = new_distance
+                if cost:
+                    queue.append((new_distance, new_tiles))
+                else:
+                    queue.appendleft((new_distance, new_tiles))
+
+    database.table = table
+    return database
+
+
+class PatternDatabase(object):
+    '''
+    Distances of the placements of the tiles of a pattern, in a numpy byte
+    array indexed by the rank of the positions of the tiles.
+    '''
+    def __init__(self, goal, pattern, table=None, blank=None):
+        self.goal = tuple(goal)
+        self.pattern = tuple(pattern)
+        self.blank = blank
+        self.table = table
+        self.size = _permutations_count(len(self.goal), len(self.pattern))
+
+    def rank(self, tiles):
+        '''Index of the placement of the pattern tiles in the table.'''
+        return _rank(_positions(tiles, self.pattern), len(self.goal))
+
+    def distance(self, tiles):
+        '''Moves needed to put the pattern tiles on their goal positions.'''
+        return int(self.table[self.rank(tiles)])
+
+    def save(self, filename):
+        '''
+        Saves the table to filename (in numpy .npy format), and the goal and
+        pattern to filename + '.json'. The tiles must be numbers or strings.
+        '''
+        with open(filename, 'wb') as table:
+            # saved to a file object, so numpy doesn't add an extension
+            numpy.save(table, self.table)
+        with open(filename + '.json', 'w') as metadata:
+            json.dump({'goal': self.goal, 'pattern': self.pattern,
+                       'blank': self.blank}, metadata)
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        '''
+        Loads a database saved with save. If mmap=True, the table is memory
+        mapped instead of read, so it's loaded from disk only when used (and
+        shared between processes).
+        '''
+        with open(filename + '.json') as metadata:
+            data = json.load(metadata)
+        table = numpy.load(filename, mmap_mode='r' if mmap else None)
+        return cls(data['goal'], data['pattern'], table=table,
+                   blank=data['blank'])
+
+
+def additive_heuristic(databases, to_tiles=None):
+    '''
+    Returns a heuristic function that adds up the distances of the given
+    databases, to be used as SearchProblem.heuristic.
+    It's admissible if the databases are additive and their patterns are
+    disjoint. If the states of the problem aren't tuples of tiles, to_tiles
+    must be a function that converts them.
+    '''
+    def heuristic(state):
+        tiles = to_tiles(state) if to_tiles else state
+        return sum(database.distance(tiles) for database in databases)
+    return heuristic
+
+
+def _permutations_count(n, k):
+    count = 1
+    for i in range(k):
+        count *= n - i
+    return count
+
+
+def _positions(tiles, pattern):
+    positions = dict((tile, i) for i, tile in enumerate(tiles)
+                     if tile is not None)
+    return [positions[tile] for tile in pattern]
+
+
+def _rank(positions, n):
+    '''
+    Perfect hash of the positions of k different tiles on n places: their
+    index among all the k-permutations of n, in lexicographic order.
+    '''
+    rank = 0
+    for i, position in enumerate(positions):
+        # the position among the places not used by the previous tiles
+        smaller = sum(1 for other in positions[:i] if other < position)
+        rank = rank * (n - i) + position - smaller
+    return rank
+
+
+def _moves_pattern(tiles, new_tiles, blank):
+    '''True if the move from tiles to new_tiles moves a pattern tile.'''
+    for tile, new_tile in zip(tiles, new_tiles):
+        if tile != new_tile and (tile is not None and tile != blank or
+                                 new_tile is not None and new_tile != blank):
+            return True
+    return False
@@ -1,71 +1,329 @@
 # coding=utf-8
-from simpleai.search.utils import FifoList, BoundedPriorityQueue, LifoList
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from simpleai.search.utils import (IndexedFifoList, IndexedLifoList,
+                                   IndexedPriorityQueue)
 from simpleai.search.models import (SearchNode, SearchNodeHeuristicOrdered,
                                     SearchNodeStarOrdered,
-                                    SearchNodeCostOrdered)
+                                    SearchNodeCostOrdered,
+                                    compact_node_factory, closed_set,
+                                    BudgetExceeded, SearchStats,
+                                    problem_timing, state_key,
+                                    implements_state_hash)
 
 
-def breadth_first(problem, graph_search=False, viewer=None):
+def breadth_first(problem, graph_search=False, viewer=None,
+                  compact_nodes=False, budget=None,
+                  stats=None, executor=None, memory=None):
     '''
     Breadth first search.
 
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
+    If memory is given with graph_search=True, it's used as the set of
+    visited states. A utils.BloomFilter uses a fixed amount of memory, but
+    some new states can be discarded as visited (so the solution can be
+    missed): with stats, their estimated probability is saved as
+    'pruning_error'.
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.is_goal.
     '''
-    return _search(problem,
-                   FifoList(),
-                   graph_search=graph_search,
-                   viewer=viewer)
+    result = _search(problem,
+                     IndexedFifoList(),
+                     graph_search=graph_search,
+                     viewer=viewer,
+                     compact_nodes=compact_nodes,
+                     budget=budget,
+                     stats=stats,
+                     executor=executor,
+                     memory=memory)
+    _report_pruning_error(stats, memory)
+    return result
 
 
-def depth_first(problem, graph_search=False, viewer=None):
+def depth_first(problem, graph_search=False, viewer=None,
+                compact_nodes=False, budget=None,
+                stats=None, lazy=False, executor=None, memory=None):
     '''
     Depth first search.
 
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
+    If lazy=True, the successors of each node are created one at a time,
+    when they are explored (using SearchProblem.successors, if implemented),
+    instead of all of them when the node is expanded. They are explored in
+    the order of the actions (else, the last action is explored first),
+    and with graph_search=True repeated states are discarded when they are
+    reached instead of when they are generated. The executor isn't used in
+    lazy mode.
+    If memory is given with graph_search=True, it's used as the set of
+    visited states. A utils.BloomFilter uses a fixed amount of memory, but
+    some new states can be discarded as visited (so the solution can be
+    missed): with stats, their estimated probability is saved as
+    'pruning_error'.
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.is_goal.
     '''
-    return _search(problem,
-                   LifoList(),
-                   graph_search=graph_search,
-                   viewer=viewer)
+    if lazy:
+        result = _lazy_depth_first(problem,
+                                   graph_search=graph_search,
+                                   viewer=viewer,
+                                   compact_nodes=compact_nodes,
+                                   budget=budget,
+                                   stats=stats,
+                                   memory=memory)
+    else:
+        result = _search(problem,
+                         IndexedLifoList(),
+                         graph_search=graph_search,
+                         viewer=viewer,
+                         compact_nodes=compact_nodes,
+                         budget=budget,
+                         stats=stats,
+                         executor=executor,
+                         memory=memory)
+    _report_pruning_error(stats, memory)
+    return result
+
+
+def _report_pruning_error(stats, memory):
+    '''
+    Saves on stats the estimated probability that memory (the set of visited
+    states) discarded a new state as visited, if it's approximate (has
+    false_positive_rate, like utils.BloomFilter).
+    '''
+    if stats is not None and hasattr(memory, 'false_positive_rate'):
+        stats['pruning_error'] = memory.false_positive_rate()
 
 
-def limited_depth_first(problem, depth_limit, graph_search=False, viewer=None):
+def limited_depth_first(problem, depth_limit, graph_search=False, viewer=None,
+                        compact_nodes=False, budget=None,
+                        stats=None, lazy=False, executor=None):
     '''
     Limited depth first search.
 
     Depth_limit is the maximum depth allowed, being depth 0 the initial state.
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
+    If lazy=True, the successors of each node are created one at a time,
+    when they are explored (using SearchProblem.successors, if implemented),
+    instead of all of them when the node is expanded. They are explored in
+    the order of the actions (else, the last action is explored first),
+    and with graph_search=True repeated states are discarded when they are
+    reached instead of when they are generated. The executor isn't used in
+    lazy mode.
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.is_goal.
     '''
+    if lazy:
+        return _lazy_depth_first(problem,
+                                 graph_search=graph_search,
+                                 depth_limit=depth_limit,
+                                 viewer=viewer,
+                                 compact_nodes=compact_nodes,
+                                 budget=budget,
+                                 stats=stats)
     return _search(problem,
-                   LifoList(),
+                   IndexedLifoList(),
                    graph_search=graph_search,
                    depth_limit=depth_limit,
-                   viewer=viewer)
+                   viewer=viewer,
+                   compact_nodes=compact_nodes,
+                   budget=budget,
+                   stats=stats,
+                   executor=executor)
 
 
-def iterative_limited_depth_first(problem, graph_search=False, viewer=None):
+def _lazy_depth_first(problem, graph_search=False, depth_limit=None,
+                      viewer=None, compact_nodes=False, budget=None,
+                      stats=None, memory=None):
+    '''
+    Depth first search that creates the successors of a node one at a time,
+    when they are explored. It keeps only the current path, each node with
+    the iterator of its pending successors, so a successor is never created
+    if a goal is found before exploring it.
+    The viewer receives each successor in its own 'expanded' event, and the
+    fringe of 'new_iteration' is the node to explore followed by the nodes
+    of the path.
+    If memory is given, it's used as the set of visited states.
+    '''
+    with problem_timing(stats, problem):
+        if viewer:
+            viewer.event('started')
+
+        node_factory = SearchNode
+        if compact_nodes:
+            node_factory = compact_node_factory(node_factory, problem)
+
+        if memory is None:
+            memory = closed_set(problem)
+        key = state_key(problem)
+        node = node_factory(state=problem.initial_state, problem=problem)
+        # the nodes of the path, with the iterators of their successors
+        path = []
+
+        while node is not None:
+            if viewer:
+                viewer.event('new_iteration',
+                             [node] + [n for n, _ in reversed(path)])
+
+            if problem.is_goal(node.state):
+                if viewer:
+                    viewer.event('chosen_node', node, True)
+                    viewer.event('finished', [n for n, _ in reversed(path)],
+                                 node, 'goal found')
+                return node
+            else:
+                if viewer:
+                    viewer.event('chosen_node', node, False)
+
+            if budget is not None and budget.exceeded(node, len(path)):
+                if viewer:
+                    viewer.event('finished', [n for n, _ in reversed(path)],
+                                 None, 'budget exceeded: %s' % budget.reason)
+                return budget.result()
+
+            if graph_search:
+                memory.add(key(node))
+
+            if depth_limit is None or node.depth < depth_limit:
+                path.append((node, node.iter_expand()))
+                if stats is not None:
+                    stats.expanded += 1
+                    stats.fringe_size(len(path))
+
+            # the next successor of the deepest node that has one left
+            node = None
+            while path and node is None:
+                parent, successors = path[-1]
+                for successor in successors:
+                    if stats is not None:
+                        stats.generated += 1
+                    if viewer:
+                        viewer.event('expanded', [parent], [[successor]])
+                    if graph_search and key(successor) in memory:
+                        if stats is not None:
+                            stats.duplicates += 1
+                        continue
+                    node = successor
+                    break
+                else:
+                    path.pop()
+
+        if viewer:
+            viewer.event('finished', [], None, 'goal not found')
+
+
+def iterative_limited_depth_first(problem, graph_search=False, viewer=None,
+                                  compact_nodes=False, incremental=False,
+                                  stats=None, budget=None, executor=None):
     '''
     Iterative limited depth first search.
 
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If incremental=True, each run will continue from the nodes that were cut
+    off by the depth limit of the previous run, instead of starting again
+    from the initial state, so no node is expanded twice. This keeps all the
+    cut off nodes in memory, and with graph_search=True the memory of visited
+    states is shared by all the runs. It also stops (returning None) when
+    a run doesn't cut off any node.
+    If stats is a dict or a SearchStats, it will be updated with the number
+    of runs ('iterations') and, in incremental mode, an estimate of the
+    node expansions that the non incremental mode would have repeated
+    ('re_expansions_saved': the nodes expanded by the previous runs, which
+    a non incremental run expands again unless it finds the goal before,
+    or with graph_search reaches the states in another order). A
+    SearchStats also gets the statistics of all the runs.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded
+    (counting the nodes expanded by all the runs), returning a
+    BudgetExceeded result.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
     Requires: SearchProblem.actions, SearchProblem.result, and
     SearchProblem.is_goal.
     '''
+    search_stats = stats if isinstance(stats, SearchStats) else None
     solution = None
     limit = 0
+    # shared by all the incremental runs
+    memory = closed_set(problem) if incremental else None
+    cutoff = None
+    expanded_nodes = 0
+    re_expansions_saved = 0
 
     while not solution:
-        solution = limited_depth_first(problem,
-                                       depth_limit=limit,
-                                       graph_search=graph_search,
-                                       viewer=viewer)
+        if incremental:
+            new_cutoff = []
+            solution = _search(problem,
+                               IndexedLifoList(),
+                               graph_search=graph_search,
+                               depth_limit=limit,
+                               viewer=viewer,
+                               compact_nodes=compact_nodes,
+                               initial_nodes=cutoff,
+                               memory=memory,
+                               cutoff=new_cutoff,
+                               budget=budget,
+                               stats=search_stats,
+                               executor=executor)
+            # a non incremental run would have expanded again every node
+            # expanded by the previous runs, and this run expands the nodes
+            # cut off by the previous one
+            re_expansions_saved += expanded_nodes
+            if cutoff:
+                expanded_nodes += len(cutoff)
+            cutoff = new_cutoff[::-1]
+        else:
+            solution = limited_depth_first(problem,
+                                           depth_limit=limit,
+                                           graph_search=graph_search,
+                                           viewer=viewer,
+                                           compact_nodes=compact_nodes,
+                                           budget=budget,
+                                           stats=search_stats,
+                                           executor=executor)
         limit += 1
+        if isinstance(solution, BudgetExceeded):
+            break
+
+        if incremental and not solution and not cutoff:
+            break
+
+    if stats is not None:
+        stats['iterations'] = limit
+        if incremental:
+            stats['re_expansions_saved'] = re_expansions_saved
 
     if viewer:
         viewer.event('no_more_runs', solution, 'returned after %i runs' % limit)
@@ -73,101 +331,1339 @@ def iterative_limited_depth_first(problem, graph_search=False, viewer=None):
     return solution
 
 
-def uniform_cost(problem, graph_search=False, viewer=None):
+def uniform_cost(problem, graph_search=False, viewer=None,
+                 compact_nodes=False, budget=None,
+                 stats=None, executor=None):
     '''
     Uniform cost search.
 
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
     Requires: SearchProblem.actions, SearchProblem.result,
     SearchProblem.is_goal, and SearchProblem.cost.
     '''
     return _search(problem,
-                   BoundedPriorityQueue(),
+                   IndexedPriorityQueue(),
                    graph_search=graph_search,
                    node_factory=SearchNodeCostOrdered,
                    graph_replace_when_better=True,
-                   viewer=viewer)
+                   viewer=viewer,
+                   compact_nodes=compact_nodes,
+                   budget=budget,
+                   stats=stats,
+                   executor=executor)
 
 
-def greedy(problem, graph_search=False, viewer=None):
+def greedy(problem, graph_search=False, viewer=None,
+           compact_nodes=False, budget=None,
+           stats=None, executor=None):
     '''
     Greedy search.
 
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
     Requires: SearchProblem.actions, SearchProblem.result,
     SearchProblem.is_goal, SearchProblem.cost, and SearchProblem.heuristic.
     '''
     return _search(problem,
-                   BoundedPriorityQueue(),
+                   IndexedPriorityQueue(),
                    graph_search=graph_search,
                    node_factory=SearchNodeHeuristicOrdered,
                    graph_replace_when_better=True,
-                   viewer=viewer)
+                   viewer=viewer,
+                   compact_nodes=compact_nodes,
+                   budget=budget,
+                   stats=stats,
+                   executor=executor)
 
 
-def astar(problem, graph_search=False, viewer=None):
+def astar(problem, graph_search=False, viewer=None,
+          compact_nodes=False, budget=None,
+          stats=None, executor=None):
     '''
     A* search.
 
     If graph_search=True, will avoid exploring repeated states.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given (like a concurrent.futures.ThreadPoolExecutor or
+    ProcessPoolExecutor), the successors of each node are created
+    concurrently with it (see SearchNode.expand).
     Requires: SearchProblem.actions, SearchProblem.result,
     SearchProblem.is_goal, SearchProblem.cost, and SearchProblem.heuristic.
     '''
     return _search(problem,
-                   BoundedPriorityQueue(),
+                   IndexedPriorityQueue(),
                    graph_search=graph_search,
                    node_factory=SearchNodeStarOrdered,
                    graph_replace_when_better=True,
-                   viewer=viewer)
+                   viewer=viewer,
+                   compact_nodes=compact_nodes,
+                   budget=budget,
+                   stats=stats,
+                   executor=executor)
 
 
-def _search(problem, fringe, graph_search=False, depth_limit=None,
-            node_factory=SearchNode, graph_replace_when_better=False,
-            viewer=None):
+def ida_star(problem, viewer=None, compact_nodes=False, budget=None,
+             stats=None):
     '''
-    Basic search algorithm, base of all the other search algorithms.
+    Iterative deepening A* search.
+
+    Runs depth first searches limited by f = cost + heuristic, starting with
+    the f of the initial state and raising the limit on each run to the
+    smallest f that exceeded it on the previous run.
+    Uses memory linear on the depth of the solution: only the current path
+    and the pending siblings of its nodes are kept. Repeated states are
+    avoided only along the current path.
+    If compact_nodes=True, will use the memory efficient CompactSearchNode
+    classes for the search tree.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (each run is an iteration).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.is_goal, SearchProblem.cost, and SearchProblem.heuristic.
+    '''
+    node_factory = SearchNodeStarOrdered
+    if compact_nodes:
+        node_factory = compact_node_factory(node_factory, problem)
+
+    with problem_timing(stats, problem):
+        initial_node = node_factory(state=problem.initial_state,
+                                    problem=problem)
+        f_limit = initial_node.cost + initial_node.heuristic
+        solution = None
+        runs = 0
+
+        while f_limit is not None and solution is None:
+            solution, f_limit = _ida_star_run(problem, initial_node, f_limit,
+                                              viewer, budget, stats)
+            runs += 1
+            if stats is not None:
+                stats.iterations += 1
+
+    if viewer:
+        viewer.event('no_more_runs', solution, 'returned after %i runs' % runs)
+
+    return solution
+
+
+def _ida_star_run(problem, initial_node, f_limit, viewer, budget=None,
+                  stats=None):
+    '''
+    Depth first search limited by f, used by ida_star.
+    Returns the solution node (or None, or a BudgetExceeded result), and the
+    f limit for the next run (or None if no node was cut off).
     '''
     if viewer:
         viewer.event('started')
 
-    memory = set()
-    initial_node = node_factory(state=problem.initial_state,
-                                problem=problem)
-    fringe.append(initial_node)
+    next_f_limit = None
+    path = []
+    path_states = set()
+    fringe = [initial_node]
 
     while fringe:
         if viewer:
-            viewer.event('new_iteration', fringe.sorted())
+            viewer.event('new_iteration', fringe[::-1])
 
         node = fringe.pop()
 
+        # back to the parent of the node, forgetting the finished branches
+        while path and path[-1] is not node.parent:
+            path_states.discard(path.pop().state)
+
+        f = node.cost + node.heuristic
+        if f > f_limit:
+            if next_f_limit is None or f < next_f_limit:
+                next_f_limit = f
+            continue
+
         if problem.is_goal(node.state):
             if viewer:
                 viewer.event('chosen_node', node, True)
-                viewer.event('finished', fringe.sorted(), node, 'goal found')
-            return node
+                viewer.event('finished', fringe[::-1], node, 'goal found')
+            return node, None
         else:
             if viewer:
                 viewer.event('chosen_node', node, False)
 
-        memory.add(node.state)
+        if budget is not None and budget.exceeded(node, len(fringe)):
+            if viewer:
+                viewer.event('finished', fringe[::-1], None,
+                             'budget exceeded: %s' % budget.reason)
+            return budget.result(), None
+
+        path.append(node)
+        path_states.add(node.state)
+
+        expanded = node.expand()
+        if viewer:
+            viewer.event('expanded', [node], [expanded])
+
+        # reversed, so the first successor is the first one to be explored
+        new_nodes = [n for n in reversed(expanded)
+                     if n.state not in path_states]
+        fringe.extend(new_nodes)
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(expanded)
+            stats.duplicates += len(expanded) - len(new_nodes)
+            stats.fringe_size(len(fringe))
+
+    if viewer:
+        viewer.event('finished', [], None, 'goal not found')
+
+    return None, next_f_limit
+
+
+def sma_star(problem, max_nodes=10000, viewer=None, budget=None,
+             stats=None):
+    '''
+    Simplified memory-bounded A* search (SMA*).
+
+    Works like A*, but keeps at most max_nodes nodes in memory. When the
+    memory is full, it forgets the worst leaf (highest f, shallowest), and
+    remembers its f value on its parent, so that branch is generated again
+    only if it becomes the most promising one.
+    Finds the best solution reachable with the available memory (a solution
+    is reachable if its depth is lower than max_nodes).
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result (the fringe size is the number of
+    nodes in memory).
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (the fringe size is the number of nodes in memory).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.is_goal, SearchProblem.cost, and SearchProblem.heuristic.
+    '''
+    if max_nodes < 2:
+        raise ValueError('max_nodes must be at least 2')
+
+    with problem_timing(stats, problem):
+        return _sma_star(problem, max_nodes, viewer, budget, stats)
+
+
+def _sma_star(problem, max_nodes, viewer, budget, stats):
+    '''
+    Search loop of sma_star.
+    '''
+
+    if viewer:
+        viewer.event('started')
+
+    memory = _SMAStarMemory(max_nodes)
+    memory.add(_SMAStarNode(state=problem.initial_state, problem=problem))
+
+    while True:
+        node = memory.best()
+        if node is None:
+            break
+
+        if viewer:
+            viewer.event('new_iteration', memory.fringe())
+
+        if problem.is_goal(node.state):
+            if viewer:
+                viewer.event('chosen_node', node, True)
+                viewer.event('finished', memory.fringe(), node, 'goal found')
+            return node
+        else:
+            if viewer:
+                viewer.event('chosen_node', node, False)
 
-        if depth_limit is None or node.depth < depth_limit:
-            expanded = node.expand()
+        if budget is not None and budget.exceeded(node, memory.size):
             if viewer:
-                viewer.event('expanded', [node], [expanded])
+                viewer.event('finished', memory.fringe(), None,
+                             'budget exceeded: %s' % budget.reason)
+            return budget.result()
 
-            for n in expanded:
-                if graph_search:
-                    others = [x for x in fringe if x.state == n.state]
-                    assert len(others) in (0, 1)
-                    if n.state not in memory and len(others) == 0:
-                        fringe.append(n)
-                    elif graph_replace_when_better and len(others) > 0 and n < others[0]:
-                        fringe.remove(others[0])
+        successors = node.generate_successors()
+        if viewer:
+            viewer.event('expanded', [node], [successors])
+
+        for successor in successors:
+            if successor.depth >= max_nodes - 1 and \
+               not problem.is_goal(successor.state):
+                # there's no memory to go deeper from it
+                successor.f = float('inf')
+            if successor.f == float('inf') or not memory.add(successor):
+                node.forget(successor)
+
+        memory.update(node)
+        memory.back_up(node)
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(successors)
+            stats.fringe_size(memory.size)
+
+    if viewer:
+        viewer.event('finished', memory.fringe(), None, 'goal not found')
+
+
+class _SMAStarNode(SearchNodeStarOrdered):
+    '''
+    Node of sma_star. Knows the successors it has in memory, and the f values
+    of the forgotten ones.
+    '''
+    def __init__(self, *args, **kwargs):
+        self.action_index = kwargs.pop('action_index', None)
+        super(_SMAStarNode, self).__init__(*args, **kwargs)
+        self.f = self.cost + self.heuristic
+        self.actions = None
+        self.successors = {}
+        self.forgotten = {}
+        self.open_entry = None
+        self.leaf_entry = None
+
+    @property
+    def expanded(self):
+        return self.actions is not None
+
+    def is_leaf(self):
+        return not self.successors
+
+    def open_f(self):
+        '''f for choosing this node to generate successors, or None.'''
+        if not self.expanded:
+            f = self.f
+        elif self.forgotten:
+            f = min(self.forgotten.values())
+        else:
+            return None
+        return f if f != float('inf') else None
+
+    def generate_successors(self):
+        '''
+        Generates all the successors the first time, and afterwards the
+        forgotten ones with the best f.
+        '''
+        if not self.expanded:
+            self.actions = list(self.problem.actions(self.state))
+            forgotten_f = dict.fromkeys(range(len(self.actions)), self.f)
+        else:
+            best_f = min(self.forgotten.values())
+            forgotten_f = dict((index, f)
+                               for index, f in self.forgotten.items()
+                               if f == best_f)
+            for index in forgotten_f:
+                del self.forgotten[index]
+
+        ancestors = set()
+        node = self
+        while node is not None:
+            ancestors.add(node.state)
+            node = node.parent
+
+        successors = []
+        for index, old_f in sorted(forgotten_f.items()):
+            action = self.actions[index]
+            state = self.problem.result(self.state, action)
+            successor = _SMAStarNode(
+                state=state,
+                parent=self,
+                action=action,
+                cost=self.cost + self.problem.cost(self.state, action, state),
+                problem=self.problem,
+                depth=self.depth + 1,
+                action_index=index)
+            if state in ancestors:
+                successor.f = float('inf')
+            else:
+                successor.f = max(successor.f, old_f)
+            successors.append(successor)
+        return successors
+
+    def forget(self, successor):
+        self.successors.pop(successor.action_index, None)
+        self.forgotten[successor.action_index] = successor.f
+
+
+class _SMAStarMemory(object):
+    '''
+    Nodes in memory of sma_star. Has a heap to find the best node to generate
+    successors from (lowest f, deepest), and other to find the worst leaf to
+    forget (highest f, shallowest). Entries of nodes that changed are left
+    on the heaps, and ignored.
+    '''
+    def __init__(self, max_nodes):
+        self.max_nodes = max_nodes
+        self.size = 0
+        self.open = []
+        self.leaves = []
+        self.entries = 0
+
+    def _new_entry(self):
+        self.entries += 1
+        return self.entries
+
+    def update(self, node):
+        '''Updates the heap entries of a node after changes on it.'''
+        f = node.open_f()
+        if f is None:
+            node.open_entry = None
+        else:
+            node.open_entry = self._new_entry()
+            heapq.heappush(self.open, (f, -node.depth, node.open_entry, node))
+
+        if node.is_leaf() and node.parent is not None:
+            node.leaf_entry = self._new_entry()
+            heapq.heappush(self.leaves,
+                           (-node.f, node.depth, node.leaf_entry, node))
+        else:
+            node.leaf_entry = None
+
+    def best(self):
+        '''Returns the best node to generate successors from, or None.'''
+        while self.open and self.open[0][3].open_entry != self.open[0][2]:
+            heapq.heappop(self.open)
+        return self.open[0][3] if self.open else None
+
+    def fringe(self):
+        return [node for _, _, entry, node in sorted(self.open)
+                if node.open_entry == entry]
+
+    def _forget_worst_leaf(self, new_node):
+        '''
+        Forgets the worst leaf to make space for `new_node`, unless it's not
+        better than the new node. Returns False if no leaf was forgotten.
+        '''
+        while self.leaves:
+            minus_f, depth, entry, node = self.leaves[0]
+            if node.leaf_entry != entry or node is new_node.parent:
+                heapq.heappop(self.leaves)
+                continue
+            if (-new_node.f, new_node.depth) <= (minus_f, depth):
+                return False
+            heapq.heappop(self.leaves)
+            node.open_entry = node.leaf_entry = None
+            parent = node.parent
+            parent.forget(node)
+            self.size -= 1
+            self.update(parent)
+            return True
+        return False
+
+    def add(self, node):
+        '''
+        Adds a node to memory, forgetting the worst leaves if needed.
+        Returns False if there's no space for it (no leaf is worse than it).
+        '''
+        while self.size >= self.max_nodes:
+            if not self._forget_worst_leaf(node):
+                return False
+        if node.parent is not None:
+            node.parent.successors[node.action_index] = node
+        self.size += 1
+        self.update(node)
+        return True
+
+    def back_up(self, node):
+        '''
+        Updates the f of a node to the best f of its successors (forgotten
+        or not), and the same for its ancestors.
+        '''
+        while node is not None and node.expanded:
+            values = [s.f for s in node.successors.values()]
+            values.extend(node.forgotten.values())
+            f = min(values) if values else float('inf')
+            if f == node.f:
+                break
+            node.f = f
+            self.update(node)
+            node = node.parent
+
+
+def ara_star(problem, weight=3, weight_step=0.5, time_limit=None,
+             viewer=None, budget=None, stats=None):
+    '''
+    Anytime repairing A* search (ARA*).
+
+    It's a generator of solutions, each one cheaper than the previous one.
+    Starts with a weighted A* search (f = cost + weight * heuristic), that
+    finds a solution quickly, and then keeps lowering the weight by
+    weight_step after each run, until it's 1 (a normal A* search, that
+    finds the best solution if the heuristic is admissible).
+    Each run reuses the work of the previous ones: only the states reached
+    by a cheaper path after being expanded are expanded again (on the next
+    run, or right away on the last one).
+    If time_limit is specified (in seconds), the search stops when that time
+    is over.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    and the last value generated is a BudgetExceeded result, with the best
+    solution found (or, if none was found, the node closest to the goal).
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (each run is an iteration). The methods of the problem are
+    timed only while a run is searching, not between the solutions.
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.is_goal, SearchProblem.cost, and SearchProblem.heuristic.
+    '''
+    deadline = None
+    if time_limit is not None:
+        deadline = time.time() + time_limit
+
+    initial_node = _WeightedNode(state=problem.initial_state, problem=problem)
+    best_nodes = {initial_node.state: initial_node}
+    fringe_nodes = [initial_node]
+    solution = None
+    if problem.is_goal(initial_node.state):
+        solution = initial_node
+    last_solution = None
+    runs = 0
+    timed_out = False
+    budget_exceeded = False
+
+    while True:
+        if viewer:
+            viewer.event('started')
+
+        # the fringe is rebuilt on each run, because priorities depend on the
+        # weight
+        for node in fringe_nodes:
+            node.priority = node.cost + weight * node.heuristic
+        fringe = IndexedPriorityQueue()
+        fringe.extend(fringe_nodes)
+        closed = closed_set(problem)
+        inconsistent = {}
+        runs += 1
+        if stats is not None:
+            stats.iterations += 1
+            stats.fringe_size(len(fringe))
+
+        with problem_timing(stats, problem):
+            while fringe and (solution is None or
+                              solution.cost > fringe[0].priority):
+                if deadline is not None and time.time() > deadline:
+                    timed_out = True
+                    break
+
+                if viewer:
+                    viewer.event('new_iteration', fringe.sorted())
+
+                if budget is not None and \
+                   budget.exceeded(fringe[0], len(fringe)):
+                    timed_out = budget_exceeded = True
+                    break
+
+                node = fringe.pop()
+                closed.add(node.state)
+                if viewer:
+                    viewer.event('chosen_node', node, node is solution)
+
+                expanded = node.expand()
+                if viewer:
+                    viewer.event('expanded', [node], [expanded])
+                if stats is not None:
+                    stats.expanded += 1
+                    stats.generated += len(expanded)
+
+                for n in expanded:
+                    old = best_nodes.get(n.state)
+                    if old is not None and old.cost <= n.cost:
+                        if stats is not None:
+                            stats.duplicates += 1
+                        continue
+                    best_nodes[n.state] = n
+                    n.priority = n.cost + weight * n.heuristic
+                    if problem.is_goal(n.state) and \
+                       (solution is None or n.cost < solution.cost):
+                        solution = n
+                    if n.state in closed:
+                        if stats is not None:
+                            stats.reopened += 1
+                        if weight > 1:
+                            inconsistent[n.state] = n
+                        else:
+                            # on the last run it's opened right away, so the
+                            # solution is the best one even if the heuristic
+                            # isn't consistent
+                            fringe.append(n)
+                    elif old is not None and fringe.find(n.state) is old:
+                        fringe.replace(old, n)
+                        if stats is not None:
+                            stats.fringe_replacements += 1
+                    else:
                         fringe.append(n)
+                if stats is not None:
+                    stats.fringe_size(len(fringe))
+
+        if viewer:
+            if budget_exceeded:
+                reason = 'budget exceeded: %s' % budget.reason
+            else:
+                reason = 'goal found' if solution else 'goal not found'
+            viewer.event('finished', fringe.sorted(), solution, reason)
+
+        if solution is not None and solution is not last_solution:
+            last_solution = solution
+            yield solution
+
+        if budget_exceeded:
+            result = budget.result()
+            if solution is not None:
+                result.best = solution
+            yield result
+
+        fringe_nodes = list(fringe) + list(inconsistent.values())
+        if timed_out or weight <= 1 or not fringe_nodes:
+            break
+        weight = max(1, weight - weight_step)
+
+    if viewer:
+        viewer.event('no_more_runs', solution, 'returned after %i runs' % runs)
+
+
+class _WeightedNode(SearchNodeHeuristicOrdered):
+    '''Node ordered by a priority calculated by the search algorithm.'''
+    def __init__(self, *args, **kwargs):
+        super(_WeightedNode, self).__init__(*args, **kwargs)
+        self.priority = self.cost
+
+    def __lt__(self, other):
+        return self.priority < other.priority
+
+
+class LPAStar(object):
+    '''
+    Lifelong planning A* (LPA*), an incremental version of A* for problems
+    where the costs of the actions change between searches.
+
+    Keeps the cost of the best known path to each state (g) and its one step
+    lookahead (rhs) between searches. After reporting the changed edges with
+    update_edges, search only repairs the states affected by the change,
+    instead of searching again from scratch.
+    SearchProblem.actions, SearchProblem.cost and SearchProblem.predecessors
+    must always reflect the current costs.
+    Finds the solution with the lowest cost if the heuristic is admissible
+    and consistent.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    each search (each one is an iteration, and the states expanded again
+    are counted as reopened).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.cost, SearchProblem.heuristic, SearchProblem.predecessors,
+    and SearchProblem.goal_states.
+    '''
+    def __init__(self, problem, viewer=None, stats=None):
+        self.problem = problem
+        self.viewer = viewer
+        self.stats = stats
+        self.goals = list(problem.goal_states())
+        self.g = {}
+        self.rhs = {problem.initial_state: 0}
+        self.fringe = IndexedPriorityQueue()
+        self.fringe.append(self._node(problem.initial_state))
+
+    def _g(self, state):
+        return self.g.get(state, float('inf'))
+
+    def _rhs(self, state):
+        return self.rhs.get(state, float('inf'))
+
+    def _key(self, state):
+        best = min(self._g(state), self._rhs(state))
+        return (best + self.problem.heuristic(state), best)
+
+    def _node(self, state):
+        node = _LPAStarNode(state=state, problem=self.problem)
+        node.key = self._key(state)
+        return node
+
+    def _queue(self, state):
+        '''Puts state on the fringe if it's inconsistent, with its new key.'''
+        old = self.fringe.find(state)
+        if old is not None:
+            self.fringe.remove(old)
+        if self._g(state) != self._rhs(state):
+            self.fringe.append(self._node(state))
+
+    def _update_state(self, state):
+        '''Recalculates the rhs of state from all its predecessors.'''
+        if state != self.problem.initial_state:
+            self.rhs[state] = min(
+                [self._g(previous) + self.problem.cost(previous, action, state)
+                 for action, previous in self.problem.predecessors(state)] or
+                [float('inf')])
+        self._queue(state)
+
+    def _best_goal(self):
+        return min(self.goals, key=self._key)
+
+    def update_edges(self, edges):
+        '''
+        Reports the edges whose cost changed since the last search (or that
+        were added or removed), as (state, new_state) pairs.
+        '''
+        for _, new_state in edges:
+            self._update_state(new_state)
+
+    def search(self):
+        '''
+        Finds the best solution with the current costs, repairing the
+        previous search. Returns the solution node, or None if the goals
+        can't be reached.
+        '''
+        problem = self.problem
+        viewer = self.viewer
+        stats = self.stats
+        if viewer:
+            viewer.event('started')
+        if stats is not None:
+            stats.iterations += 1
+            stats.fringe_size(len(self.fringe))
+
+        with problem_timing(stats, problem):
+            goal = self._best_goal()
+            while self.fringe and (self.fringe[0].key < self._key(goal) or
+                                   self._g(goal) != self._rhs(goal)):
+                if viewer:
+                    viewer.event('new_iteration', self.fringe.sorted())
+
+                node = self.fringe.pop()
+                state = node.state
+                if viewer:
+                    viewer.event('chosen_node', node, state in self.goals)
+
+                successors = [(action, problem.result(state, action))
+                              for action in problem.actions(state)]
+                if stats is not None:
+                    stats.expanded += 1
+                    stats.generated += len(successors)
+                    if state in self.g:
+                        # expanded before, in this search or a previous one
+                        stats.reopened += 1
+                if self._g(state) > self._rhs(state):
+                    # found a better path to the state, that can only make
+                    # the paths to its successors better
+                    self.g[state] = self.rhs[state]
+                    for action, successor in successors:
+                        cost = self.g[state] + problem.cost(state, action,
+                                                            successor)
+                        if successor != problem.initial_state and \
+                           cost < self._rhs(successor):
+                            self.rhs[successor] = cost
+                            self._queue(successor)
                 else:
-                    fringe.append(n)
+                    # the path to the state got worse, so it and its
+                    # successors must look for their best paths again
+                    self.g[state] = float('inf')
+                    for _, successor in successors:
+                        self._update_state(successor)
+                    self._update_state(state)
+                goal = self._best_goal()
+                if stats is not None:
+                    stats.fringe_size(len(self.fringe))
+
+        solution = None
+        if self._g(goal) < float('inf'):
+            solution = self._path_to(goal)
+
+        if viewer:
+            viewer.event('finished', self.fringe.sorted(), solution,
+                         'goal found' if solution else 'goal not found')
+        return solution
+
+    def _path_to(self, goal):
+        '''Rebuilds the best path from the initial state to goal.'''
+        problem = self.problem
+        steps = []
+        state = goal
+        while state != problem.initial_state:
+            action, previous = min(
+                problem.predecessors(state),
+                key=lambda step: self._g(step[1]) + problem.cost(
+                    step[1], step[0], state))
+            steps.append((action, state))
+            state = previous
+
+        node = SearchNode(state=problem.initial_state, problem=problem)
+        for action, state in reversed(steps):
+            node = SearchNode(state=state,
+                              parent=node,
+                              action=action,
+                              cost=node.cost + problem.cost(node.state, action,
+                                                            state),
+                              problem=problem,
+                              depth=node.depth + 1)
+        return node
+
+
+class _LPAStarNode(SearchNode):
+    '''Node of the LPAStar fringe, ordered by the key of its state.'''
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+def bidirectional_breadth_first(problem, viewer=None, budget=None,
+                                stats=None):
+    '''
+    Bidirectional breadth first search.
+
+    Searches forward from the initial state and backwards from the goal
+    states at the same time, until both searches meet. Finds the solution
+    with less actions.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (of both directions).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.predecessors, and SearchProblem.goal_states.
+    '''
+    return _bidirectional_search(problem,
+                                 use_costs=False,
+                                 viewer=viewer,
+                                 budget=budget,
+                                 stats=stats)
+
+
+def bidirectional_uniform_cost(problem, viewer=None, budget=None,
+                               stats=None):
+    '''
+    Bidirectional uniform cost search.
+
+    Searches forward from the initial state and backwards from the goal
+    states at the same time, until both searches meet. Finds the solution
+    with the lowest cost.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (of both directions).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.predecessors, SearchProblem.goal_states, and
+    SearchProblem.cost.
+    '''
+    return _bidirectional_search(problem,
+                                 viewer=viewer,
+                                 budget=budget,
+                                 stats=stats)
+
+
+def bidirectional_astar(problem, viewer=None, budget=None, stats=None):
+    '''
+    Bidirectional (front-to-end) A* search.
+
+    Searches forward from the initial state guided by SearchProblem.heuristic,
+    and backwards from the goal states guided by
+    SearchProblem.backward_heuristic, until both searches meet.
+    Finds the solution with the lowest cost if both heuristics are
+    admissible.
+    If budget (a SearchBudget) is given, the search stops when it's exceeded,
+    returning a BudgetExceeded result.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search (of both directions).
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.predecessors, SearchProblem.goal_states,
+    SearchProblem.cost, SearchProblem.heuristic and
+    SearchProblem.backward_heuristic.
+    '''
+    return _bidirectional_search(problem,
+                                 use_heuristics=True,
+                                 viewer=viewer,
+                                 budget=budget,
+                                 stats=stats)
+
+
+class _BidirectionalFringe(object):
+    '''
+    Fringe for one of the directions of a bidirectional search. Keeps the
+    best node found for each state (expanded or not), and skips the nodes that
+    were replaced by better ones when popping.
+    '''
+    def __init__(self, priority):
+        self.priority = priority
+        self.heap = []
+        self.best = {}
+        self.pushed = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def append(self, node):
+        self.best[node.state] = node
+        self.pushed += 1
+        heapq.heappush(self.heap, (self.priority(node), self.pushed, node))
+
+    def top_priority(self):
+        '''Returns the priority of the next node, or None if empty.'''
+        heap = self.heap
+        while heap and self.best[heap[0][2].state] is not heap[0][2]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop(self):
+        self.top_priority()
+        return heapq.heappop(self.heap)[2]
+
+    def sorted(self):
+        return [node for _, _, node in sorted(self.heap)
+                if self.best[node.state] is node]
+
+
+def _backward_expand(problem, node):
+    '''
+    Creates the predecessors of a node of a backward search. Their parent is
+    the node closer to the goal, and their action is the one that takes them
+    to it.
+    '''
+    return [SearchNode(state=previous_state,
+                       parent=node,
+                       action=action,
+                       cost=node.cost + problem.cost(previous_state, action,
+                                                     node.state),
+                       problem=problem,
+                       depth=node.depth + 1)
+            for action, previous_state in problem.predecessors(node.state)]
+
+
+def _join_paths(problem, forward_node, backward_node):
+    '''
+    Continues the path of `forward_node` with the path of `backward_node`
+    (that has the same state) up to the goal.
+    '''
+    node = forward_node
+    while backward_node.parent is not None:
+        next_node = backward_node.parent
+        node = SearchNode(state=next_node.state,
+                          parent=node,
+                          action=backward_node.action,
+                          cost=node.cost + backward_node.cost - next_node.cost,
+                          problem=problem,
+                          depth=node.depth + 1)
+        backward_node = next_node
+    return node
+
+
+def _bidirectional_search(problem, use_costs=True, use_heuristics=False,
+                          viewer=None, budget=None, stats=None):
+    '''
+    Basic bidirectional search algorithm, base of the other bidirectional
+    search algorithms.
+    Expands the smaller fringe each time, and stops when no path cheaper than
+    the best one found can go through the nodes left in the fringes.
+    If stats is given, it's updated with the statistics of the search.
+    '''
+    with problem_timing(stats, problem):
+        if viewer:
+            viewer.event('started')
+
+        if use_costs:
+            distance = lambda node: node.cost
+        else:
+            distance = lambda node: node.depth
+
+        if use_heuristics:
+            forward = _BidirectionalFringe(
+                lambda node: node.cost + problem.heuristic(node.state))
+            backward = _BidirectionalFringe(
+                lambda node: node.cost +
+                problem.backward_heuristic(node.state))
+        else:
+            forward = _BidirectionalFringe(distance)
+            backward = _BidirectionalFringe(distance)
+
+        forward.append(SearchNode(state=problem.initial_state,
+                                  problem=problem))
+        for state in problem.goal_states():
+            backward.append(SearchNode(state=state, problem=problem))
+
+        best_distance = None
+        meeting = None
+        initial_match = backward.best.get(problem.initial_state)
+        if initial_match is not None:
+            best_distance = 0
+            meeting = forward.best[problem.initial_state], initial_match
+
+        while True:
+            forward_priority = forward.top_priority()
+            backward_priority = backward.top_priority()
+            if forward_priority is None or backward_priority is None:
+                break
+            if best_distance is not None:
+                if use_heuristics:
+                    bound = max(forward_priority, backward_priority)
+                else:
+                    bound = forward_priority + backward_priority
+                if bound >= best_distance:
+                    break
+
+            if viewer:
+                viewer.event('new_iteration',
+                             forward.sorted() + backward.sorted())
 
+            if len(forward) <= len(backward):
+                fringe, other = forward, backward
+                expanded = lambda node: node.expand()
+            else:
+                fringe, other = backward, forward
+                expanded = lambda node: _backward_expand(problem, node)
+
+            node = fringe.pop()
+            if budget is not None and budget.exceeded(
+                    node, len(forward) + len(backward)):
+                if viewer:
+                    viewer.event('finished',
+                                 forward.sorted() + backward.sorted(), None,
+                                 'budget exceeded: %s' % budget.reason)
+                return budget.result()
+
+            if viewer:
+                viewer.event('chosen_node', node, False)
+
+            successors = expanded(node)
+            if viewer:
+                viewer.event('expanded', [node], [successors])
+
+            if stats is not None:
+                stats.expanded += 1
+                stats.generated += len(successors)
+
+            for n in successors:
+                old = fringe.best.get(n.state)
+                if old is not None and distance(old) <= distance(n):
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                fringe.append(n)
+
+                match = other.best.get(n.state)
+                if match is not None:
+                    new_distance = distance(n) + distance(match)
+                    if best_distance is None or new_distance < best_distance:
+                        best_distance = new_distance
+                        meeting = ((n, match) if fringe is forward
+                                   else (match, n))
+            if stats is not None:
+                stats.fringe_size(len(forward) + len(backward))
+
+        solution = None
+        if meeting is not None:
+            solution = _join_paths(problem, *meeting)
+
+        if viewer:
+            if solution is not None:
+                viewer.event('chosen_node', solution, True)
+            viewer.event('finished', forward.sorted() + backward.sorted(),
+                         solution,
+                         'goal found' if solution else 'goal not found')
+
+        return solution
+
+
+def external_breadth_first(problem, buffer_size=100000, temp_dir=None,
+                           viewer=None, budget=None):
+    '''
+    External memory (disk based) breadth first graph search.
+
+    Keeps each layer of the search (the states at the same depth) in a
+    temporary file, sorted by encoded state, instead of keeping the fringe
+    and the visited states in memory. The successors of a layer are sorted
+    in runs of at most buffer_size states, and then the runs are merged
+    removing the repeated states and the states of the previous layers.
+    Only buffer_size states (plus one state per run and layer being merged)
+    are in memory at the same time.
+    The encoded states must be sortable, and the encoded states and the
+    actions must be picklable. The temporary files are created in temp_dir
+    (or the default temporary directory), and removed at the end.
+    Finds a solution with the same depth as
+    breadth_first(problem, graph_search=True), but if there are many, it
+    may be a different one.
+    If budget (a SearchBudget) is given, it's checked before expanding each
+    state (the fringe size being the number of states buffered in memory),
+    and the search stops returning a BudgetExceeded result (without best
+    node) when it's exceeded.
+    Requires: SearchProblem.actions, SearchProblem.result,
+    SearchProblem.is_goal, SearchProblem.encode_state and
+    SearchProblem.decode_state.
+    '''
     if viewer:
-        viewer.event('finished', fringe.sorted(), None, 'goal not found')
+        viewer.event('started')
+
+    directory = tempfile.mkdtemp(prefix='simpleai_', dir=temp_dir)
+    try:
+        solution = None
+        if problem.is_goal(problem.initial_state):
+            solution = SearchNode(state=problem.initial_state,
+                                  problem=problem)
+        else:
+            layers = [os.path.join(directory, 'layer_0')]
+            _write_records(layers[0], [(problem.encode_state(
+                problem.initial_state), None, None)])
+
+            while solution is None:
+                runs = _expand_layer(problem, layers[-1], directory,
+                                     buffer_size, budget)
+                if budget is not None and budget.reason is not None:
+                    if viewer:
+                        viewer.event('finished', [], None,
+                                     'budget exceeded: %s' % budget.reason)
+                    return budget.result()
+                layer = os.path.join(directory, 'layer_%i' % len(layers))
+                records = _merge_runs(runs, layers)
+                try:
+                    goal = _write_records(layer, records, problem)
+                finally:
+                    # closes the files being merged, before removing them
+                    records.close()
+                for run in runs:
+                    os.remove(run)
+                layers.append(layer)
+
+                if goal is not None:
+                    solution = _external_path(problem, layers, goal)
+                elif not os.path.getsize(layer):
+                    break
+    finally:
+        shutil.rmtree(directory)
+
+    if viewer:
+        viewer.event('finished', [], solution,
+                     'goal found' if solution else 'goal not found')
+    return solution
+
+
+def _write_records(path, records, problem=None):
+    '''
+    Writes the (encoded state, encoded parent, action) records to a file.
+    If problem is given, stops after writing the first record of a goal
+    state, and returns it.
+    '''
+    with open(path, 'wb') as layer_file:
+        for record in records:
+            pickle.dump(record, layer_file, pickle.HIGHEST_PROTOCOL)
+            if problem is not None and \
+               problem.is_goal(problem.decode_state(record[0])):
+                return record
+
+
+def _read_records(path):
+    with open(path, 'rb') as layer_file:
+        while True:
+            try:
+                yield pickle.load(layer_file)
+            except EOFError:
+                return
+
+
+def _expand_layer(problem, layer, directory, buffer_size, budget=None):
+    '''
+    Writes the successors of the states of a layer to sorted runs, and
+    returns their paths. Stops if budget is exceeded (leaving the reason in
+    budget.reason).
+    '''
+    runs = []
+    buffer = {}
+
+    def write_run():
+        path = os.path.join(directory, 'run_%i' % len(runs))
+        _write_records(path, (buffer[encoded] for encoded in sorted(buffer)))
+        runs.append(path)
+        buffer.clear()
+
+    records = _read_records(layer)
+    try:
+        for encoded, _, _ in records:
+            if budget is not None and budget.exceeded(None, len(buffer)):
+                return runs
+            state = problem.decode_state(encoded)
+            for action in problem.actions(state):
+                new_encoded = problem.encode_state(problem.result(state,
+                                                                  action))
+                if new_encoded not in buffer:
+                    buffer[new_encoded] = (new_encoded, encoded, action)
+                    if len(buffer) >= buffer_size:
+                        write_run()
+    finally:
+        records.close()
+    if buffer:
+        write_run()
+    return runs
+
+
+def _merge_runs(runs, layers):
+    '''
+    Merges the sorted runs, skipping the repeated states and the states that
+    are already in the (sorted) layers.
+    '''
+    previous = [_read_records(layer) for layer in layers]
+    merged = [_read_records(run) for run in runs]
+    try:
+        heads = [next(records, None) for records in previous]
+        last = None
+        for record in _merge(*merged):
+            encoded = record[0]
+            if encoded == last:
+                continue
+            last = encoded
+            repeated = False
+            for i, records in enumerate(previous):
+                while heads[i] is not None and heads[i][0] < encoded:
+                    heads[i] = next(records, None)
+                if heads[i] is not None and heads[i][0] == encoded:
+                    repeated = True
+            if not repeated:
+                yield record
+    finally:
+        # also when the merge is closed before the end (a goal was found)
+        for records in previous + merged:
+            records.close()
+
+
+def _merge(*iterables):
+    '''heapq.merge of records, comparing only the encoded states.'''
+    heap = []
+    for i, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        for record in iterator:
+            heap.append((record[0], i, record, iterator))
+            break
+    heapq.heapify(heap)
+    while heap:
+        _, i, record, iterator = heap[0]
+        yield record
+        for record in iterator:
+            heapq.heapreplace(heap, (record[0], i, record, iterator))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+def _external_path(problem, layers, goal):
+    '''
+    Builds the nodes of the path to the goal record, finding the parent of
+    each record in the previous layer.
+    '''
+    steps = []
+    record = goal
+    for layer in reversed(layers[:-1]):
+        steps.append((record[2], problem.decode_state(record[0])))
+        parent = record[1]
+        records = _read_records(layer)
+        for record in records:
+            if record[0] == parent:
+                break
+        records.close()
+
+    node = SearchNode(state=problem.initial_state, problem=problem)
+    for action, state in reversed(steps):
+        node = SearchNode(state=state,
+                          parent=node,
+                          action=action,
+                          cost=node.cost + problem.cost(node.state, action,
+                                                        state),
+                          depth=node.depth + 1)
+    return node
+
+
+def _search(problem, fringe, graph_search=False, depth_limit=None,
+            node_factory=SearchNode, graph_replace_when_better=False,
+            viewer=None, compact_nodes=False, initial_nodes=None,
+            memory=None, cutoff=None, budget=None, stats=None, executor=None):
+    '''
+    Basic search algorithm, base of all the other search algorithms.
+
+    The fringe must be indexed by state (see utils.StateIndexMixin), so
+    graph search can find repeated states in the fringe without scanning it.
+    If initial_nodes is given, the search starts from those nodes instead of
+    the initial state, and if memory is given, it's used (and updated) as the
+    set of visited states (by default, models.closed_set, which stores the
+    states encoded if the problem implements SearchProblem.encode_state).
+    If cutoff is a list, the nodes not expanded because of the depth limit
+    are appended to it.
+    If budget is given, returns budget.result() when it's exceeded.
+    If stats (a SearchStats) is given, it's updated with the statistics of
+    the search.
+    If executor is given, it's used to expand the nodes (see
+    SearchNode.expand).
+    If the problem implements SearchProblem.update_state_hash, the memory and
+    the fringe index are keyed by the hashes of the states (see
+    models.state_key).
+    '''
+    with problem_timing(stats, problem):
+        if viewer:
+            viewer.event('started')
+
+        if compact_nodes:
+            node_factory = compact_node_factory(node_factory, problem)
+
+        if memory is None:
+            memory = closed_set(problem)
+        key = state_key(problem)
+        if implements_state_hash(problem):
+            fringe.key = key
+        if initial_nodes is None:
+            initial_nodes = [node_factory(state=problem.initial_state,
+                                          problem=problem)]
+        fringe.extend(initial_nodes)
+        if stats is not None:
+            stats.fringe_size(len(fringe))
+
+        while fringe:
+            if viewer:
+                viewer.event('new_iteration', fringe.sorted())
+
+            node = fringe.pop()
+
+            if problem.is_goal(node.state):
+                if viewer:
+                    viewer.event('chosen_node', node, True)
+                    viewer.event('finished', fringe.sorted(), node, 'goal found')
+                return node
+            else:
+                if viewer:
+                    viewer.event('chosen_node', node, False)
+
+            if budget is not None and budget.exceeded(node, len(fringe)):
+                if viewer:
+                    viewer.event('finished', fringe.sorted(), None,
+                                 'budget exceeded: %s' % budget.reason)
+                return budget.result()
+
+            memory.add(key(node))
+
+            if depth_limit is None or node.depth < depth_limit:
+                expanded = node.expand(executor=executor)
+                if viewer:
+                    viewer.event('expanded', [node], [expanded])
+                if stats is not None:
+                    stats.expanded += 1
+                    stats.generated += len(expanded)
+
+                for n in expanded:
+                    if graph_search:
+                        n_key = key(n)
+                        other = fringe.find(n_key)
+                        if n_key not in memory and other is None:
+                            fringe.append(n)
+                        elif graph_replace_when_better and other is not None and n < other:
+                            fringe.replace(other, n)
+                            if stats is not None:
+                                stats.fringe_replacements += 1
+                        elif stats is not None:
+                            stats.duplicates += 1
+                    else:
+                        fringe.append(n)
+                if stats is not None:
+                    stats.fringe_size(len(fringe))
+            elif cutoff is not None:
+                cutoff.append(node)
+
+        if viewer:
+            viewer.event('finished', fringe.sorted(), None, 'goal not found')
\ No newline at end of file
@@ -1,6 +1,8 @@
 # coding=utf-8
 import heapq
-from collections import deque
+import math
+from collections import deque, OrderedDict
+from operator import attrgetter
 import random
 try:
     from itertools import izip
@@ -24,7 +26,18 @@ class FifoList(deque):
         return list(self)
 
 
+def _is_min_level(i):
+    return (i + 1).bit_length() % 2 == 1
+
+
 class BoundedPriorityQueue(object):
+    '''
+    Priority queue that keeps at most `limit` elements (if specified),
+    discarding the worst ones.
+    It's implemented as a min-max heap, so appending, popping the best element
+    and discarding the worst one are all O(log n). The best element is
+    always at position 0.
+    '''
     def __init__(self, limit=None, *args):
         self.limit = limit
         self.queue = list()
@@ -35,30 +48,461 @@ class BoundedPriorityQueue(object):
     def __len__(self):
         return len(self.queue)
 
+    def _swap(self, i, j):
+        queue = self.queue
+        queue[i], queue[j] = queue[j], queue[i]
+
+    def _bubble_up(self, i):
+        queue = self.queue
+        if i == 0:
+            return
+        parent = (i - 1) // 2
+        if _is_min_level(i):
+            if queue[parent] < queue[i]:
+                self._swap(i, parent)
+                self._bubble_up_grandparents(parent, is_min=False)
+            else:
+                self._bubble_up_grandparents(i, is_min=True)
+        else:
+            if queue[i] < queue[parent]:
+                self._swap(i, parent)
+                self._bubble_up_grandparents(parent, is_min=True)
+            else:
+                self._bubble_up_grandparents(i, is_min=False)
+
+    def _bubble_up_grandparents(self, i, is_min):
+        queue = self.queue
+        while i > 2:
+            grandparent = ((i - 1) // 2 - 1) // 2
+            if is_min:
+                better = queue[i] < queue[grandparent]
+            else:
+                better = queue[grandparent] < queue[i]
+            if not better:
+                break
+            self._swap(i, grandparent)
+            i = grandparent
+
+    def _trickle_down(self, i):
+        queue = self.queue
+        is_min = _is_min_level(i)
+        n = len(queue)
+        while 2 * i + 1 < n:
+            # the best (min or max, depending on the level) of the children
+            # and grandchildren
+            first_child = 2 * i + 1
+            descendants = [first_child, first_child + 1]
+            descendants += list(range(4 * i + 3, 4 * i + 7))
+            m = first_child
+            for d in descendants[1:]:
+                if d < n and ((queue[d] < queue[m]) if is_min
+                              else (queue[m] < queue[d])):
+                    m = d
+            if is_min:
+                better = queue[m] < queue[i]
+            else:
+                better = queue[i] < queue[m]
+            if not better:
+                break
+            self._swap(i, m)
+            if m <= first_child + 1:
+                # it was a child, nothing below it can be out of order
+                break
+            parent = (m - 1) // 2
+            if is_min:
+                wrong = queue[parent] < queue[m]
+            else:
+                wrong = queue[m] < queue[parent]
+            if wrong:
+                self._swap(m, parent)
+            i = m
+
+    def _delete(self, i):
+        queue = self.queue
+        x = queue[i]
+        last = queue.pop()
+        if i < len(queue):
+            queue[i] = last
+            self._trickle_down(i)
+        return x
+
+    def _worst_index(self):
+        if len(self.queue) <= 2:
+            return len(self.queue) - 1
+        return 2 if self.queue[1] < self.queue[2] else 1
+
     def append(self, x):
-        heapq.heappush(self.queue, x)
-        if self.limit and len(self.queue) > self.limit:
-            self.queue.remove(heapq.nlargest(1, self.queue)[0])
-            heapq.heapify(self.queue)
+        if self.limit and len(self.queue) >= self.limit:
+            worst = self._worst_index()
+            if not x < self.queue[worst]:
+                return
+            self._delete(worst)
+        self.queue.append(x)
+        self._bubble_up(len(self.queue) - 1)
 
     def pop(self):
-        return heapq.heappop(self.queue)
+        if not self.queue:
+            raise IndexError('pop from empty queue')
+        return self._delete(0)
+
+    def pop_worst(self):
+        if not self.queue:
+            raise IndexError('pop from empty queue')
+        return self._delete(self._worst_index())
 
     def extend(self, iterable):
         for x in iterable:
             self.append(x)
 
     def clear(self):
-        self.queue.clear()
+        del self.queue[:]
 
     def remove(self, x):
         self.queue.remove(x)
-        heapq.heapify(self.queue)
+        for i in reversed(range(len(self.queue) // 2)):
+            self._trickle_down(i)
 
     def sorted(self):
         return heapq.nsmallest(len(self.queue), self.queue)
 
 
+class StateIndexMixin(object):
+    '''
+    Mixin for fringes that keeps an index of the contained nodes by state,
+    so graph searches can find a node with a given state without scanning
+    the whole fringe.
+    The index assumes there is at most one node per state on the fringe,
+    which is what graph search guarantees.
+    `key` is the function that returns the key of a node in the index (its
+    state by default, _search uses models.state_key).
+    Its append, pop, remove and clear methods update the index and call the
+    ones of the container it's mixed with, so containers that don't keep
+    their nodes in it (like IndexedPriorityQueue) must override them.
+    '''
+    key = attrgetter('state')
+
+    def __init__(self, iterable=()):
+        super(StateIndexMixin, self).__init__()
+        self.index = {}
+        self.extend(iterable)
+
+    def _index_add(self, node):
+        self.index[self.key(node)] = node
+
+    def _index_discard(self, node):
+        key = self.key(node)
+        if self.index.get(key) is node:
+            del self.index[key]
+
+    def append(self, x):
+        super(StateIndexMixin, self).append(x)
+        self._index_add(x)
+
+    def extend(self, iterable):
+        for x in iterable:
+            self.append(x)
+
+    def pop(self):
+        x = super(StateIndexMixin, self).pop()
+        self._index_discard(x)
+        return x
+
+    def remove(self, x):
+        super(StateIndexMixin, self).remove(x)
+        self._index_discard(x)
+
+    def clear(self):
+        super(StateIndexMixin, self).clear()
+        self.index.clear()
+
+    def find(self, key):
+        '''Returns the node with `key` (by default, the state) in the
+           fringe, or None.'''
+        return self.index.get(key)
+
+    def replace(self, old, new):
+        '''Replaces the node `old` with the node `new`.'''
+        self.remove(old)
+        self.append(new)
+
+
+class IndexedLifoList(StateIndexMixin, LifoList):
+    '''LifoList indexed by state.'''
+
+
+class IndexedFifoList(StateIndexMixin, FifoList):
+    '''FifoList indexed by state.'''
+
+
+class IndexedPriorityQueue(StateIndexMixin):
+    '''
+    Priority queue indexed by state, where nodes can be removed or replaced
+    by better ones (decrease-key) in O(log n).
+    Removed nodes are left in the heap marked as stale, and skipped when they
+    reach the top. The heap is rebuilt when stale nodes outnumber the live
+    ones.
+    '''
+    def __init__(self, *args):
+        self.queue = list()
+        self.stale = set()
+        self.index = {}
+
+    def __getitem__(self, val):
+        if val == 0:
+            # the best node, without sorting the whole queue
+            self._discard_stale_top()
+            return self.queue[0]
+        return self.sorted()[val]
+
+    def __iter__(self):
+        return (x for x in self.queue if id(x) not in self.stale)
+
+    def _discard_stale_top(self):
+        while self.queue and id(self.queue[0]) in self.stale:
+            self.stale.remove(id(heapq.heappop(self.queue)))
+
+    def __len__(self):
+        return len(self.queue) - len(self.stale)
+
+    def append(self, x):
+        if id(x) in self.stale:
+            # removed but still in the heap, just make it live again
+            self.stale.remove(id(x))
+        else:
+            heapq.heappush(self.queue, x)
+        self._index_add(x)
+
+    def pop(self):
+        self._discard_stale_top()
+        x = heapq.heappop(self.queue)
+        self._index_discard(x)
+        return x
+
+    def clear(self):
+        del self.queue[:]
+        self.stale.clear()
+        self.index.clear()
+
+    def remove(self, x):
+        # nodes stay in the heap while marked, so their ids can't be reused
+        self.stale.add(id(x))
+        self._index_discard(x)
+        if len(self.stale) > len(self.queue) // 2:
+            self.queue = [y for y in self.queue if id(y) not in self.stale]
+            heapq.heapify(self.queue)
+            self.stale.clear()
+
+    def replace(self, old, new):
+        '''Replaces the node `old` with the node `new`, in O(log n).'''
+        self.remove(old)
+        self.append(new)
+
+    def sorted(self):
+        return heapq.nsmallest(len(self), iter(self))
+
+
+class EncodedStateSet(object):
+    '''
+    Set of states that stores them encoded with `encode` (usually as ints
+    or bytes, which use much less memory than tuples or lists of values).
+    Equal states have equal encodings, so each state is stored only once,
+    no matter how many times it's added. Iterating decodes the states with
+    `decode`, if given.
+    '''
+    def __init__(self, encode, decode=None, iterable=()):
+        self.encode = encode
+        self.decode = decode
+        self.encoded = set()
+        for state in iterable:
+            self.add(state)
+
+    def __len__(self):
+        return len(self.encoded)
+
+    def __contains__(self, state):
+        return self.encode(state) in self.encoded
+
+    def __iter__(self):
+        if self.decode is None:
+            raise TypeError('decode is needed to iterate the states')
+        return (self.decode(encoded) for encoded in self.encoded)
+
+    def add(self, state):
+        self.encoded.add(self.encode(state))
+
+    def update(self, states):
+        for state in states:
+            self.add(state)
+
+    def discard(self, state):
+        self.encoded.discard(self.encode(state))
+
+    def clear(self):
+        self.encoded.clear()
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _mix_64(value):
+    '''Scrambles the bits of a 64 bits hash (splitmix64 finalizer), so
+       similar hashes (like the ones of small ints) spread on the filter.'''
+    value &= _MASK_64
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & _MASK_64
+    return value ^ (value >> 31)
+
+
+class BloomFilter(object):
+    '''
+    Approximate set of states, that uses a fixed amount of memory: a bit
+    array sized when it's created for `capacity` states, with an
+    `error_rate` probability of false positives (states never added that
+    it says it contains). There are no false negatives, and the states
+    aren't stored, so they can't be iterated or discarded.
+    Adding more than `capacity` states raises the probability of false
+    positives (see false_positive_rate).
+    The bits of each state are chosen with its hash (so HashedStates are
+    cheap to add).
+    '''
+    def __init__(self, capacity, error_rate=0.01):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # optimal number of bits and of bits per state
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) /
+                                         math.log(2) ** 2)))
+        self.hashes_count = max(1, int(round(float(self.size) / capacity *
+                                             math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.bits_set = 0
+        self.added = 0
+
+    def _positions(self, state):
+        # double hashing: the positions are first + i * second
+        value = _mix_64(hash(state))
+        first = value & 0xffffffff
+        second = (value >> 32) | 1
+        size = self.size
+        return [(first + i * second) % size
+                for i in range(self.hashes_count)]
+
+    def __contains__(self, state):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(state))
+
+    def add(self, state):
+        bits = self.bits
+        for position in self._positions(state):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                self.bits_set += 1
+        self.added += 1
+
+    def update(self, states):
+        for state in states:
+            self.add(state)
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self.bits_set = 0
+        self.added = 0
+
+    def false_positive_rate(self):
+        '''Estimated probability that a state never added is reported as
+           contained, given the bits set so far.'''
+        return (float(self.bits_set) / self.size) ** self.hashes_count
+
+    def memory_size(self):
+        '''Bytes used by the bit array.'''
+        return len(self.bits)
+
+
+class UniqueStatesBoundedPriorityQueue(BoundedPriorityQueue):
+    '''
+    BoundedPriorityQueue that doesn't accept a node if there is already a
+    node with the same state in it. `states` is the set used to keep track
+    of the states in the queue (a set by default).
+    '''
+    def __init__(self, limit=None, states=None, *args):
+        super(UniqueStatesBoundedPriorityQueue, self).__init__(limit)
+        self.states = set() if states is None else states
+
+    def _delete(self, i):
+        x = super(UniqueStatesBoundedPriorityQueue, self)._delete(i)
+        self.states.discard(x.state)
+        return x
+
+    def append(self, x):
+        if x.state in self.states:
+            return
+        if self.limit and len(self.queue) >= self.limit and \
+           not x < self.queue[self._worst_index()]:
+            # worse than the whole queue, it wouldn't be added
+            return
+        self.states.add(x.state)
+        super(UniqueStatesBoundedPriorityQueue, self).append(x)
+
+    def clear(self):
+        super(UniqueStatesBoundedPriorityQueue, self).clear()
+        self.states.clear()
+
+    def remove(self, x):
+        super(UniqueStatesBoundedPriorityQueue, self).remove(x)
+        self.states.discard(x.state)
+
+
+class LRUCache(object):
+    '''
+    Dict-like cache that keeps at most `limit` values (if specified),
+    discarding the least recently used ones. Counts the hits and misses of
+    `get`.
+    '''
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        try:
+            value = self.values.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        # moved to the end, as the most recently used
+        self.values[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.values.pop(key, None)
+        self.values[key] = value
+        if self.limit is not None and len(self.values) > self.limit:
+            self.values.popitem(last=False)
+
+    def clear(self):
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        '''Returns a dict with the hits, misses and size of the cache.'''
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.values)}
+
+
 class InverseTransformSampler(object):
     def __init__(self, weights, objects):
         assert weights and objects and len(weights) == len(objects)
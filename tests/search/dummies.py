@@ -1,9 +1,13 @@
 # coding=utf-8
+import random
+
+from simpleai.search.models import SearchProblem
 
 
 class DummyNode(object):
-    def __init__(self, value):
+    def __init__(self, value, state=None):
         self.value = value
+        self.state = state
 
     def __lt__(self, other):
         return self.value < other.value
@@ -34,6 +38,12 @@ class DummyProblem(object):
     def cost(self, state1, action, state2):
         return 1
 
+    def predecessors(self, state):
+        return [(state[-1], state[:-1])] if len(state) > 1 else []
+
+    def goal_states(self):
+        return [GOAL]
+
     def generate_random_state(self):
         return 'i'
 
@@ -64,11 +74,14 @@ class DummyGraphProblem(object):
     consistent = {'r': 0, 'l': 15, 'a': 25, 's': 30}
     inconsistent = {'r': 0, 'l': 10, 'a': 25, 's': 30}
     inadmissible = {'r': 0, 'l': 15, 'a': 28, 's': 30}
+    # estimates of the cost from 's'
+    backward = {'s': 0, 'a': 15, 'l': 20, 'r': 35}
 
     def __init__(self, heuristic_dict=None):
         self.initial_state = 's'
         self.goal = 'r'
         self.heuristic_dict = heuristic_dict
+        self.backward_heuristic_dict = self.backward
 
     def is_goal(self, state):
         return state == self.goal
@@ -87,8 +100,60 @@ class DummyGraphProblem(object):
     def heuristic(self, state):
         return self.heuristic_dict[state]
 
+    def predecessors(self, state):
+        return [(state, previous) for previous in self._map[state]]
+
+    def goal_states(self):
+        return [self.goal]
+
+    def backward_heuristic(self, state):
+        return self.backward_heuristic_dict[state]
+
     def state_representation(self, state):
         return state
 
     def action_representation(self, action):
-        return action
\ No newline at end of file
+        return action
+
+class FlipBitsProblem(SearchProblem):
+    '''
+    Turn on all the bits of a tuple, flipping one at a time. The states are
+    hashed like Zobrist hashes: the xor of a random number for each bit on.
+    '''
+    def __init__(self, size):
+        rnd = random.Random(size)
+        self.numbers = [rnd.getrandbits(64) for _ in range(size)]
+        super(FlipBitsProblem, self).__init__((0,) * size)
+
+    def actions(self, state):
+        return list(range(len(state)))
+
+    def result(self, state, action):
+        bits = list(state)
+        bits[action] = 1 - bits[action]
+        return tuple(bits)
+
+    def is_goal(self, state):
+        return all(state)
+
+    def heuristic(self, state):
+        return len(state) - sum(state)
+
+    def state_hash(self, state):
+        value = 0
+        for number, bit in zip(self.numbers, state):
+            if bit:
+                value ^= number
+        return value
+
+    def update_state_hash(self, state_hash, state, action, new_state):
+        return state_hash ^ self.numbers[action]
+
+
+class CollidingFlipBitsProblem(FlipBitsProblem):
+    '''All the states have the same hash.'''
+    def state_hash(self, state):
+        return 0
+
+    def update_state_hash(self, state_hash, state, action, new_state):
+        return 0
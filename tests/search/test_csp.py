@@ -1,6 +1,7 @@
 # coding=utf-8
 import unittest
-from simpleai.search.models import CspProblem
+from simpleai.search.models import (CspProblem, SearchBudget, BudgetExceeded,
+                                    SearchStats)
 from simpleai.search.csp import (_find_conflicts, _count_conflicts,
                                  _most_constrained_variable_chooser,
                                  _highest_degree_variable_chooser,
@@ -94,3 +95,36 @@ class TestCsp(unittest.TestCase):
         result = min_conflicts(self.problem)
         c = _count_conflicts(self.problem, result)
         self.assertEqual(c, 0)
+
+    def test_backtrack_with_budget(self):
+        result = backtrack(self.problem, budget=SearchBudget(max_expanded=2))
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertFalse(result)
+        self.assertEqual(result.reason, 'max_expanded')
+        self.assertEqual(result.expanded, 2)
+        self.assertEqual(len(result.best), 2)
+
+    def test_backtrack_with_enough_budget(self):
+        result = backtrack(self.problem, budget=SearchBudget(max_expanded=10))
+        self.assertEqual(result, {'A': 2, 'B': 3, 'C': 1})
+
+    def test_min_conflicts_with_budget(self):
+        # a problem without solutions
+        problem = CspProblem(('A', 'B'), {'A': [1], 'B': [1]},
+                             [(('A', 'B'), lambda variables, values:
+                               values[0] != values[1])])
+        result = min_conflicts(problem, budget=SearchBudget(max_expanded=5))
+        self.assertEqual(result.reason, 'max_expanded')
+        self.assertEqual(result.best, {'A': 1, 'B': 1})
+
+    def test_backtrack_with_stats(self):
+        stats = SearchStats()
+        backtrack(self.problem, stats=stats)
+        # at least one assignment per variable
+        self.assertTrue(stats.expanded >= 3)
+        self.assertTrue(stats.generated >= stats.expanded)
+
+    def test_min_conflicts_with_stats(self):
+        stats = SearchStats()
+        min_conflicts(self.problem, iterations_limit=4, stats=stats)
+        self.assertTrue(1 <= stats.iterations <= 4)
@@ -0,0 +1,130 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+import unittest
+from simpleai.search.traditional import breadth_first, uniform_cost, astar
+from simpleai.search.graphs import (ExplicitGraphProblem,
+                                    graph_breadth_first, graph_uniform_cost,
+                                    graph_astar)
+try:
+    import numpy
+except ImportError:
+    numpy = None  # lint:ok
+try:
+    import pydot
+except ImportError:
+    pydot = None  # lint:ok
+
+
+# the same graph of DummyGraphProblem: s=0, a=1, l=2, r=3
+EDGES = [(0, 2, 26), (0, 1, 15), (1, 2, 10), (2, 3, 16)]
+CONSISTENT = [30, 25, 15, 0]
+
+DOT = '''graph {
+    s [initial=1];
+    r [goal=1];
+    s -- l [weight=26];
+    s -- a [weight=15];
+    a -- l [weight=10];
+    l -- r [weight=16];
+}
+'''
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestExplicitGraphProblem(unittest.TestCase):
+    def setUp(self):
+        self.problem = ExplicitGraphProblem.from_edges(
+            EDGES, directed=False, initial_state=0, goals=[3],
+            heuristics=CONSISTENT)
+
+    def test_csr_arrays(self):
+        self.assertEqual(self.problem.nodes_count, 4)
+        self.assertEqual(self.problem.offsets.tolist(), [0, 2, 4, 7, 8])
+        self.assertEqual(self.problem.targets.tolist(),
+                         [2, 1, 2, 0, 3, 0, 1, 2])
+        self.assertEqual(self.problem.weights.tolist(),
+                         [26, 15, 10, 15, 16, 26, 10, 16])
+
+    def test_default_weights(self):
+        problem = ExplicitGraphProblem.from_edges([(0, 1), (1, 2)])
+        self.assertEqual(problem.weights.tolist(), [1, 1])
+        self.assertEqual(problem.offsets.tolist(), [0, 1, 2, 2])
+
+    def test_problem_methods(self):
+        actions = list(self.problem.actions(0))
+        self.assertEqual([self.problem.result(0, a) for a in actions], [2, 1])
+        self.assertEqual([self.problem.cost(0, a, None) for a in actions],
+                         [26, 15])
+        self.assertEqual(self.problem.heuristic(1), 25)
+        self.assertTrue(self.problem.is_goal(3))
+        self.assertEqual(self.problem.goal_states(), [3])
+
+    def test_successors(self):
+        self.assertEqual(self.problem.successors(0), [(0, 2, 26), (1, 1, 15)])
+        self.assertEqual(self.problem.edges(0), ([0, 1], [2, 1], [26, 15]))
+
+    def test_predecessors(self):
+        predecessors = self.problem.predecessors(2)
+        self.assertEqual(sorted(s for _, s in predecessors), [0, 1, 3])
+        for edge, previous in predecessors:
+            self.assertEqual(self.problem.result(previous, edge), 2)
+
+    def test_traditional_algorithms(self):
+        result = uniform_cost(self.problem, graph_search=True)
+        self.assertEqual([s for _, s in result.path()], [0, 1, 2, 3])
+        self.assertEqual(result.cost, 41)
+        result = astar(self.problem, graph_search=True)
+        self.assertEqual(result.cost, 41)
+        result = breadth_first(self.problem, graph_search=True)
+        self.assertEqual([s for _, s in result.path()], [0, 2, 3])
+
+    def test_fast_algorithms(self):
+        result = graph_breadth_first(self.problem)
+        self.assertEqual([s for _, s in result.path()], [0, 2, 3])
+        self.assertEqual(result.cost, 42)
+        for algorithm in (graph_uniform_cost, graph_astar):
+            result = algorithm(self.problem)
+            self.assertEqual(result.path(),
+                             [(None, 0), (1, 1), (2, 2), (4, 3)])
+            self.assertEqual(result.cost, 41)
+            self.assertEqual(result.depth, 3)
+
+    def test_fast_astar_with_heuristic_method(self):
+        self.problem.heuristics = None
+        self.assertEqual(graph_astar(self.problem).cost, 41)
+
+    def test_fast_astar_calls_heuristic_once_per_state(self):
+        self.problem.heuristics = None
+        calls = []
+        heuristic = self.problem.heuristic
+        self.problem.heuristic = lambda state: calls.append(state) or \
+            heuristic(state)
+        graph_astar(self.problem)
+        # l is reached twice, the second time with less cost
+        self.assertEqual(sorted(calls), [0, 1, 2, 3])
+
+    def test_goal_not_reachable(self):
+        problem = ExplicitGraphProblem.from_edges([(0, 1), (2, 3)],
+                                                  initial_state=0, goals=[3])
+        self.assertIsNone(graph_breadth_first(problem))
+        self.assertIsNone(graph_astar(problem))
+
+    @unittest.skipIf(pydot is None, 'pydot is not installed')
+    def test_from_dot(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'graph.dot')
+            with open(filename, 'w') as dot_file:
+                dot_file.write(DOT)
+            problem = ExplicitGraphProblem.from_dot(filename)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(problem.state_representation(problem.initial_state),
+                         's')
+        result = graph_uniform_cost(problem)
+        self.assertEqual([problem.state_representation(s)
+                          for _, s in result.path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(result.cost, 41)
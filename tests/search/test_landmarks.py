@@ -0,0 +1,63 @@
+# coding=utf-8
+import io
+import unittest
+from tests.search.dummies import DummyGraphProblem
+from simpleai.search.traditional import astar
+from simpleai.search.landmarks import build_landmarks, Landmarks
+try:
+    import numpy
+except ImportError:
+    numpy = None  # lint:ok
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestLandmarks(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyGraphProblem()
+
+    def test_chooses_farthest_landmarks(self):
+        landmarks = build_landmarks(self.problem, count=2)
+        self.assertEqual(landmarks.landmarks, ['r', 's'])
+
+    def test_distance_tables(self):
+        landmarks = build_landmarks(self.problem, landmarks=['r'])
+        distances_from = dict(zip(landmarks.states,
+                                  landmarks.distances_from[0]))
+        distances_to = dict(zip(landmarks.states, landmarks.distances_to[0]))
+        self.assertEqual(distances_from, {'r': 0, 'l': 16, 'a': 26, 's': 41})
+        self.assertEqual(distances_to, {'r': 0, 'l': 16, 'a': 26, 's': 41})
+
+    def test_heuristic_is_admissible(self):
+        heuristic = build_landmarks(self.problem, count=2).heuristic(['l'])
+        for state, distance in (('s', 25), ('a', 10), ('l', 0), ('r', 16)):
+            self.assertTrue(0 <= heuristic(state) <= distance)
+        self.assertEqual(heuristic('unknown'), 0)
+
+    def test_heuristic_with_astar(self):
+        landmarks = build_landmarks(self.problem, count=1)
+        self.problem.heuristic = landmarks.heuristic(
+            self.problem.goal_states())
+        self.assertEqual(self.problem.heuristic('s'), 41)
+        result = astar(self.problem, graph_search=True)
+        self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(result.cost, 41)
+
+    def test_symmetric(self):
+        landmarks = build_landmarks(self.problem, count=2, symmetric=True)
+        self.assertIs(landmarks.distances_to, landmarks.distances_from)
+
+    def test_save_and_load(self):
+        landmarks = build_landmarks(self.problem, count=2)
+        data = io.BytesIO()
+        landmarks.save(data)
+        data.seek(0)
+        loaded = Landmarks.load(data)
+        self.assertEqual(loaded.states, landmarks.states)
+        self.assertEqual(loaded.landmarks, landmarks.landmarks)
+        self.assertTrue((loaded.distances_from ==
+                         landmarks.distances_from).all())
+        self.assertTrue((loaded.distances_to ==
+                         landmarks.distances_to).all())
+        for state in landmarks.states:
+            self.assertEqual(loaded.heuristic(['r'])(state),
+                             landmarks.heuristic(['r'])(state))
@@ -1,12 +1,15 @@
 # coding=utf-8
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from tests.search.dummies import DummyProblem, GOAL, DummyGeneticProblem
 from simpleai.search.local import (beam, beam_best_first,
                                    hill_climbing,
                                    hill_climbing_stochastic,
                                    simulated_annealing,
                                    hill_climbing_random_restarts, genetic)
-from simpleai.search.models import SearchNode
+from simpleai.search.models import (SearchNode, SearchBudget, BudgetExceeded,
+                                    SearchStats)
+from simpleai.search.viewers import BaseViewer
 
 
 class TestLocalSearch(unittest.TestCase):
@@ -26,6 +29,12 @@ class TestLocalSearch(unittest.TestCase):
         result = hill_climbing(self.problem)
         self.assertEqual(result.state, GOAL)
 
+    def test_beam_repeats_states_by_default(self):
+        viewer = FringeViewer()
+        beam(self.problem, beam_size=10, viewer=viewer)
+        # encode_state doesn't change the fringe
+        self.assertEqual(viewer.fringes[0], ['i'] * 10)
+
     def test_hill_climbing_stochastic(self):
         result = hill_climbing_stochastic(self.problem)
         self.assertEqual(result.state, GOAL)
@@ -86,3 +95,128 @@ class TestGeneticSearch(unittest.TestCase):
         self.problem.value = fitness
         node = genetic(self.problem, iterations_limit=1, mutation_chance=0, population_size=5)
         self.assertEqual(node.state, 2)
+
+
+class EncodedProblem(DummyProblem):
+    def encode_state(self, state):
+        return state.encode('ascii')
+
+
+class FringeViewer(BaseViewer):
+    def __init__(self):
+        super(FringeViewer, self).__init__()
+        self.fringes = []
+
+    def event(self, name, *params):
+        if name == 'new_iteration':
+            self.fringes.append([node.state for node in params[0]])
+
+
+class TestLocalSearchWithEncodedStates(unittest.TestCase):
+    def setUp(self):
+        self.problem = EncodedProblem()
+        self.problem.initial_state = 'i'
+
+    def test_beam_with_unique_states_doesnt_repeat_states(self):
+        viewer = FringeViewer()
+        result = beam(self.problem, beam_size=10, viewer=viewer,
+                      unique_states=True)
+        self.assertEqual(result.state, GOAL)
+        # all the random initial states are the same
+        self.assertEqual(viewer.fringes[0], ['i'])
+        for fringe in viewer.fringes:
+            self.assertEqual(len(fringe), len(set(fringe)))
+
+    def test_hill_climbing(self):
+        result = hill_climbing(self.problem)
+        self.assertEqual(result.state, GOAL)
+
+    def test_beam_repeats_states_by_default(self):
+        viewer = FringeViewer()
+        beam(self.problem, beam_size=10, viewer=viewer)
+        # encode_state doesn't change the fringe
+        self.assertEqual(viewer.fringes[0], ['i'] * 10)
+
+
+class TestLocalSearchBudgets(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+
+    def test_budget_exceeded(self):
+        for algorithm in (beam, beam_best_first, hill_climbing,
+                          hill_climbing_stochastic, simulated_annealing):
+            result = algorithm(self.problem, iterations_limit=100,
+                               budget=SearchBudget(max_expanded=2))
+            self.assertIsInstance(result, BudgetExceeded)
+            self.assertEqual(result.reason, 'max_expanded')
+            self.assertEqual(result.expanded, 2)
+            self.assertEqual(result.best.state[0], 'i')
+
+    def test_hill_climbing_random_restarts(self):
+        result = hill_climbing_random_restarts(
+            self.problem, restarts_limit=3, budget=SearchBudget(max_expanded=9))
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertEqual(result.expanded, 9)
+
+    def test_best_node_has_highest_value(self):
+        result = hill_climbing(self.problem,
+                               budget=SearchBudget(max_expanded=3))
+        # checked before its expansion
+        self.assertEqual(result.best.state, 'iabc')
+
+
+class TestLocalSearchStats(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+
+    def test_hill_climbing(self):
+        stats = SearchStats()
+        hill_climbing(self.problem, stats=stats)
+        self.assertEqual(stats.iterations, stats.expanded)
+        self.assertEqual(stats.generated, stats.calls['result'])
+        self.assertEqual(stats.calls['value'], stats.generated + 1)
+        self.assertEqual(stats.max_fringe, 1)
+
+    def test_beam(self):
+        stats = SearchStats()
+        beam(self.problem, beam_size=5, iterations_limit=2, stats=stats)
+        self.assertEqual(stats.iterations, 2)
+        self.assertEqual(stats.max_fringe, 5)
+
+    def test_genetic(self):
+        stats = SearchStats()
+        genetic(DummyGeneticProblem(), population_size=4, iterations_limit=3,
+                stats=stats)
+        self.assertEqual(stats.iterations, 3)
+        self.assertEqual(stats.generated, 12)
+
+
+class TestLocalSearchExecutor(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+        self.executor = ThreadPoolExecutor(max_workers=3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_hill_climbing(self):
+        expected = hill_climbing(self.problem)
+        result = hill_climbing(self.problem, executor=self.executor)
+        self.assertEqual(result.path(), expected.path())
+
+    def test_beam(self):
+        expected = beam(self.problem, beam_size=5, iterations_limit=3)
+        result = beam(self.problem, beam_size=5, iterations_limit=3,
+                      executor=self.executor)
+        self.assertEqual(result.state, expected.state)
+        self.assertEqual(result.value, expected.value)
+
+    def test_genetic(self):
+        result = genetic(DummyGeneticProblem(), population_size=5,
+                         iterations_limit=10, mutation_chance=0,
+                         executor=self.executor)
+        self.assertEqual(result.state, 14)
+        self.assertEqual(result.value, 15)
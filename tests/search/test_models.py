@@ -1,10 +1,34 @@
 # coding=utf-8
+import pickle
 import unittest
-from tests.search.dummies import DummyProblem
+import warnings
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from unittest import mock
+from tests.search.dummies import (DummyProblem, DummyGraphProblem,
+                                  FlipBitsProblem)
 from simpleai.search.models import (SearchNode, SearchNodeCostOrdered,
                                     SearchNodeValueOrdered,
                                     SearchNodeHeuristicOrdered,
-                                    SearchNodeStarOrdered)
+                                    SearchNodeStarOrdered,
+                                    CompactSearchNode,
+                                    compact_node_factory,
+                                    CachedProblemMixin, SearchProblem,
+                                    closed_set, SearchBudget,
+                                    BudgetExceeded, SearchStats,
+                                    problem_timing,
+                                    implements_heuristic_batch,
+                                    EvaluateState, HashedState,
+                                    _memory_usage, _current_memory_usage,
+                                    hashed_state, state_key,
+                                    implements_state_hash)
+from simpleai.search.utils import EncodedStateSet
+from simpleai.search.traditional import astar
+
+
+class SuccessorsProblem(SearchProblem):
+    '''Implements only successors, not actions, result and cost.'''
+    def successors(self, state):
+        return [('+1', state + 1, 1), ('*2', state * 2, 2)]
 
 
 class TestSearchNode(unittest.TestCase):
@@ -30,6 +54,23 @@ class TestSearchNode(unittest.TestCase):
         childs = self.node.expand(local_search=True)
         self.assertEqual(childs[0].parent, None)
 
+    def test_iter_expand_is_lazy(self):
+        results = []
+        original_result = self.problem.result
+        self.problem.result = lambda state, action: (
+            results.append(action) or original_result(state, action))
+        childs = self.node.iter_expand()
+        self.assertEqual(results, [])
+        self.assertEqual(next(childs).state, 'ia')
+        self.assertEqual(results, ['a'])
+        self.assertEqual([c.state for c in childs], ['ib', 'ic'])
+
+    def test_expand_uses_successors(self):
+        problem = SuccessorsProblem()
+        childs = SearchNode(state=1, problem=problem).expand()
+        self.assertEqual([(c.action, c.state, c.cost) for c in childs],
+                         [('+1', 2, 1), ('*2', 2, 2)])
+
     def test_path(self):
         n1 = SearchNode(problem=self.problem, state='i')
         n2 = SearchNode(action='a', state='ia', parent=n1)
@@ -82,3 +123,534 @@ class TestOrderedSearchNodeClasses(unittest.TestCase):
         self.assertTrue(n1 < n2)
         self.assertFalse(n2 < n1)
 
+    def test_search_node_star_caches_f(self):
+        n1 = SearchNodeStarOrdered(problem=self.problem, state='iab', cost=1)
+        self.assertEqual(n1.f, n1.cost + n1.heuristic)
+
+
+class TestCompactSearchNode(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+
+    def test_has_no_dict(self):
+        factory = compact_node_factory(SearchNode, self.problem)
+        node = factory(state='i')
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertIsInstance(node, CompactSearchNode)
+
+    def test_problem_is_shared_by_the_class(self):
+        factory = compact_node_factory(SearchNode, self.problem)
+        node = factory(state='i', problem=self.problem)
+        child = node.expand()[0]
+        self.assertIs(child.problem, self.problem)
+        self.assertNotIn('problem', CompactSearchNode.__slots__)
+
+    def test_expand_and_path(self):
+        factory = compact_node_factory(SearchNode, self.problem)
+        childs = factory(state='i').expand()
+        self.assertEqual([c.state for c in childs], ['ia', 'ib', 'ic'])
+        self.assertEqual(childs[1].expand()[0].path(),
+                         [(None, 'i'), ('b', 'ib'), ('a', 'iba')])
+
+    def test_star_ordered_caches_f(self):
+        factory = compact_node_factory(SearchNodeStarOrdered, self.problem)
+        n1 = factory(state='iab', cost=1)
+        n2 = factory(state='iba', cost=2)
+        self.assertEqual(n1.f, n1.cost + n1.heuristic)
+        self.assertTrue(n1 < n2)
+        self.assertFalse(n2 < n1)
+
+    def test_same_class_for_the_same_problem(self):
+        factory = compact_node_factory(SearchNodeStarOrdered, self.problem)
+        self.assertIs(compact_node_factory(SearchNodeStarOrdered,
+                                           self.problem), factory)
+        self.assertIs(compact_node_factory(factory, self.problem), factory)
+        self.assertIsNot(compact_node_factory(SearchNodeStarOrdered,
+                                              DummyProblem()), factory)
+
+    def test_pickle(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        factory = compact_node_factory(SearchNodeStarOrdered, problem)
+        node = factory(state='s').expand()[0]
+        copied = pickle.loads(pickle.dumps(node))
+        self.assertEqual(copied.path(), node.path())
+        self.assertEqual((copied.cost, copied.heuristic, copied.f),
+                         (node.cost, node.heuristic, node.f))
+        self.assertIsInstance(copied, CompactSearchNode)
+        self.assertIs(type(copied.parent), type(copied))
+        self.assertEqual(copied.problem.heuristic_dict,
+                         problem.heuristic_dict)
+
+
+class CountingGraphProblem(DummyGraphProblem):
+    def __init__(self, *args, **kwargs):
+        super(CountingGraphProblem, self).__init__(*args, **kwargs)
+        self.calls = {'actions': 0, 'result': 0, 'cost': 0, 'heuristic': 0}
+
+    def actions(self, state):
+        self.calls['actions'] += 1
+        return super(CountingGraphProblem, self).actions(state)
+
+    def result(self, state, action):
+        self.calls['result'] += 1
+        return super(CountingGraphProblem, self).result(state, action)
+
+    def cost(self, state, action, state2):
+        self.calls['cost'] += 1
+        return super(CountingGraphProblem, self).cost(state, action, state2)
+
+    def heuristic(self, state):
+        self.calls['heuristic'] += 1
+        return super(CountingGraphProblem, self).heuristic(state)
+
+
+class CachedGraphProblem(CachedProblemMixin, CountingGraphProblem):
+    pass
+
+
+class TestCachedProblemMixin(unittest.TestCase):
+    def setUp(self):
+        self.problem = CachedGraphProblem(DummyGraphProblem.consistent)
+
+    def test_same_values(self):
+        original = DummyGraphProblem(DummyGraphProblem.consistent)
+        for state in 'slar':
+            actions = self.problem.actions(state)
+            self.assertEqual(actions, original.actions(state))
+            for action in actions:
+                result = self.problem.result(state, action)
+                self.assertEqual(result, original.result(state, action))
+                self.assertEqual(self.problem.cost(state, action, result),
+                                 original.cost(state, action, result))
+            self.assertEqual(self.problem.heuristic(state),
+                             original.heuristic(state))
+
+    def test_successors(self):
+        successors = list(self.problem.successors('s'))
+        self.assertEqual(sorted(successors), [('a', 'a', 15), ('l', 'l', 26)])
+        self.problem.successors('s')
+        self.assertEqual(self.problem.calls['actions'], 1)
+
+    def test_calls_are_cached(self):
+        for _ in range(3):
+            self.problem.actions('s')
+            self.problem.heuristic('s')
+        self.assertEqual(self.problem.calls, {'actions': 1, 'result': 0,
+                                              'cost': 0, 'heuristic': 1})
+        self.assertEqual(self.problem.cache_stats(),
+                         {'heuristic': {'hits': 2, 'misses': 1, 'size': 1},
+                          'successors': {'hits': 2, 'misses': 1, 'size': 1}})
+
+    def test_results_and_costs_are_cached_on_demand(self):
+        self.problem.actions('s')
+        self.assertEqual(self.problem.calls['result'], 0)
+        for _ in range(2):
+            self.assertEqual(self.problem.result('s', 'a'), 'a')
+            self.assertEqual(self.problem.cost('s', 'a', 'a'), 15)
+        self.assertEqual(self.problem.calls['result'], 1)
+        self.assertEqual(self.problem.calls['cost'], 1)
+        self.problem.result('s', 'l')
+        self.assertEqual(self.problem.calls['result'], 2)
+
+    def test_successors_are_lazy(self):
+        successors = self.problem.successors('s')
+        next(iter(successors))
+        self.assertEqual(self.problem.calls['result'], 1)
+
+    def test_unhashable_actions_arent_cached(self):
+        self.problem.actions('s')
+        for _ in range(2):
+            self.assertEqual(self.problem.result('s', ['a']), ['a'])
+        self.assertEqual(self.problem.calls['result'], 2)
+
+    def test_cache_size_limit(self):
+        self.problem.successors_cache_size = 2
+        for state in 'sla':
+            self.problem.actions(state)
+        self.problem.actions('s')
+        self.assertEqual(self.problem.calls['actions'], 4)
+        self.assertEqual(self.problem.cache_stats()['successors']['size'], 2)
+
+    def test_clear_caches(self):
+        self.problem.heuristic('s')
+        self.problem.clear_caches()
+        self.problem.heuristic('s')
+        self.assertEqual(self.problem.calls['heuristic'], 2)
+
+    def test_search_with_cache(self):
+        result = astar(self.problem)
+        self.assertEqual(result.state, 'r')
+        self.assertEqual(result.cost, 41)
+        stats = self.problem.cache_stats()
+        self.assertTrue(stats['heuristic']['hits'] > 0)
+        self.assertTrue(stats['successors']['hits'] > 0)
+        self.assertEqual(self.problem.calls['actions'],
+                         stats['successors']['misses'])
+
+
+class EncodedProblem(SearchProblem):
+    def encode_state(self, state):
+        return state.encode('ascii')
+
+    def decode_state(self, encoded):
+        return encoded.decode('ascii')
+
+
+class TestClosedSet(unittest.TestCase):
+    def test_regular_set_without_encoding(self):
+        self.assertEqual(closed_set(SearchProblem()), set())
+        self.assertEqual(closed_set(DummyProblem()), set())
+
+    def test_encoded_set_with_encoding(self):
+        memory = closed_set(EncodedProblem())
+        self.assertIsInstance(memory, EncodedStateSet)
+        memory.add('ab')
+        self.assertEqual(memory.encoded, set([b'ab']))
+        self.assertEqual(list(memory), ['ab'])
+
+    def test_set_of_hashed_states_with_state_hash(self):
+        memory = closed_set(FlipBitsProblem(3))
+        self.assertEqual(memory, set())
+        self.assertNotIsInstance(memory, EncodedStateSet)
+
+
+class TestSearchBudget(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+
+    def test_max_expanded(self):
+        budget = SearchBudget(max_expanded=2)
+        self.assertEqual(budget.exceeded(), None)
+        self.assertEqual(budget.exceeded(), None)
+        self.assertEqual(budget.exceeded(), 'max_expanded')
+        self.assertEqual(budget.expanded, 2)
+
+    def test_max_fringe(self):
+        budget = SearchBudget(max_fringe=10)
+        self.assertEqual(budget.exceeded(fringe_size=10), None)
+        self.assertEqual(budget.exceeded(fringe_size=11), 'max_fringe')
+
+    def test_time_limit(self):
+        budget = SearchBudget(time_limit=0)
+        budget.start()
+        budget.deadline -= 1
+        self.assertEqual(budget.exceeded(), 'time_limit')
+
+    @unittest.skipIf(_memory_usage() is None, "can't measure the memory")
+    def test_max_memory(self):
+        budget = SearchBudget(max_memory=1)
+        self.assertEqual(budget.exceeded(), 'max_memory')
+        self.assertEqual(SearchBudget(max_memory=10 ** 15).exceeded(), None)
+
+    @unittest.skipIf(_current_memory_usage() is None,
+                     "can't measure the current memory")
+    def test_max_memory_uses_current_memory(self):
+        # memory used and freed before the search doesn't count
+        buffer = bytearray(200 * 1024 * 1024)
+        del buffer
+        budget = SearchBudget(max_memory=_memory_usage() + 100 * 1024 * 1024)
+        self.assertEqual(budget.exceeded(), None)
+
+    def test_max_memory_warns_if_memory_is_unknown(self):
+        budget = SearchBudget(max_memory=1)
+        budget.memory_check_interval = 1
+        with mock.patch('simpleai.search.models._memory_usage',
+                        return_value=None):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                self.assertEqual(budget.exceeded(), None)
+                self.assertEqual(budget.exceeded(), None)
+        # only once for each budget
+        self.assertEqual(len(caught), 1)
+        self.assertIs(caught[0].category, RuntimeWarning)
+
+    def test_keeps_best_node(self):
+        budget = SearchBudget()
+        good = SearchNodeHeuristicOrdered(state='iab', problem=self.problem)
+        bad = SearchNodeHeuristicOrdered(state='icc', problem=self.problem)
+        budget.exceeded(good)
+        budget.exceeded(bad)
+        self.assertIs(budget.best, good)
+
+    def test_result(self):
+        budget = SearchBudget(max_expanded=0)
+        node = SearchNode(state='i', problem=self.problem)
+        budget.exceeded(node)
+        result = budget.result()
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertFalse(result)
+        self.assertEqual(result.reason, 'max_expanded')
+        self.assertIs(result.best, node)
+        self.assertEqual(result.expanded, 0)
+
+
+class TestSearchStats(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+
+    def test_fringe_size_keeps_the_peak(self):
+        stats = SearchStats()
+        stats.fringe_size(5)
+        stats.fringe_size(3)
+        self.assertEqual(stats.max_fringe, 5)
+
+    def test_items(self):
+        stats = SearchStats()
+        stats['iterations'] = 3
+        stats['other'] = 1
+        self.assertEqual(stats.iterations, 3)
+        self.assertEqual(stats['other'], 1)
+
+    def test_as_dict(self):
+        stats = SearchStats()
+        stats.expanded = 2
+        values = stats.as_dict()
+        self.assertEqual(values['expanded'], 2)
+        self.assertEqual(values['calls'], {'actions': 0, 'result': 0,
+                                           'heuristic': 0, 'value': 0,
+                                           'successors': 0,
+                                           'heuristic_batch': 0})
+        values['calls']['actions'] = 1
+        self.assertEqual(stats.calls['actions'], 0)
+
+    def test_problem_timing(self):
+        stats = SearchStats()
+        with problem_timing(stats, self.problem):
+            self.problem.actions('i')
+            self.problem.result('i', 'a')
+            self.problem.result('i', 'b')
+        self.assertEqual(stats.calls['actions'], 1)
+        self.assertEqual(stats.calls['result'], 2)
+        self.assertEqual(stats.calls['heuristic'], 0)
+        self.assertTrue(stats.time['result'] >= 0)
+        # the original methods are back
+        self.assertNotIn('result', vars(self.problem))
+        self.problem.result('i', 'c')
+        self.assertEqual(stats.calls['result'], 2)
+
+    def test_problem_timing_successors_and_heuristic_batch(self):
+        problem = BatchGraphProblem(DummyGraphProblem.consistent)
+        cached = CachedGraphProblem(DummyGraphProblem.consistent)
+        stats = SearchStats()
+        with problem_timing(stats, problem), problem_timing(stats, cached):
+            problem.heuristic_batch(['a', 'l'])
+            list(cached.successors('s'))
+        self.assertEqual(stats.calls['heuristic_batch'], 1)
+        self.assertEqual(stats.calls['successors'], 1)
+        self.assertNotIn('successors', vars(cached))
+
+    def test_problem_timing_skips_the_default_hooks(self):
+        problem = SearchProblem()
+        problem.actions = lambda state: ['a']
+        problem.result = lambda state, action: state + action
+        problem.heuristic = lambda state: len(state)
+        stats = SearchStats()
+        with problem_timing(stats, problem):
+            list(problem.successors('i'))
+            problem.heuristic_batch(['a', 'bb'])
+            self.assertNotIn('successors', vars(problem))
+        self.assertEqual(stats.calls['successors'], 0)
+        self.assertEqual(stats.calls['heuristic_batch'], 0)
+        self.assertEqual(stats.calls['result'], 1)
+        self.assertEqual(stats.calls['heuristic'], 2)
+
+    def test_problem_timing_nested(self):
+        stats = SearchStats()
+        with problem_timing(stats, self.problem):
+            with problem_timing(stats, self.problem):
+                self.problem.actions('i')
+            self.problem.actions('i')
+        self.assertEqual(stats.calls['actions'], 2)
+
+    def test_problem_timing_from_many_threads(self):
+        stats = SearchStats()
+        with problem_timing(stats, self.problem):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(self.problem.result, ['i'] * 2000,
+                                  ['a'] * 2000))
+        self.assertEqual(stats.calls['result'], 2000)
+
+    def test_problem_timing_disabled(self):
+        with problem_timing(None, self.problem):
+            self.assertEqual(vars(self.problem), {})
+
+
+class TestSearchProblemSuccessors(unittest.TestCase):
+    def test_default_uses_actions_result_and_cost(self):
+        problem = SearchProblem()
+        problem.actions = lambda state: ['a', 'b']
+        problem.result = lambda state, action: state + action
+        self.assertEqual(list(problem.successors('i')),
+                         [('a', 'ia', 1), ('b', 'ib', 1)])
+
+
+class BatchGraphProblem(CountingGraphProblem):
+    def __init__(self, *args, **kwargs):
+        super(BatchGraphProblem, self).__init__(*args, **kwargs)
+        self.batches = []
+
+    def heuristic_batch(self, states):
+        self.batches.append(list(states))
+        return [self.heuristic_dict[state] for state in states]
+
+
+class TestHeuristicBatch(unittest.TestCase):
+    def setUp(self):
+        self.problem = BatchGraphProblem(DummyGraphProblem.consistent)
+
+    def test_implements_heuristic_batch(self):
+        self.assertTrue(implements_heuristic_batch(self.problem))
+        self.assertFalse(implements_heuristic_batch(SearchProblem()))
+        self.assertFalse(implements_heuristic_batch(DummyProblem()))
+
+    def test_default_calls_heuristic(self):
+        problem = SearchProblem()
+        problem.heuristic = lambda state: len(state)
+        self.assertEqual(problem.heuristic_batch(['a', 'bb']), [1, 2])
+
+    def test_expand_uses_one_batch(self):
+        node = SearchNodeStarOrdered(state='s', problem=self.problem)
+        childs = node.expand()
+        self.assertEqual(len(self.problem.batches), 1)
+        self.assertEqual(sorted(self.problem.batches[0]), ['a', 'l'])
+        # only the heuristic of the initial state is calculated alone
+        self.assertEqual(self.problem.calls['heuristic'], 1)
+        for child in childs:
+            self.assertEqual(child.heuristic,
+                             DummyGraphProblem.consistent[child.state])
+
+    def test_compact_nodes(self):
+        factory = compact_node_factory(SearchNodeHeuristicOrdered,
+                                       self.problem)
+        childs = factory(state='s').expand()
+        self.assertEqual(len(self.problem.batches), 1)
+        self.assertEqual(sorted(c.heuristic for c in childs), [15, 25])
+
+    def test_numpy_arrays_are_converted(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('numpy is not installed')
+
+        class NumpyBatchProblem(BatchGraphProblem):
+            def heuristic_batch(self, states):
+                return numpy.array([1.5] * len(states))
+
+        problem = NumpyBatchProblem(DummyGraphProblem.consistent)
+        childs = SearchNodeHeuristicOrdered(state='s', problem=problem).expand()
+        self.assertEqual([type(c.heuristic) for c in childs], [float, float])
+
+    def test_astar(self):
+        result = astar(self.problem, graph_search=True)
+        self.assertEqual(result.state, 'r')
+        self.assertEqual(result.cost, 41)
+        self.assertTrue(len(self.problem.batches) > 0)
+
+
+def describe(nodes):
+    return [(n.action, n.state, n.cost, n.depth, n.parent,
+             getattr(n, 'heuristic', None), getattr(n, 'value', None))
+            for n in nodes]
+
+
+class TestExpandWithExecutor(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.executor = ThreadPoolExecutor(max_workers=3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def assertSameExpansion(self, node, **kwargs):
+        self.assertEqual(describe(node.expand(**kwargs)),
+                         describe(node.expand(executor=self.executor,
+                                              **kwargs)))
+
+    def test_search_node(self):
+        self.assertSameExpansion(SearchNode(state='i', problem=self.problem,
+                                            cost=2))
+
+    def test_heuristic_ordered_node(self):
+        self.assertSameExpansion(SearchNodeStarOrdered(state='ia',
+                                                       problem=self.problem))
+
+    def test_value_ordered_node(self):
+        self.assertSameExpansion(SearchNodeValueOrdered(state='ia',
+                                                        problem=self.problem),
+                                 local_search=True)
+
+    def test_compact_node(self):
+        factory = compact_node_factory(SearchNodeHeuristicOrdered,
+                                       self.problem)
+        self.assertSameExpansion(factory(state='i'))
+
+    def test_executor_is_used_instead_of_heuristic_batch(self):
+        problem = BatchGraphProblem(DummyGraphProblem.consistent)
+        node = SearchNodeStarOrdered(state='s', problem=problem)
+        childs = node.expand(executor=self.executor)
+        self.assertEqual(problem.batches, [])
+        self.assertEqual(sorted(c.heuristic for c in childs), [15, 25])
+
+    def test_process_pool(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        node = SearchNodeStarOrdered(state='s', problem=problem)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            childs = node.expand(executor=executor)
+        self.assertEqual(describe(childs), describe(node.expand()))
+
+    def test_can_be_pickled_while_timed(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        with problem_timing(SearchStats(), problem):
+            evaluate = pickle.loads(pickle.dumps(EvaluateState(problem,
+                                                               'heuristic')))
+            self.assertEqual(evaluate('l'), 15)
+            self.assertTrue(problem.heuristic.timed)
+
+
+class TestStateHash(unittest.TestCase):
+    def setUp(self):
+        self.problem = FlipBitsProblem(4)
+
+    def test_implements_state_hash(self):
+        self.assertTrue(implements_state_hash(self.problem))
+        self.assertFalse(implements_state_hash(SearchProblem()))
+        self.assertFalse(implements_state_hash(DummyProblem()))
+
+    def test_hashed_states_compare_hashes_and_states(self):
+        self.assertEqual(HashedState((1, 0), 5), HashedState((1, 0), 5))
+        self.assertNotEqual(HashedState((1, 0), 5), HashedState((1, 0), 6))
+        # collision
+        self.assertNotEqual(HashedState((1, 0), 5), HashedState((0, 1), 5))
+        self.assertEqual(len(set([HashedState((1, 0), 5),
+                                  HashedState((0, 1), 5)])), 2)
+
+    def test_hashes_are_updated_incrementally(self):
+        node = SearchNode(state=self.problem.initial_state,
+                          problem=self.problem)
+        calls = []
+        state_hash = self.problem.state_hash
+        self.problem.state_hash = lambda state: calls.append(state) or \
+            state_hash(state)
+        self.assertEqual(hashed_state(node).hash, 0)
+        child = node.expand()[2].expand()[0]
+        self.assertEqual(child.state, (1, 0, 1, 0))
+        self.assertEqual(hashed_state(child),
+                         HashedState((1, 0, 1, 0),
+                                     state_hash((1, 0, 1, 0))))
+        self.assertEqual(calls, [self.problem.initial_state])
+        self.assertIs(hashed_state(child), hashed_state(child))
+
+    def test_compact_nodes(self):
+        factory = compact_node_factory(SearchNode, self.problem)
+        child = factory(state=self.problem.initial_state).expand()[1]
+        self.assertEqual(hashed_state(child).hash, self.problem.numbers[1])
+        self.assertFalse(hasattr(compact_node_factory(SearchNode,
+                                                      DummyProblem())(
+                                                          state='i'),
+                                 '__dict__'))
+
+    def test_state_key(self):
+        node = SearchNode(state=self.problem.initial_state,
+                          problem=self.problem)
+        self.assertIsInstance(state_key(self.problem)(node), HashedState)
+        self.assertEqual(state_key(DummyProblem())(node), node.state)
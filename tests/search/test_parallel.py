@@ -0,0 +1,56 @@
+# coding=utf-8
+import unittest
+from unittest import mock
+from tests.search.dummies import DummyProblem, GOAL, DummyGraphProblem
+from simpleai.search.parallel import hda_star
+from simpleai.search.viewers import BaseViewer
+
+
+class TestHdaStar(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+        self.graph_problem = DummyGraphProblem(DummyGraphProblem.consistent)
+
+    def test_hda_star(self):
+        result = hda_star(self.problem, processes=2)
+        self.assertEqual(result.state, GOAL)
+
+    def test_hda_star_finds_optimal_solution(self):
+        for processes in (1, 3):
+            result = hda_star(self.graph_problem, processes=processes)
+            self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+            self.assertEqual(result.cost, 41)
+
+    def test_hda_star_initial_state_is_goal(self):
+        self.graph_problem.initial_state = 'r'
+        result = hda_star(self.graph_problem, processes=2)
+        self.assertEqual(result.path(), [(None, 'r')])
+
+    def test_hda_star_without_solution(self):
+        self.graph_problem.goal = 'x'
+        self.assertIs(hda_star(self.graph_problem, processes=2), None)
+
+    def test_hda_star_viewer_events(self):
+        viewer = BaseViewer()
+        hda_star(self.graph_problem, processes=2, viewer=viewer)
+        self.assertEqual([e.name for e in viewer.events],
+                         ['started', 'chosen_node', 'finished'])
+
+    def test_hda_star_worker_errors_are_raised(self):
+        def heuristic(state):
+            raise ValueError('broken heuristic')
+        self.graph_problem.heuristic = heuristic
+        self.assertRaises(RuntimeError, hda_star, self.graph_problem,
+                          processes=2)
+
+    def test_hda_star_long_path(self):
+        self.problem.is_goal = lambda state: state == 'icccccc'
+        result = hda_star(self.problem, processes=2)
+        self.assertEqual(result.state, 'icccccc')
+        self.assertEqual([a for a, _ in result.path()[1:]], ['c'] * 6)
+
+    def test_hda_star_needs_fork(self):
+        with mock.patch('multiprocessing.get_all_start_methods',
+                        return_value=['spawn']):
+            self.assertRaises(RuntimeError, hda_star, self.graph_problem)
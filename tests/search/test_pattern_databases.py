@@ -0,0 +1,101 @@
+# coding=utf-8
+import os
+import shutil
+import tempfile
+import unittest
+from simpleai.search.models import SearchProblem
+from simpleai.search.traditional import astar
+from simpleai.search.pattern_databases import (build_pattern_database,
+                                               sliding_tile_moves,
+                                               additive_heuristic,
+                                               PatternDatabase)
+try:
+    import numpy
+except ImportError:
+    numpy = None  # lint:ok
+
+
+GOAL = (1, 2, 3, 4, 5, 6, 7, 8, 0)
+
+
+class EightPuzzle(SearchProblem):
+    def __init__(self, initial_state):
+        super(EightPuzzle, self).__init__(initial_state)
+        self.moves = sliding_tile_moves(3, 3, blank=0)
+
+    def actions(self, state):
+        return self.moves(state)
+
+    def result(self, state, action):
+        return action
+
+    def is_goal(self, state):
+        return state == GOAL
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestPatternDatabases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        moves = sliding_tile_moves(3, 3, blank=0)
+        cls.databases = [
+            build_pattern_database(GOAL, pattern, moves, blank=0)
+            for pattern in ((1, 2, 3, 4), (5, 6, 7, 8))]
+
+    def test_table_is_filled(self):
+        for database in self.databases:
+            self.assertEqual(database.table.dtype, numpy.uint8)
+            self.assertEqual(len(database.table), 9 * 8 * 7 * 6)
+            self.assertFalse((database.table == 255).any())
+
+    def test_goal_distance_is_zero(self):
+        for database in self.databases:
+            self.assertEqual(database.distance(GOAL), 0)
+
+    def test_one_move_away(self):
+        state = (1, 2, 3, 4, 5, 6, 7, 0, 8)
+        self.assertEqual([d.distance(state) for d in self.databases], [0, 1])
+
+    def test_ranks_are_a_perfect_hash(self):
+        database = PatternDatabase(GOAL, (1, 2))
+        ranks = set()
+        for first in range(9):
+            for second in range(9):
+                if first != second:
+                    tiles = [None] * 9
+                    tiles[first], tiles[second] = 1, 2
+                    ranks.add(database.rank(tiles))
+        self.assertEqual(ranks, set(range(database.size)))
+
+    def test_heuristic_with_astar(self):
+        problem = EightPuzzle((4, 1, 2, 7, 0, 3, 8, 5, 6))
+        problem.heuristic = additive_heuristic(self.databases)
+        self.assertTrue(0 < problem.heuristic(problem.initial_state) <= 8)
+        result = astar(problem, graph_search=True)
+        self.assertEqual(result.state, GOAL)
+        self.assertEqual(len(result.path()) - 1, 8)
+
+    def test_not_additive(self):
+        moves = sliding_tile_moves(3, 3, blank=0)
+        database = build_pattern_database(GOAL, (1, 2), moves, blank=0,
+                                          additive=False)
+        # the blank has to go around to move the tiles
+        state = (2, 1, 3, 4, 5, 6, 7, 8, 0)
+        self.assertTrue(database.distance(state) >
+                        self.databases[0].distance(state) > 0)
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'database')
+            self.databases[0].save(filename)
+            for mmap in (True, False):
+                loaded = PatternDatabase.load(filename, mmap=mmap)
+                self.assertEqual(loaded.goal, GOAL)
+                self.assertEqual(loaded.pattern, (1, 2, 3, 4))
+                self.assertEqual(loaded.blank, 0)
+                self.assertTrue((loaded.table ==
+                                 self.databases[0].table).all())
+                del loaded
+        finally:
+            shutil.rmtree(directory)
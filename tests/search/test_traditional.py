@@ -1,11 +1,23 @@
 # coding=utf-8
 import unittest
-from tests.search.dummies import DummyProblem, GOAL, DummyGraphProblem
+from concurrent.futures import ThreadPoolExecutor
+from tests.search.dummies import (DummyProblem, GOAL, DummyGraphProblem,
+                                  FlipBitsProblem, CollidingFlipBitsProblem)
+from simpleai.search import traditional
 from simpleai.search.traditional import (breadth_first, depth_first,
                                          limited_depth_first,
                                          iterative_limited_depth_first,
-                                         uniform_cost, greedy, astar)
+                                         uniform_cost, greedy, astar,
+                                         ida_star, sma_star, ara_star,
+                                         LPAStar,
+                                         bidirectional_breadth_first,
+                                         bidirectional_uniform_cost,
+                                         bidirectional_astar,
+                                         external_breadth_first)
 
+from simpleai.search.models import (SearchBudget, BudgetExceeded,
+                                    SearchStats, SearchProblem)
+from simpleai.search.utils import BloomFilter
 from simpleai.search.viewers import BaseViewer
 
 
@@ -48,10 +60,46 @@ class TestSearch(unittest.TestCase):
         result = limited_depth_first(self.problem, depth_limit=6)
         self.assertEqual(result.state, GOAL)
 
+    def test_lazy_depth_first(self):
+        result = depth_first(self.problem, lazy=True)
+        self.assertEqual(result.state, GOAL)
+
+    def test_lazy_limited_depth_first(self):
+        result = limited_depth_first(self.problem, depth_limit=3, lazy=True)
+        self.assertEqual(result, None)
+
+        result = limited_depth_first(self.problem, depth_limit=6, lazy=True)
+        self.assertEqual(result.state, GOAL)
+
+    def test_lazy_depth_first_graph_search(self):
+        result = depth_first(self.graph_problem, graph_search=True, lazy=True)
+        self.assertEqual(result.state, 'r')
+
     def test_iterative_limited_depth_first(self):
         result = iterative_limited_depth_first(self.problem)
         self.assertEqual(result.state, GOAL)
 
+    def test_iterative_limited_depth_first_incremental(self):
+        stats = {}
+        result = iterative_limited_depth_first(self.problem, incremental=True,
+                                               stats=stats)
+        self.assertEqual(result.state, GOAL)
+        self.assertEqual(stats['iterations'], 7)
+        # runs 2 to 6 would have expanded again 1, 1 + 3, ... nodes
+        self.assertEqual(stats['re_expansions_saved'],
+                         sum(sum(3 ** d for d in range(i)) for i in range(1, 6)))
+
+    def test_iterative_limited_depth_first_incremental_graph_search(self):
+        result = iterative_limited_depth_first(self.graph_problem,
+                                               graph_search=True,
+                                               incremental=True)
+        self.assertEqual([s for _, s in result.path()], ['s', 'l', 'r'])
+
+    def test_iterative_limited_depth_first_incremental_without_solution(self):
+        self.problem.is_goal = lambda state: False
+        result = iterative_limited_depth_first(self.problem, incremental=True)
+        self.assertIs(result, None)
+
     def test_uniform_cost(self):
         result = uniform_cost(self.problem)
         self.assertEqual(result.state, GOAL)
@@ -64,6 +112,151 @@ class TestSearch(unittest.TestCase):
         result = astar(self.problem)
         self.assertEqual(result.state, GOAL)
 
+    def test_astar_compact_nodes(self):
+        result = astar(self.graph_problem, graph_search=True, compact_nodes=True)
+        self.assertEqual(result.state, self.graph_problem.goal)
+        self.assertEqual(result.cost, 41)
+        self.assertFalse(hasattr(result, '__dict__'))
+
+    def test_breadth_first_compact_nodes(self):
+        result = breadth_first(self.problem, compact_nodes=True)
+        self.assertEqual(result.state, GOAL)
+
+    def test_ida_star(self):
+        result = ida_star(self.problem)
+        self.assertEqual(result.state, GOAL)
+
+    def test_ida_star_finds_optimal_solution(self):
+        for heuristic in (DummyGraphProblem.consistent,
+                          DummyGraphProblem.inconsistent):
+            self.graph_problem.heuristic_dict = heuristic
+            result = ida_star(self.graph_problem)
+            self.assertEqual(result.state, self.graph_problem.goal)
+            self.assertEqual(result.cost, 41)
+            self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+
+    def test_ida_star_runs_and_events(self):
+        viewer = BaseViewer()
+        result = ida_star(self.graph_problem, viewer=viewer)
+        self.assertEqual(result.cost, 41)
+        names = [e.name for e in viewer.events]
+        self.assertEqual(names.count('started'), names.count('finished'))
+        self.assertEqual(names[-1], 'no_more_runs')
+
+    def test_ida_star_without_solution(self):
+        self.problem.is_goal = lambda state: False
+        self.assertIs(ida_star(self.problem), None)
+
+    def test_sma_star(self):
+        result = sma_star(self.problem, max_nodes=10)
+        self.assertEqual(result.state, GOAL)
+
+    def test_sma_star_finds_optimal_solution_with_enough_memory(self):
+        for max_nodes in (4, 5, 100):
+            result = sma_star(self.graph_problem, max_nodes=max_nodes,
+                              viewer=BaseViewer())
+            self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+            self.assertEqual(result.cost, 41)
+
+    def test_sma_star_finds_best_solution_that_fits_in_memory(self):
+        result = sma_star(self.graph_problem, max_nodes=3)
+        self.assertEqual([s for _, s in result.path()], ['s', 'l', 'r'])
+        self.assertEqual(result.cost, 42)
+
+    def test_sma_star_without_enough_memory(self):
+        self.assertIs(sma_star(self.graph_problem, max_nodes=2), None)
+        self.assertIs(sma_star(self.problem, max_nodes=6), None)
+
+    def test_ara_star(self):
+        results = list(ara_star(self.problem))
+        self.assertEqual(results[-1].state, GOAL)
+
+    def test_ara_star_improves_solutions(self):
+        viewer = BaseViewer()
+        results = list(ara_star(self.graph_problem, viewer=viewer))
+        self.assertEqual([r.cost for r in results], [42, 41])
+        self.assertEqual([s for _, s in results[-1].path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(viewer.events[-1].name, 'no_more_runs')
+
+    def test_ara_star_with_inconsistent_heuristic(self):
+        problem = DummyGraphProblem(DummyGraphProblem.inconsistent)
+        results = list(ara_star(problem, weight=1))
+        self.assertEqual(results[-1].cost, 41)
+
+    def test_ara_star_initial_state_is_goal(self):
+        self.graph_problem.initial_state = 'r'
+        results = list(ara_star(self.graph_problem))
+        self.assertEqual([r.path() for r in results], [[(None, 'r')]])
+
+    def test_ara_star_time_limit(self):
+        self.assertEqual(list(ara_star(self.graph_problem, time_limit=0)), [])
+
+    def test_ara_star_without_solution(self):
+        self.problem.is_goal = lambda state: False
+        self.assertEqual(list(ara_star(self.problem)), [])
+
+    def test_lpa_star(self):
+        result = LPAStar(self.graph_problem, viewer=BaseViewer()).search()
+        self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(result.cost, 41)
+
+    def test_lpa_star_replans_after_cost_changes(self):
+        self.graph_problem._map = dict((state, dict(costs)) for state, costs
+                                       in self.graph_problem._map.items())
+        planner = LPAStar(self.graph_problem)
+        self.assertEqual(planner.search().cost, 41)
+
+        self.graph_problem._map['a']['l'] = 20
+        planner.update_edges([('a', 'l')])
+        result = planner.search()
+        self.assertEqual([s for _, s in result.path()], ['s', 'l', 'r'])
+        self.assertEqual(result.cost, 42)
+
+        self.graph_problem._map['a']['l'] = 10
+        self.graph_problem._map['s']['a'] = 10
+        planner.update_edges([('a', 'l'), ('s', 'a')])
+        result = planner.search()
+        self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(result.cost, 36)
+
+    def test_lpa_star_without_solution(self):
+        self.graph_problem._map = dict(self.graph_problem._map,
+                                       r={}, l={'s': 26, 'a': 10})
+        self.assertIs(LPAStar(self.graph_problem).search(), None)
+
+    def test_bidirectional_breadth_first(self):
+        result = bidirectional_breadth_first(self.problem)
+        self.assertEqual(result.state, GOAL)
+        self.assertEqual(result.path(),
+                         [(a, GOAL[:i + 1]) for i, a in enumerate([None] + list(GOAL[1:]))])
+
+    def test_bidirectional_breadth_first_finds_shortest_path(self):
+        result = bidirectional_breadth_first(self.graph_problem)
+        self.assertEqual([s for _, s in result.path()], ['s', 'l', 'r'])
+        self.assertEqual(result.cost, 42)
+        self.assertEqual(result.depth, 2)
+
+    def test_bidirectional_uniform_cost(self):
+        result = bidirectional_uniform_cost(self.graph_problem)
+        self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(result.cost, 41)
+        self.assertIs(result.parent.parent.parent.parent, None)
+
+    def test_bidirectional_astar(self):
+        result = bidirectional_astar(self.graph_problem, viewer=BaseViewer())
+        self.assertEqual([s for _, s in result.path()], ['s', 'a', 'l', 'r'])
+        self.assertEqual(result.cost, 41)
+
+    def test_bidirectional_initial_state_is_goal(self):
+        self.graph_problem.initial_state = 'r'
+        result = bidirectional_uniform_cost(self.graph_problem)
+        self.assertEqual(result.path(), [(None, 'r')])
+
+    def test_bidirectional_without_solution(self):
+        self.graph_problem.goal = 'x'
+        self.graph_problem._map = dict(self.graph_problem._map, x={})
+        self.assertIs(bidirectional_uniform_cost(self.graph_problem), None)
+
     def test_astar_graph_execution_with_repeated_states_chooses_better_state(self):
         result = astar(self.graph_problem, graph_search=True)
         self.assertEqual(result.state, self.graph_problem.goal)
@@ -91,3 +284,412 @@ class TestSearch(unittest.TestCase):
         self.graph_problem.heuristic_dict = DummyGraphProblem.inadmissible
         result = astar(self.graph_problem, graph_search=False, viewer=v)
         self.assertEqual(result.state, self.graph_problem.goal)
+
+
+class EncodedGraphProblem(DummyGraphProblem):
+    def __init__(self, *args, **kwargs):
+        super(EncodedGraphProblem, self).__init__(*args, **kwargs)
+        self.encoded = 0
+
+    def encode_state(self, state):
+        self.encoded += 1
+        return ord(state)
+
+    def decode_state(self, encoded):
+        return chr(encoded)
+
+
+class TestEncodedStates(unittest.TestCase):
+    def setUp(self):
+        self.problem = EncodedGraphProblem(DummyGraphProblem.consistent)
+
+    def test_graph_search_uses_encoded_states(self):
+        v = SampleViewer([[('s', 0)], [('a', 15), ('l', 26)], [('l', 25)],
+                          [('r', 41)]])
+        result = astar(self.problem, graph_search=True, viewer=v)
+        self.assertEqual(result.state, 'r')
+        self.assertTrue(self.problem.encoded > 0)
+
+    def test_iterative_limited_depth_first(self):
+        result = iterative_limited_depth_first(self.problem,
+                                               graph_search=True,
+                                               incremental=True)
+        self.assertEqual(result.state, 'r')
+        self.assertTrue(self.problem.encoded > 0)
+
+    def test_ara_star(self):
+        solutions = list(ara_star(self.problem))
+        self.assertEqual(solutions[-1].cost, 41)
+        self.assertTrue(self.problem.encoded > 0)
+
+
+class EncodedProblem(DummyProblem):
+    def encode_state(self, state):
+        return state.encode('ascii')
+
+    def decode_state(self, encoded):
+        return encoded.decode('ascii')
+
+
+class TestExternalBreadthFirst(unittest.TestCase):
+    def setUp(self):
+        self.problem = EncodedProblem()
+        self.problem.initial_state = 'i'
+
+    def test_same_result_as_breadth_first(self):
+        for buffer_size in (1, 2, 100):
+            result = external_breadth_first(self.problem,
+                                            buffer_size=buffer_size)
+            expected = breadth_first(self.problem, graph_search=True)
+            self.assertEqual(result.path(), expected.path())
+            self.assertEqual(result.cost, expected.cost)
+            self.assertEqual(result.depth, expected.depth)
+
+    def test_graph_with_cycles(self):
+        problem = EncodedGraphProblem()
+        result = external_breadth_first(problem, buffer_size=1)
+        self.assertEqual([s for _, s in result.path()], ['s', 'l', 'r'])
+        self.assertEqual(result.cost, 42)
+
+    def test_goal_not_reachable(self):
+        problem = EncodedGraphProblem()
+        problem._map = dict(problem._map, x={})
+        problem.goal = 'x'
+        self.assertIs(external_breadth_first(problem), None)
+
+    def test_initial_state_is_goal(self):
+        self.problem.initial_state = GOAL
+        result = external_breadth_first(self.problem)
+        self.assertEqual(result.state, GOAL)
+        self.assertEqual(result.depth, 0)
+
+    def test_files_are_closed_before_removing_them(self):
+        readers = []
+
+        def read_records(path):
+            records = read_records.original(path)
+            readers.append(records)
+            return records
+
+        read_records.original = traditional._read_records
+        traditional._read_records = read_records
+        try:
+            result = external_breadth_first(self.problem, buffer_size=2)
+        finally:
+            traditional._read_records = read_records.original
+        self.assertEqual(result.state, GOAL)
+        self.assertTrue(readers)
+        # finished or closed generators have no frame (and no open file)
+        self.assertEqual([r for r in readers if r.gi_frame is not None], [])
+
+    def test_budget(self):
+        result = external_breadth_first(self.problem,
+                                        budget=SearchBudget(max_expanded=5))
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertEqual(result.reason, 'max_expanded')
+        self.assertEqual(result.expanded, 5)
+        self.assertIs(result.best, None)
+
+
+class TestBudgets(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+
+    def assertExceeded(self, result, reason='max_expanded', expanded=3):
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertEqual(result.reason, reason)
+        self.assertEqual(result.expanded, expanded)
+        self.assertIsNotNone(result.best)
+
+    def test_search_algorithms(self):
+        for algorithm in (breadth_first, depth_first, uniform_cost, greedy,
+                          astar, iterative_limited_depth_first, ida_star,
+                          sma_star, bidirectional_breadth_first,
+                          bidirectional_uniform_cost):
+            result = algorithm(self.problem,
+                               budget=SearchBudget(max_expanded=3))
+            self.assertExceeded(result)
+
+    def test_bidirectional_astar(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        result = bidirectional_astar(problem,
+                                     budget=SearchBudget(max_expanded=1))
+        self.assertExceeded(result, expanded=1)
+
+    def test_limited_depth_first(self):
+        result = limited_depth_first(self.problem, 10,
+                                     budget=SearchBudget(max_expanded=3))
+        self.assertExceeded(result)
+
+    def test_incremental_iterative_limited_depth_first(self):
+        result = iterative_limited_depth_first(
+            self.problem, incremental=True,
+            budget=SearchBudget(max_expanded=3))
+        self.assertExceeded(result)
+
+    def test_best_node_has_lowest_heuristic(self):
+        result = greedy(self.problem, budget=SearchBudget(max_expanded=3))
+        # checked before its expansion
+        self.assertEqual(result.best.state, 'iabc')
+
+    def test_max_fringe(self):
+        result = breadth_first(self.problem, budget=SearchBudget(max_fringe=4))
+        # after expanding 'i', 'ia' and 'ib'
+        self.assertExceeded(result, 'max_fringe', 3)
+
+    def test_enough_budget(self):
+        result = astar(self.problem, budget=SearchBudget(max_expanded=100))
+        self.assertEqual(result.state, GOAL)
+
+    def test_ara_star_stops(self):
+        budget = SearchBudget(max_expanded=3)
+        results = list(ara_star(self.problem, budget=budget))
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], BudgetExceeded)
+        self.assertEqual(results[0].reason, 'max_expanded')
+        self.assertEqual(results[0].expanded, 3)
+        self.assertEqual(results[0].best.state[0], 'i')
+
+    def test_ara_star_stops_with_best_solution(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        budget = SearchBudget(max_expanded=2)
+        solution, result = list(ara_star(problem, budget=budget))
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertIs(result.best, solution)
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+
+    def test_tree_search(self):
+        stats = SearchStats()
+        result = breadth_first(self.problem, stats=stats)
+        self.assertEqual(result.state, GOAL)
+        # only the 364 nodes shorter than the goal have successors
+        self.assertEqual(stats.generated, 3 * 364)
+        self.assertEqual(stats.calls['actions'], stats.expanded)
+        self.assertEqual(stats.calls['result'], stats.generated)
+        self.assertEqual(stats.duplicates, 0)
+        self.assertTrue(stats.max_fringe > 3)
+
+    def test_graph_search_counts_duplicates(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        stats = SearchStats()
+        breadth_first(problem, graph_search=True, stats=stats)
+        self.assertTrue(stats.duplicates > 0)
+
+    def test_heuristic_calls(self):
+        stats = SearchStats()
+        astar(self.problem, stats=stats)
+        self.assertEqual(stats.calls['heuristic'], stats.generated + 1)
+        self.assertTrue(stats.time['heuristic'] >= 0)
+
+    def test_problem_is_restored(self):
+        astar(self.problem, stats=SearchStats())
+        self.assertEqual(vars(self.problem), {'initial_state': 'i'})
+
+    def test_iterative_limited_depth_first(self):
+        stats = SearchStats()
+        iterative_limited_depth_first(self.problem, stats=stats)
+        self.assertEqual(stats.iterations, len(GOAL))
+        self.assertTrue(stats.expanded > 0)
+
+    def test_graph_search_counts_fringe_replacements(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        stats = SearchStats()
+        uniform_cost(problem, graph_search=True, stats=stats)
+        self.assertEqual(stats.fringe_replacements, 1)
+
+    def test_other_algorithms(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        for algorithm in (ida_star, sma_star, bidirectional_breadth_first,
+                          bidirectional_uniform_cost, bidirectional_astar):
+            stats = SearchStats()
+            result = algorithm(problem, stats=stats)
+            self.assertEqual(result.state, 'r')
+            self.assertTrue(stats.expanded > 0)
+            self.assertTrue(stats.generated >= stats.expanded)
+            self.assertTrue(stats.max_fringe > 0)
+            self.assertTrue(stats.calls['actions'] > 0)
+            self.assertFalse('actions' in vars(problem))
+
+    def test_ida_star_counts_runs(self):
+        stats = SearchStats()
+        ida_star(DummyGraphProblem(DummyGraphProblem.consistent), stats=stats)
+        self.assertTrue(stats.iterations > 1)
+
+    def test_ara_star(self):
+        stats = SearchStats()
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        solutions = list(ara_star(problem, stats=stats))
+        self.assertEqual(solutions[-1].cost, 41)
+        self.assertTrue(stats.iterations > 1)
+        self.assertTrue(stats.expanded > 0)
+        self.assertTrue(stats.calls['heuristic'] > 0)
+
+    def test_ara_star_counts_reopened_states(self):
+        stats = SearchStats()
+        problem = DummyGraphProblem(DummyGraphProblem.inconsistent)
+        list(ara_star(problem, weight=1, stats=stats))
+        # 'l' is reached by a cheaper path after being expanded, and then
+        # 'r', still in the fringe
+        self.assertEqual(stats.reopened, 1)
+        self.assertEqual(stats.fringe_replacements, 1)
+
+    def test_lpa_star(self):
+        stats = SearchStats()
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        problem._map = dict((state, dict(costs))
+                            for state, costs in problem._map.items())
+        planner = LPAStar(problem, stats=stats)
+        planner.search()
+        self.assertEqual(stats.iterations, 1)
+        self.assertEqual(stats.reopened, 0)
+        self.assertTrue(stats.expanded > 0)
+        self.assertTrue(stats.calls['heuristic'] > 0)
+        self.assertFalse('actions' in vars(problem))
+
+        problem._map['a']['l'] = 20
+        planner.update_edges([('a', 'l')])
+        planner.search()
+        self.assertEqual(stats.iterations, 2)
+        self.assertTrue(stats.reopened > 0)
+
+
+class TestLazyDepthFirst(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+
+    def test_creates_only_the_explored_successors(self):
+        self.problem.is_goal = lambda state: state == 'iaaaaaa'
+        stats = SearchStats()
+        result = limited_depth_first(self.problem, depth_limit=6, lazy=True,
+                                     stats=stats)
+        self.assertEqual(result.state, 'iaaaaaa')
+        # the goal is at the end of the first branch explored
+        self.assertEqual(stats.generated, 6)
+        self.assertEqual(stats.calls['result'], 6)
+        self.assertEqual(stats.max_fringe, 6)
+
+        stats = SearchStats()
+        limited_depth_first(self.problem, depth_limit=6, stats=stats)
+        self.assertTrue(stats.calls['result'] > 6)
+
+    def test_explores_the_first_action_first(self):
+        explored = []
+        self.problem.is_goal = lambda state: explored.append(state)
+        limited_depth_first(self.problem, depth_limit=2, lazy=True)
+        self.assertEqual(explored[:6], ['i', 'ia', 'iaa', 'iab', 'iac', 'ib'])
+
+    def test_graph_search_discards_repeated_states(self):
+        problem = DummyGraphProblem(DummyGraphProblem.consistent)
+        stats = SearchStats()
+        depth_first(problem, graph_search=True, lazy=True, stats=stats)
+        self.assertTrue(stats.duplicates > 0)
+
+    def test_budget(self):
+        result = depth_first(self.problem, lazy=True,
+                             budget=SearchBudget(max_expanded=3))
+        self.assertIsInstance(result, BudgetExceeded)
+        self.assertEqual(result.expanded, 3)
+
+
+class TestExecutor(unittest.TestCase):
+    def setUp(self):
+        self.problem = DummyProblem()
+        self.problem.initial_state = 'i'
+        self.executor = ThreadPoolExecutor(max_workers=3)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_same_results(self):
+        for search in (breadth_first, depth_first, uniform_cost, greedy,
+                       astar):
+            expected = search(self.problem, graph_search=True)
+            result = search(self.problem, graph_search=True,
+                            executor=self.executor)
+            self.assertEqual(result.path(), expected.path())
+
+    def test_stats(self):
+        stats = SearchStats()
+        astar(self.problem, executor=self.executor, stats=stats)
+        self.assertEqual(stats.calls['result'], stats.generated)
+        self.assertEqual(stats.calls['heuristic'], stats.generated + 1)
+
+
+class PlainFlipBitsProblem(FlipBitsProblem):
+    '''Same problem, without the state hashes.'''
+    state_hash = SearchProblem.state_hash
+    update_state_hash = SearchProblem.update_state_hash
+
+
+class TestStateHashing(unittest.TestCase):
+    def assertSameSearch(self, search, problem_class, **kwargs):
+        expected_stats = SearchStats()
+        expected = search(PlainFlipBitsProblem(6), graph_search=True,
+                          stats=expected_stats, **kwargs)
+        stats = SearchStats()
+        result = search(problem_class(6), graph_search=True, stats=stats,
+                        **kwargs)
+        self.assertEqual(result.path(), expected.path())
+        self.assertEqual((stats.expanded, stats.duplicates),
+                         (expected_stats.expanded, expected_stats.duplicates))
+
+    def test_same_search(self):
+        for search in (breadth_first, depth_first, uniform_cost, greedy,
+                       astar):
+            self.assertSameSearch(search, FlipBitsProblem)
+
+    def test_collisions_are_verified(self):
+        for search in (breadth_first, astar):
+            self.assertSameSearch(search, CollidingFlipBitsProblem)
+
+    def test_compact_nodes(self):
+        self.assertSameSearch(astar, FlipBitsProblem, compact_nodes=True)
+
+    def test_lazy_depth_first(self):
+        self.assertSameSearch(depth_first, FlipBitsProblem, lazy=True)
+
+    def test_iterative_limited_depth_first(self):
+        result = iterative_limited_depth_first(FlipBitsProblem(4),
+                                               graph_search=True)
+        self.assertEqual(result.state, (1, 1, 1, 1))
+
+
+class TestBloomFilterMemory(unittest.TestCase):
+    def setUp(self):
+        self.problem = FlipBitsProblem(8)
+
+    def test_same_search_as_exact_memory(self):
+        for search in (breadth_first, depth_first):
+            expected = search(self.problem, graph_search=True)
+            stats = SearchStats()
+            result = search(self.problem, graph_search=True, stats=stats,
+                            memory=BloomFilter(256, error_rate=0.0001))
+            self.assertEqual(result.path(), expected.path())
+            self.assertTrue(stats.pruning_error < 0.001)
+
+    def test_lazy_depth_first(self):
+        memory = BloomFilter(256)
+        result = depth_first(self.problem, graph_search=True, lazy=True,
+                             memory=memory)
+        self.assertEqual(result.state, (1,) * 8)
+        self.assertTrue(memory.added > 0)
+
+    def test_full_filter_prunes_new_states(self):
+        stats = SearchStats()
+        result = breadth_first(self.problem, graph_search=True, stats=stats,
+                               memory=BloomFilter(1, error_rate=0.5))
+        self.assertIsNone(result)
+        self.assertEqual(stats.pruning_error, 1)
+        self.assertTrue(stats.expanded < 256)
+
+    def test_without_stats(self):
+        result = breadth_first(self.problem, graph_search=True,
+                               memory=BloomFilter(256))
+        self.assertEqual(result.state, (1,) * 8)
@@ -1,7 +1,13 @@
 # coding=utf-8
+import random
 import unittest
 from tests.search.dummies import DummyNode
-from simpleai.search.utils import FifoList, BoundedPriorityQueue, LifoList, argmax, argmin
+from simpleai.search.utils import (FifoList, BoundedPriorityQueue, LifoList,
+                                   IndexedFifoList, IndexedLifoList,
+                                   IndexedPriorityQueue, LRUCache,
+                                   EncodedStateSet, BloomFilter,
+                                   UniqueStatesBoundedPriorityQueue, argmax,
+                                   argmin)
 
 
 def sorted_equals_pop(l):
@@ -77,6 +83,28 @@ class TestBoundedPriorityQueue(unittest.TestCase):
         self.assertEqual(len(q), 1)
         self.assertIs(q[0], b)
 
+    def test_limit_keeps_the_best(self):
+        rnd = random.Random(0)
+        values = [rnd.randint(0, 1000) for _ in range(500)]
+        q = BoundedPriorityQueue(50)
+        q.extend(DummyNode(v) for v in values)
+        self.assertEqual([q.pop().value for _ in range(len(q))],
+                         sorted(values)[:50])
+
+    def test_pop_worst(self):
+        rnd = random.Random(1)
+        values = [rnd.randint(0, 1000) for _ in range(300)]
+        q = BoundedPriorityQueue()
+        q.extend(DummyNode(v) for v in values)
+        self.assertEqual([q.pop_worst().value for _ in range(len(q))],
+                         sorted(values, reverse=True))
+
+    def test_first_is_best(self):
+        q = BoundedPriorityQueue(3)
+        q.extend([DummyNode(5), DummyNode(2), DummyNode(7), DummyNode(1)])
+        self.assertEqual(q[0].value, 1)
+        self.assertEqual(sorted(x.value for x in q), [1, 2, 5])
+
     def test_sorted_priority(self):
         q = BoundedPriorityQueue()
         q.append(DummyNode(3))
@@ -85,6 +113,70 @@ class TestBoundedPriorityQueue(unittest.TestCase):
         self.assertTrue(sorted_equals_pop(q))
 
 
+class IndexedFringeTests(object):
+    def test_find_by_state(self):
+        a = DummyNode(1, 'a')
+        self.f.append(a)
+        self.assertIs(self.f.find('a'), a)
+        self.assertIs(self.f.find('b'), None)
+
+    def test_pop_removes_from_index(self):
+        self.f.append(DummyNode(1, 'a'))
+        self.f.pop()
+        self.assertIs(self.f.find('a'), None)
+        self.assertEqual(len(self.f.index), 0)
+
+    def test_replace(self):
+        a = DummyNode(2, 'a')
+        b = DummyNode(1, 'a')
+        self.f.append(DummyNode(3, 'c'))
+        self.f.append(a)
+        self.f.replace(a, b)
+        self.assertEqual(len(self.f), 2)
+        self.assertIs(self.f.find('a'), b)
+        self.assertNotIn(a, list(self.f))
+
+    def test_clear(self):
+        self.f.extend([DummyNode(1, 'a'), DummyNode(2, 'b')])
+        self.f.clear()
+        self.assertEqual(len(self.f), 0)
+        self.assertIs(self.f.find('a'), None)
+
+
+class TestIndexedLifoList(IndexedFringeTests, unittest.TestCase):
+    def setUp(self):
+        self.f = IndexedLifoList()
+
+
+class TestIndexedFifoList(IndexedFringeTests, unittest.TestCase):
+    def setUp(self):
+        self.f = IndexedFifoList()
+
+
+class TestIndexedPriorityQueue(IndexedFringeTests, unittest.TestCase):
+    def setUp(self):
+        self.f = IndexedPriorityQueue()
+
+    def test_pop_works_with_order(self):
+        self.f.extend([DummyNode(3, 'c'), DummyNode(1, 'a'), DummyNode(2, 'b')])
+        self.assertEqual([self.f.pop().state for _ in range(3)],
+                         ['a', 'b', 'c'])
+
+    def test_remove_and_replace_keep_heap_order(self):
+        rnd = random.Random(0)
+        nodes = [DummyNode(rnd.randint(0, 100), i) for i in range(200)]
+        self.f.extend(nodes)
+        for node in nodes[::3]:
+            self.f.remove(node)
+        for node in nodes[1::3]:
+            self.f.replace(node, DummyNode(node.value - 50, node.state))
+        expected = sorted(x.value for x in self.f)
+        self.assertEqual([self.f.pop().value for _ in range(len(self.f))],
+                         expected)
+        self.assertEqual(len(self.f.stale), 0)
+        self.assertEqual(len(self.f.index), 0)
+
+
 class TestArgMax(unittest.TestCase):
     def setUp(self):
         self.d = {'a': 3, 'b': 1, 'c': 3}
@@ -121,3 +213,120 @@ class TestArgMin(unittest.TestCase):
         self.assertRaises(ValueError, argmin, [], lambda x: x)
 
 
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(2)
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+
+    def test_get(self):
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), None)
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 1, 'misses': 1, 'size': 2})
+
+    def test_discards_least_recently_used(self):
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_no_limit(self):
+        cache = LRUCache()
+        for i in range(100):
+            cache.put(i, i)
+        self.assertEqual(len(cache), 100)
+
+
+class TestEncodedStateSet(unittest.TestCase):
+    def setUp(self):
+        self.set = EncodedStateSet(lambda state: int(''.join(state)),
+                                   lambda encoded: tuple(str(encoded)))
+        self.set.add(('1', '2'))
+        self.set.add(('1', '2'))
+        self.set.add(('3', '4'))
+
+    def test_stores_encoded_states_once(self):
+        self.assertEqual(len(self.set), 2)
+        self.assertEqual(self.set.encoded, set([12, 34]))
+        self.assertIn(('1', '2'), self.set)
+        self.assertNotIn(('2', '1'), self.set)
+
+    def test_iterates_decoded_states(self):
+        self.assertEqual(sorted(self.set), [('1', '2'), ('3', '4')])
+
+    def test_discard(self):
+        self.set.discard(('1', '2'))
+        self.assertNotIn(('1', '2'), self.set)
+        self.assertEqual(len(self.set), 1)
+
+    def test_cant_iterate_without_decode(self):
+        states = EncodedStateSet(hash, iterable=[1, 2])
+        self.assertRaises(TypeError, list, states)
+
+
+class TestBloomFilter(unittest.TestCase):
+    def setUp(self):
+        self.filter = BloomFilter(1000, error_rate=0.01)
+
+    def test_sized_for_capacity_and_error_rate(self):
+        # about 9.6 bits and 7 hashes per state for 1%
+        self.assertEqual(self.filter.size, 9586)
+        self.assertEqual(self.filter.hashes_count, 7)
+        self.assertEqual(self.filter.memory_size(), 1199)
+
+    def test_no_false_negatives(self):
+        self.filter.update(range(1000))
+        self.assertTrue(all(i in self.filter for i in range(1000)))
+        self.assertEqual(self.filter.memory_size(), 1199)
+
+    def test_false_positive_rate(self):
+        self.assertEqual(self.filter.false_positive_rate(), 0)
+        self.filter.update(range(1000))
+        false_positives = sum(1 for i in range(1000, 11000)
+                              if i in self.filter)
+        self.assertTrue(false_positives < 200)
+        self.assertAlmostEqual(self.filter.false_positive_rate(), 0.01,
+                               delta=0.005)
+
+    def test_rate_grows_over_capacity(self):
+        self.filter.update(range(5000))
+        self.assertTrue(self.filter.false_positive_rate() > 0.5)
+
+    def test_clear(self):
+        self.filter.update([(1, 2), (3, 4)])
+        self.assertIn((1, 2), self.filter)
+        self.filter.clear()
+        self.assertNotIn((1, 2), self.filter)
+        self.assertEqual(self.filter.bits_set, 0)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, BloomFilter, 0)
+        self.assertRaises(ValueError, BloomFilter, 10, error_rate=1)
+
+
+class TestUniqueStatesBoundedPriorityQueue(unittest.TestCase):
+    def setUp(self):
+        self.f = UniqueStatesBoundedPriorityQueue(3)
+
+    def test_doesnt_repeat_states(self):
+        self.f.extend([DummyNode(1, 'a'), DummyNode(0, 'a'),
+                       DummyNode(2, 'b')])
+        self.assertEqual(len(self.f), 2)
+        self.assertEqual(self.f.states, set(['a', 'b']))
+
+    def test_discarded_states_can_be_added_again(self):
+        self.f.extend([DummyNode(i, s) for i, s in enumerate('abc')])
+        self.f.append(DummyNode(-1, 'd'))
+        self.assertEqual(self.f.states, set(['a', 'b', 'd']))
+        self.f.append(DummyNode(-2, 'c'))
+        self.assertEqual(self.f.states, set(['a', 'c', 'd']))
+        self.assertEqual(self.f.pop().state, 'c')
+        self.assertEqual(self.f.states, set(['a', 'd']))
+
+    def test_worse_than_full_queue(self):
+        self.f.extend([DummyNode(i, s) for i, s in enumerate('abc')])
+        self.f.append(DummyNode(5, 'd'))
+        self.assertEqual(self.f.states, set(['a', 'b', 'c']))